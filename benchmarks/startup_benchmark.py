@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 09:12:44 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+from tempfile import TemporaryDirectory
+from statistics import median
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def parse_args():
+
+    # Set up argparser options
+    ap = argparse.ArgumentParser(description = "Measures the time from launching a script to its first ffmpeg call")
+    ap.add_argument("-f", "--folder", default = None, type = str, help = "Folder containing (at least 2) test videos")
+    ap.add_argument("-s", "--script", default = "stitcher", type = str, choices = ["stitcher", "splitter"],
+                    help = "Which script to benchmark")
+    ap.add_argument("-n", "--runs", default = 10, type = int, help = "Number of times to launch the script")
+    ap.add_argument("-t", "--threshold", default = None, type = float,
+                    help = "Exit with an error if the median time-to-first-spawn is above this many milliseconds")
+
+    # Convert argument inputs into a dictionary
+    ap_result = vars(ap.parse_args())
+
+    return ap_result
+
+# .....................................................................................................................
+
+def build_bootstrap_code():
+
+    '''
+    Code run (using 'python -c') to launch the script being benchmarked. Wraps subprocess.Popen so that
+    the (wall clock) time of the first ffmpeg/ffprobe launch is written to the file given by the
+    STITCHER_SPAWN_MARKER environment variable. The script itself is run unmodified using runpy
+    '''
+
+    return "\n".join(["import os, sys, time, runpy, subprocess",
+                      "_orig_init = subprocess.Popen.__init__",
+                      "def _timed_init(self, args, *pargs, **kwargs):",
+                      "    prog_name = os.path.basename(str(args[0] if isinstance(args, (list, tuple)) else args))",
+                      "    marker_path = os.environ.get('STITCHER_SPAWN_MARKER')",
+                      "    if prog_name in ('ffmpeg', 'ffprobe') and marker_path and not os.path.exists(marker_path):",
+                      "        with open(marker_path, 'w') as out_file:",
+                      "            out_file.write(repr(time.time()))",
+                      "    return _orig_init(self, args, *pargs, **kwargs)",
+                      "subprocess.Popen.__init__ = _timed_init",
+                      "sys.argv = sys.argv[1:]",
+                      "sys.path.insert(0, os.path.dirname(os.path.abspath(sys.argv[0])))",
+                      "runpy.run_path(sys.argv[0], run_name = '__main__')"])
+
+# .....................................................................................................................
+
+def build_script_args(script_name, input_folder_path, output_folder_path):
+
+    ''' Helper used to build non-interactive script arguments, so that runs don't stop for user input '''
+
+    shared_args = ["-f", input_folder_path, "-n", "bench", "-p", output_folder_path, "-k", "off"]
+    if script_name == "splitter":
+        return shared_args + ["-d", "60"]
+
+    return shared_args
+
+# .....................................................................................................................
+
+def time_single_run(script_path, script_args_list, work_folder_path):
+
+    '''
+    Function which launches a script once and measures the time until it first launches ffmpeg,
+    as well as the total run time. Times are in milliseconds. Spawn time is None if ffmpeg was never called
+
+    Outputs:
+        spawn_ms, total_ms, return_code
+    '''
+
+    # Each run gets its own marker file, which the bootstrapping code writes the spawn time into
+    marker_path = os.path.join(work_folder_path, "spawn_marker.txt")
+    if os.path.exists(marker_path):
+        os.remove(marker_path)
+    run_env = dict(os.environ, STITCHER_SPAWN_MARKER = marker_path)
+
+    # Launch the script (in the work folder, so that history files etc. don't pollute the repo)
+    run_command_list = [sys.executable, "-c", build_bootstrap_code(), script_path, *script_args_list]
+    t_start = time.time()
+    proc_out = subprocess.run(run_command_list, cwd = work_folder_path, env = run_env,
+                              stdin = subprocess.DEVNULL, stdout = subprocess.PIPE, stderr = subprocess.PIPE)
+    t_end = time.time()
+
+    # Read back the time of the first ffmpeg call
+    spawn_ms = None
+    if os.path.exists(marker_path):
+        with open(marker_path, "r") as in_file:
+            spawn_ms = 1000.0 * (float(in_file.read()) - t_start)
+    total_ms = 1000.0 * (t_end - t_start)
+
+    return spawn_ms, total_ms, proc_out.returncode
+
+# .....................................................................................................................
+
+def time_interpreter_startup(num_runs):
+
+    ''' Measures bare interpreter start-up time (in milliseconds), as a reference for the script timings '''
+
+    times_ms_list = []
+    for _ in range(num_runs):
+        t_start = time.time()
+        subprocess.run([sys.executable, "-c", "pass"])
+        times_ms_list.append(1000.0 * (time.time() - t_start))
+
+    return times_ms_list
+
+# .....................................................................................................................
+
+def summarize_ms(times_ms_list):
+
+    ''' Helper used to summarize a list of timings (in milliseconds) '''
+
+    if len(times_ms_list) == 0:
+        return {"min": None, "median": None, "max": None}
+
+    return {"min": round(min(times_ms_list), 2),
+            "median": round(median(times_ms_list), 2),
+            "max": round(max(times_ms_list), 2)}
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Setup
+
+# Get script arguments
+input_args = parse_args()
+arg_input_folder = input_args.get("folder")
+arg_script_name = input_args.get("script")
+arg_num_runs = max(1, input_args.get("runs"))
+arg_threshold_ms = input_args.get("threshold")
+
+# Make sure we have something to run on
+if arg_input_folder is None or not os.path.isdir(arg_input_folder):
+    print("", "Need a folder of test videos to benchmark with (use -f)! Quitting...", sep = "\n")
+    quit()
+input_folder_path = os.path.abspath(arg_input_folder)
+
+# Find the script to benchmark
+repo_folder_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+script_path = os.path.join(repo_folder_path, "{}_cli.py".format(arg_script_name))
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Run benchmark
+
+print("", "Benchmarking start-up of: {}".format(os.path.basename(script_path)), sep = "\n")
+
+spawn_ms_list = []
+total_ms_list = []
+num_failed = 0
+for each_run_idx in range(arg_num_runs):
+
+    # Use fresh output/work folders each run, so that there are never overwrite prompts or resumed jobs
+    with TemporaryDirectory() as work_folder_path:
+        output_folder_path = os.path.join(work_folder_path, "output")
+        os.makedirs(output_folder_path)
+        script_args_list = build_script_args(arg_script_name, input_folder_path, output_folder_path)
+        spawn_ms, total_ms, return_code = time_single_run(script_path, script_args_list, work_folder_path)
+
+    # Record results
+    num_failed += int(return_code != 0 or spawn_ms is None)
+    if spawn_ms is not None:
+        spawn_ms_list.append(spawn_ms)
+    total_ms_list.append(total_ms)
+    print("  Run {:>3}: first spawn {} ms, total {:.1f} ms".format(1 + each_run_idx,
+                                                                  "n/a" if spawn_ms is None else round(spawn_ms, 1),
+                                                                  total_ms))
+
+# Get reference interpreter start-up time
+interpreter_ms_list = time_interpreter_startup(arg_num_runs)
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Report
+
+results_dict = {"script": os.path.basename(script_path),
+                "runs": arg_num_runs,
+                "failed_runs": num_failed,
+                "time_to_first_spawn_ms": summarize_ms(spawn_ms_list),
+                "total_run_ms": summarize_ms(total_ms_list),
+                "interpreter_startup_ms": summarize_ms(interpreter_ms_list)}
+
+print("", "Results:", json.dumps(results_dict, indent = 2), sep = "\n")
+
+# Fail loudly if start-up has regressed past the given threshold
+median_spawn_ms = results_dict["time_to_first_spawn_ms"]["median"]
+if arg_threshold_ms is not None:
+    over_threshold = (median_spawn_ms is None or median_spawn_ms > arg_threshold_ms)
+    if over_threshold:
+        print("", "!" * 48, "Median time-to-first-spawn is above {} ms!".format(arg_threshold_ms), "!" * 48, sep = "\n")
+        quit(1)
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
+
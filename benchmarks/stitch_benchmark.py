@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 11:02:17 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import os
+import sys
+import json
+import argparse
+import datetime as dt
+
+from tempfile import TemporaryDirectory
+from itertools import product
+from statistics import median
+
+# Make sure the repo folder is importable, since this script lives in a sub-folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from local.lib.timing import Phase_Timer
+from local.lib.benchmarking import generate_synthetic_clips, get_machine_info
+from local.lib.selection import default_video_exts
+from local.lib.probing import probe_many_videos
+from local.lib.containers import normalize_extension, select_bitstream_filters
+from local.lib.stitching import build_stitch_command
+from local.lib.engines import ffmpeg_supports_concatf
+from local.lib.atomic_output import discard_partial_output
+from local.lib.ffmpeg_helpers import captured_subprocess
+
+from local.eolib.utils.files import iter_sorted_files
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def parse_args():
+
+    # Set up argparser options
+    ap = argparse.ArgumentParser(description = "Times stitching of synthetic clips, across a matrix of settings")
+    ap.add_argument("-c", "--counts", default = "10,100", type = str,
+                    help = "Comma separated list of clip counts to stitch (e.g. 10,1000,50000)")
+    ap.add_argument("-d", "--durations", default = "1", type = str,
+                    help = "Comma separated list of clip durations, in seconds")
+    ap.add_argument("-v", "--codecs", default = "h264", type = str,
+                    help = "Comma separated list of video codecs (h264, hevc or mpeg4)")
+    ap.add_argument("-x", "--containers", default = "mp4", type = str,
+                    help = "Comma separated list of clip containers (e.g. mp4,ts,mkv)")
+    ap.add_argument("-a", "--audio", default = "on", type = str,
+                    help = "Comma separated list of audio settings (on and/or off)")
+    ap.add_argument("-g", "--engines", default = "demuxer", type = str,
+                    help = "Comma separated list of stitching engines to compare (demuxer and/or protocol)")
+    ap.add_argument("-n", "--repeats", default = 3, type = int, help = "Number of times to repeat each stitch")
+    ap.add_argument("-w", "--workdir", default = None, type = str,
+                    help = "Folder for generated clips. Clips are kept and re-used if given, otherwise deleted")
+    ap.add_argument("-o", "--output", default = None, type = str, help = "Path to save json results")
+
+    # Convert argument inputs into a dictionary
+    ap_result = vars(ap.parse_args())
+
+    return ap_result
+
+# .....................................................................................................................
+
+def split_csv_arg(arg_str, convert_func = str):
+
+    ''' Helper used to interpret comma separated script arguments '''
+
+    return [convert_func(each_str.strip()) for each_str in arg_str.split(",") if each_str.strip() != ""]
+
+# .....................................................................................................................
+
+def build_config_name(num_clips, duration_sec, video_codec, container_ext, include_audio):
+
+    ''' Helper used to name each benchmark configuration (also used as the clip folder name) '''
+
+    audio_str = "audio" if include_audio else "noaudio"
+    return "{}x{}s_{}_{}_{}".format(num_clips, duration_sec, video_codec, container_ext.lstrip("."), audio_str)
+
+# .....................................................................................................................
+
+def time_stitch_once(stitch_engine, clip_folder_path, output_path, temp_folder_path):
+
+    '''
+    Function which runs through every step of stitching (the same way the stitcher script does),
+    while timing each phase: listing, probing, list writing & muxing
+
+    Outputs:
+        phase_times_dict, return_code, output_bytes
+    '''
+
+    timer = Phase_Timer()
+    output_ext = normalize_extension(os.path.splitext(output_path)[1])
+
+    # Find clips, same as when a folder is given to the stitcher
+    with timer.phase("listing"):
+        sorted_files_iter = iter_sorted_files(clip_folder_path, allowable_exts_list = default_video_exts(),
+                                              get_stats = False)
+        input_paths_list = [each_file.path for each_file in sorted_files_iter]
+
+    # Probe clips & figure out output settings
+    with timer.phase("probing"):
+        probe_results_list = probe_many_videos(input_paths_list)
+        bsf_args_list, _ = select_bitstream_filters(probe_results_list, output_ext)
+
+    # Write the list of files for ffmpeg
+    with timer.phase("list_writing"):
+        run_command_list, _ = build_stitch_command(stitch_engine, input_paths_list, temp_folder_path, output_path,
+                                                   bsf_args_list, protocol_list_file = ffmpeg_supports_concatf())
+
+    # Run the actual stitching
+    with timer.phase("muxing"):
+        proc_out = captured_subprocess(run_command_list)
+
+    # Clean up output, so repeated runs don't fill the disk
+    output_bytes = os.path.getsize(output_path) if os.path.exists(output_path) else 0
+    discard_partial_output(output_path)
+
+    return timer.to_dict(), proc_out.returncode, output_bytes
+
+# .....................................................................................................................
+
+def summarize_runs(runs_list):
+
+    ''' Helper used to get the median time of each phase, over all (successful) runs '''
+
+    ok_runs_list = [each_run for each_run in runs_list if each_run["return_code"] == 0]
+    if len(ok_runs_list) == 0:
+        return None
+
+    phase_names_list = ok_runs_list[0]["phase_sec"].keys()
+    median_times_dict = {each_name: round(median([each_run["phase_sec"][each_name] for each_run in ok_runs_list]), 4)
+                         for each_name in phase_names_list}
+
+    return median_times_dict
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Setup
+
+# Get script arguments
+input_args = parse_args()
+arg_counts_list = split_csv_arg(input_args.get("counts"), int)
+arg_durations_list = split_csv_arg(input_args.get("durations"), float)
+arg_codecs_list = split_csv_arg(input_args.get("codecs"))
+arg_containers_list = [normalize_extension(each_ext) for each_ext in split_csv_arg(input_args.get("containers"))]
+arg_audio_list = [each_str.lower() == "on" for each_str in split_csv_arg(input_args.get("audio"))]
+arg_engines_list = split_csv_arg(input_args.get("engines"))
+arg_num_repeats = max(1, input_args.get("repeats"))
+arg_work_folder = input_args.get("workdir")
+arg_output_path = input_args.get("output")
+
+# Pick a default results path, named by time so that results from different runs don't overwrite each other
+if arg_output_path is None:
+    arg_output_path = "stitch_benchmark_{}.json".format(dt.datetime.now().strftime("%Y%m%d_%H%M%S"))
+
+# Build every combination of settings to test
+config_matrix_list = list(product(arg_counts_list, arg_durations_list, arg_codecs_list,
+                                  arg_containers_list, arg_audio_list))
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Run benchmarks
+
+# Use a temporary work folder, unless one is given (so that generated clips can be re-used)
+temp_dir_obj = TemporaryDirectory() if arg_work_folder is None else None
+work_folder_path = temp_dir_obj.name if temp_dir_obj is not None else os.path.abspath(arg_work_folder)
+os.makedirs(work_folder_path, exist_ok = True)
+
+print("", "Running {} benchmark configurations...".format(len(config_matrix_list)), sep = "\n")
+
+config_results_list = []
+for each_config in config_matrix_list:
+
+    num_clips, duration_sec, video_codec, container_ext, include_audio = each_config
+    config_name = build_config_name(*each_config)
+    clip_folder_path = os.path.join(work_folder_path, config_name)
+    print("", "{}".format(config_name), sep = "\n")
+
+    # Create (or re-use) synthetic clips for this configuration
+    clip_paths_list = generate_synthetic_clips(clip_folder_path, num_clips, duration_sec,
+                                               video_codec, container_ext, include_audio)
+    if clip_paths_list is None:
+        print("  Couldn't generate clips (encoder or container not supported?), skipping...")
+        continue
+    input_bytes = sum(os.path.getsize(each_path) for each_path in clip_paths_list)
+
+    for each_engine in arg_engines_list:
+
+        # Time repeated stitching of the clips
+        runs_list = []
+        for each_repeat_idx in range(arg_num_repeats):
+            with TemporaryDirectory(dir = work_folder_path) as temp_folder_path:
+                output_path = os.path.join(temp_folder_path, "stitched{}".format(container_ext))
+                phase_times_dict, return_code, output_bytes = time_stitch_once(each_engine, clip_folder_path,
+                                                                               output_path, temp_folder_path)
+            runs_list.append({"phase_sec": phase_times_dict, "return_code": return_code, "output_bytes": output_bytes})
+            print("  {} run {}: {:.3f} s (return code {})".format(each_engine, 1 + each_repeat_idx,
+                                                                 phase_times_dict["total"], return_code))
+
+        # Summarize results, including overall throughput
+        median_times_dict = summarize_runs(runs_list)
+        throughput_mb_per_sec = None
+        if median_times_dict is not None and median_times_dict["total"] > 0:
+            throughput_mb_per_sec = round((input_bytes / (1024 ** 2)) / median_times_dict["total"], 2)
+
+        config_results_list.append({"name": config_name,
+                                    "engine": each_engine,
+                                    "num_clips": num_clips,
+                                    "clip_duration_sec": duration_sec,
+                                    "video_codec": video_codec,
+                                    "container": container_ext,
+                                    "audio": include_audio,
+                                    "input_bytes": input_bytes,
+                                    "runs": runs_list,
+                                    "median_phase_sec": median_times_dict,
+                                    "throughput_mb_per_sec": throughput_mb_per_sec})
+
+# Clean up generated clips, if we're not keeping them
+if temp_dir_obj is not None:
+    temp_dir_obj.cleanup()
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Save results
+
+results_dict = {"machine": get_machine_info(work_folder_path if temp_dir_obj is None else None),
+                "settings": {"counts": arg_counts_list,
+                             "durations": arg_durations_list,
+                             "codecs": arg_codecs_list,
+                             "containers": arg_containers_list,
+                             "audio": arg_audio_list,
+                             "engines": arg_engines_list,
+                             "repeats": arg_num_repeats},
+                "results": config_results_list}
+
+with open(arg_output_path, "w") as out_file:
+    json.dump(results_dict, out_file, indent = 2)
+
+print("", "Saved results:", "@ {}".format(os.path.abspath(arg_output_path)), "", sep = "\n")
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
+
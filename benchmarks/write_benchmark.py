@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 24 13:41:09 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import os
+import sys
+import json
+import time
+import argparse
+import datetime as dt
+
+from tempfile import TemporaryDirectory
+from itertools import product
+from statistics import median
+
+# Make sure the repo folder is importable, since this script lives in a sub-folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from local.lib.benchmarking import generate_synthetic_clips, get_machine_info
+from local.lib.containers import normalize_extension
+from local.lib.stitching import build_stitch_command
+from local.lib.preflight import estimate_output_size_bytes
+from local.lib.atomic_output import discard_partial_output
+from local.lib.page_cache import give_cache_hint
+from local.lib.write_tuning import preallocate_file, trim_preallocation, build_write_args
+from local.lib.write_tuning import Periodic_Syncer, sync_file_data
+from local.lib.ffmpeg_helpers import supervised_subprocess, captured_subprocess, find_program
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def parse_args():
+
+    # Set up argparser options
+    ap = argparse.ArgumentParser(description = "Times writing (and reading back) stitched outputs, "
+                                               "across a matrix of output write settings")
+    ap.add_argument("-c", "--count", default = 50, type = int, help = "Number of clips to stitch")
+    ap.add_argument("-d", "--duration", default = 10, type = float, help = "Duration of each clip, in seconds")
+    ap.add_argument("-x", "--container", default = "mp4", type = str, help = "Container of the clips & output")
+    ap.add_argument("-p", "--preallocate", default = "on,off", type = str,
+                    help = "Comma separated list of preallocation settings (on and/or off)")
+    ap.add_argument("-f", "--fsync", default = "none,end,periodic", type = str,
+                    help = "Comma separated list of fsync policies (none, end and/or periodic)")
+    ap.add_argument("-b", "--blocksizes", default = "default,65536,1048576", type = str,
+                    help = "Comma separated list of output block sizes, in bytes ('default' to leave unset)")
+    ap.add_argument("-s", "--syncmb", default = 64, type = int,
+                    help = "Amount of data (in MB) written between syncs, for the periodic fsync policy")
+    ap.add_argument("-n", "--repeats", default = 3, type = int, help = "Number of times to repeat each setting")
+    ap.add_argument("-w", "--workdir", default = None, type = str,
+                    help = "Folder for generated clips. Clips are kept and re-used if given, otherwise deleted")
+    ap.add_argument("-t", "--outdir", default = None, type = str,
+                    help = "Folder to write outputs into (i.e. the disk being tested). Defaults to the work folder")
+    ap.add_argument("-o", "--output", default = None, type = str, help = "Path to save json results")
+
+    # Convert argument inputs into a dictionary
+    ap_result = vars(ap.parse_args())
+
+    return ap_result
+
+# .....................................................................................................................
+
+def split_csv_arg(arg_str, convert_func = str):
+
+    ''' Helper used to interpret comma separated script arguments '''
+
+    return [convert_func(each_str.strip()) for each_str in arg_str.split(",") if each_str.strip() != ""]
+
+# .....................................................................................................................
+
+def parse_block_size(block_size_str):
+    return None if block_size_str.lower() == "default" else int(block_size_str)
+
+# .....................................................................................................................
+
+def count_extents(file_path):
+
+    ''' Helper used to count the number of extents (i.e. fragments) of a file, using filefrag if available '''
+
+    if find_program("filefrag") is None:
+        return None
+
+    proc_out = captured_subprocess(["filefrag", file_path])
+    try:
+        num_extents = int(proc_out.stdout.decode(errors = "ignore").split(":")[-1].split()[0])
+    except (ValueError, IndexError):
+        num_extents = None
+
+    return num_extents
+
+# .....................................................................................................................
+
+def time_read_back(file_path, chunk_size_bytes = 4 * (1024 ** 2)):
+
+    '''
+    Function which times a sequential read of a file, after dropping it from the page cache
+    (so that the read actually comes from disk, as it would for later playback/uploading)
+    '''
+
+    sync_file_data(file_path)
+    give_cache_hint(file_path, "dontneed")
+
+    t_start = time.perf_counter()
+    with open(file_path, "rb", buffering = 0) as in_file:
+        while in_file.read(chunk_size_bytes):
+            pass
+
+    return time.perf_counter() - t_start
+
+# .....................................................................................................................
+
+def time_write_once(clip_paths_list, output_path, temp_folder_path, input_bytes,
+                    use_preallocate, fsync_policy, block_size_bytes, sync_interval_bytes):
+
+    '''
+    Function which stitches the clips (with the given write settings, the same way the stitcher script does),
+    timing the write of the output and then a (cold) read back of the output
+
+    Outputs:
+        run_dict
+    '''
+
+    output_ext = normalize_extension(os.path.splitext(output_path)[1])
+    t_start = time.perf_counter()
+
+    # Reserve space & set up write arguments
+    is_preallocated = False
+    if use_preallocate:
+        is_preallocated = preallocate_file(output_path, estimate_output_size_bytes(input_bytes, output_ext))
+    write_args_list = build_write_args(is_preallocated, block_size_bytes)
+    run_command_list, _ = build_stitch_command("demuxer", clip_paths_list, temp_folder_path, output_path,
+                                               write_args_list)
+
+    # Run the stitching, with syncing as needed
+    output_syncer = Periodic_Syncer(output_path, sync_interval_bytes) if fsync_policy == "periodic" else None
+    progress_callback = output_syncer.on_progress if output_syncer is not None else None
+    proc_out = supervised_subprocess(run_command_list, progress_callback = progress_callback)
+    if output_syncer is not None:
+        output_syncer.finish()
+
+    # Finish the output, as it would be before moving it into place
+    if proc_out.returncode == 0:
+        if is_preallocated:
+            trim_preallocation(output_path)
+        if fsync_policy != "none":
+            sync_file_data(output_path)
+    write_sec = time.perf_counter() - t_start
+
+    # Measure the output layout & read speed, then clean up so repeated runs don't fill the disk
+    output_bytes, num_extents, read_sec = 0, None, None
+    if proc_out.returncode == 0:
+        output_bytes = os.path.getsize(output_path)
+        num_extents = count_extents(output_path)
+        read_sec = time_read_back(output_path)
+    discard_partial_output(output_path)
+
+    return {"return_code": proc_out.returncode,
+            "preallocated": is_preallocated,
+            "write_sec": round(write_sec, 4),
+            "read_sec": round(read_sec, 4) if read_sec is not None else None,
+            "output_bytes": output_bytes,
+            "extents": num_extents}
+
+# .....................................................................................................................
+
+def summarize_runs(runs_list):
+
+    ''' Helper used to get median write/read times & throughputs, over all (successful) runs '''
+
+    ok_runs_list = [each_run for each_run in runs_list if each_run["return_code"] == 0]
+    if len(ok_runs_list) == 0:
+        return None
+
+    write_sec = median([each_run["write_sec"] for each_run in ok_runs_list])
+    read_sec = median([each_run["read_sec"] for each_run in ok_runs_list])
+    output_mb = ok_runs_list[0]["output_bytes"] / (1024 ** 2)
+    extents_list = [each_run["extents"] for each_run in ok_runs_list if each_run["extents"] is not None]
+
+    return {"write_sec": round(write_sec, 4),
+            "read_sec": round(read_sec, 4),
+            "write_mb_per_sec": round(output_mb / write_sec, 2) if write_sec > 0 else None,
+            "read_mb_per_sec": round(output_mb / read_sec, 2) if read_sec > 0 else None,
+            "extents": median(extents_list) if len(extents_list) > 0 else None}
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Setup
+
+# Get script arguments
+input_args = parse_args()
+arg_num_clips = input_args.get("count")
+arg_duration_sec = input_args.get("duration")
+arg_container_ext = normalize_extension(input_args.get("container"))
+arg_preallocate_list = [each_str.lower() == "on" for each_str in split_csv_arg(input_args.get("preallocate"))]
+arg_fsync_list = split_csv_arg(input_args.get("fsync"))
+arg_block_sizes_list = split_csv_arg(input_args.get("blocksizes"), parse_block_size)
+arg_sync_interval_bytes = input_args.get("syncmb") * (1024 ** 2)
+arg_num_repeats = max(1, input_args.get("repeats"))
+arg_work_folder = input_args.get("workdir")
+arg_out_folder = input_args.get("outdir")
+arg_output_path = input_args.get("output")
+
+# Pick a default results path, named by time so that results from different runs don't overwrite each other
+if arg_output_path is None:
+    arg_output_path = "write_benchmark_{}.json".format(dt.datetime.now().strftime("%Y%m%d_%H%M%S"))
+
+# Build every combination of settings to test
+config_matrix_list = list(product(arg_preallocate_list, arg_fsync_list, arg_block_sizes_list))
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Run benchmarks
+
+# Use a temporary work folder, unless one is given (so that generated clips can be re-used)
+temp_dir_obj = TemporaryDirectory() if arg_work_folder is None else None
+work_folder_path = temp_dir_obj.name if temp_dir_obj is not None else os.path.abspath(arg_work_folder)
+out_folder_path = work_folder_path if arg_out_folder is None else os.path.abspath(arg_out_folder)
+os.makedirs(work_folder_path, exist_ok = True)
+os.makedirs(out_folder_path, exist_ok = True)
+
+# Create (or re-use) synthetic clips to stitch
+clip_folder_path = os.path.join(work_folder_path, "{}x{}s_{}".format(arg_num_clips, arg_duration_sec,
+                                                                     arg_container_ext.lstrip(".")))
+clip_paths_list = generate_synthetic_clips(clip_folder_path, arg_num_clips, arg_duration_sec,
+                                           container_ext = arg_container_ext)
+if clip_paths_list is None:
+    print("", "Couldn't generate clips (encoder or container not supported?)", "Quitting...", sep = "\n")
+    quit()
+input_bytes = sum(os.path.getsize(each_path) for each_path in clip_paths_list)
+
+print("", "Running {} benchmark configurations...".format(len(config_matrix_list)), sep = "\n")
+
+config_results_list = []
+for each_config in config_matrix_list:
+
+    use_preallocate, fsync_policy, block_size_bytes = each_config
+    config_name = "prealloc_{}_fsync_{}_block_{}".format("on" if use_preallocate else "off", fsync_policy,
+                                                         block_size_bytes if block_size_bytes else "default")
+    print("", "{}".format(config_name), sep = "\n")
+
+    # Time repeated writes & read backs
+    runs_list = []
+    for each_repeat_idx in range(arg_num_repeats):
+        with TemporaryDirectory(dir = work_folder_path) as temp_folder_path:
+            output_path = os.path.join(out_folder_path, ".write_benchmark{}".format(arg_container_ext))
+            run_dict = time_write_once(clip_paths_list, output_path, temp_folder_path, input_bytes,
+                                       use_preallocate, fsync_policy, block_size_bytes, arg_sync_interval_bytes)
+        runs_list.append(run_dict)
+        print("  run {}: write {:.3f} s, read {} s, extents: {} (return code {})".format(
+            1 + each_repeat_idx, run_dict["write_sec"], run_dict["read_sec"], run_dict["extents"],
+            run_dict["return_code"]))
+
+    config_results_list.append({"name": config_name,
+                                "preallocate": use_preallocate,
+                                "fsync": fsync_policy,
+                                "block_size": block_size_bytes,
+                                "runs": runs_list,
+                                "median": summarize_runs(runs_list)})
+
+# Clean up generated clips, if we're not keeping them
+if temp_dir_obj is not None:
+    temp_dir_obj.cleanup()
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Save results
+
+results_dict = {"machine": get_machine_info(out_folder_path if temp_dir_obj is None else None),
+                "settings": {"count": arg_num_clips,
+                             "duration": arg_duration_sec,
+                             "container": arg_container_ext,
+                             "input_bytes": input_bytes,
+                             "sync_interval_bytes": arg_sync_interval_bytes,
+                             "repeats": arg_num_repeats},
+                "results": config_results_list}
+
+with open(arg_output_path, "w") as out_file:
+    json.dump(results_dict, out_file, indent = 2)
+
+print("", "Saved results:", "@ {}".format(os.path.abspath(arg_output_path)), "", sep = "\n")
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
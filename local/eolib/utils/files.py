@@ -7,11 +7,21 @@ Created on Fri Apr 27 11:46:14 2018
 """
 
 import os
+import re
+import heapq
+import pickle
+
+from fnmatch import fnmatch
+from tempfile import TemporaryFile
+from collections import namedtuple
 
 
 # ---------------------------------------------------------------------------------------------------------------------
 #%% Define classes
 
+# Lightweight record of a file found while scanning, so that file info from scanning doesn't need to be re-read
+Scanned_File = namedtuple("Scanned_File", ["path", "rel_path", "name", "size", "mtime"])
+
 
 # ---------------------------------------------------------------------------------------------------------------------
 #%% Define pathing functions
@@ -208,29 +218,19 @@ def get_file_list(search_folder_path,
             os.makedirs(search_folder_path)
         return []
     
-    # Take out only the files from the list of items in the search folder
-    file_list = [each_entry for each_entry in os.listdir(search_folder_path) 
-                 if os.path.isfile(os.path.join(search_folder_path, each_entry))]
-    
-    # Remove entries that don't have the target extensions
-    if allowable_exts_list:
-        
-        # Clean up the allowable extensions list (add preceeding . and lowercase!), in case the user entered them funny
-        safeify_ext = lambda ext: ".{}".format(ext.lower()) if ext[0] != "." else ext.lower()
-        safe_exts = [safeify_ext(each_ext) for each_ext in allowable_exts_list]
-        
-        # Filter out files that don't have an extension from the (safe-ified) allowable ext list
-        keep_file = lambda file, ext_list: (os.path.splitext(file)[1].lower() in ext_list)
-        file_list = [each_file for each_file in file_list if keep_file(each_file, safe_exts)]
+    # Take out only the (non-hidden) files from the list of items in the search folder
+    # -> Uses scandir, since it can usually tell files from folders without an extra stat call per entry
+    safe_exts = _safeify_exts_list(allowable_exts_list)
+    with os.scandir(search_folder_path) as dir_iter:
+        file_list = [each_entry.name for each_entry in dir_iter
+                     if (show_hidden_files or not each_entry.name.startswith("."))
+                     and _has_allowable_ext(each_entry.name, safe_exts)
+                     and each_entry.is_file()]
     
     # Sort if needed
     if sort_list:
         file_list.sort()
     
-    # Hide files beginning with dots (i.e. hidden)
-    if not show_hidden_files:
-        file_list = [each_file for each_file in file_list if each_file[0] != "."]
-    
     # Prepend the search folder path if desired
     if return_full_path:
         file_list = [os.path.join(search_folder_path, each_file) for each_file in file_list]
@@ -239,6 +239,326 @@ def get_file_list(search_folder_path,
 
 # .....................................................................................................................
 
+def _safeify_exts_list(allowable_exts_list):
+    
+    ''' Helper used to clean up extension lists (add preceeding . and lowercase!), in case they're entered funny '''
+    
+    if not allowable_exts_list:
+        return None
+    
+    safeify_ext = lambda ext: ".{}".format(ext.lower()) if ext[0] != "." else ext.lower()
+    return frozenset(safeify_ext(each_ext) for each_ext in allowable_exts_list)
+
+# .....................................................................................................................
+
+def _has_allowable_ext(file_name, safe_exts_set):
+    
+    ''' Helper used to check file extensions. All files are allowed if no extensions are given '''
+    
+    if safe_exts_set is None:
+        return True
+    
+    return (os.path.splitext(file_name)[1].lower() in safe_exts_set)
+
+# .....................................................................................................................
+
+def _matches_any_glob(name, rel_path, globs_list):
+    
+    ''' Helper used to check if a file/folder name (or relative path) matches any of the given glob patterns '''
+    
+    return any(fnmatch(name, each_glob) or fnmatch(rel_path, each_glob) for each_glob in globs_list)
+
+# .....................................................................................................................
+
+def iter_scanned_files(search_folder_path,
+                       recursive = False,
+                       allowable_exts_list = None,
+                       include_globs_list = None,
+                       exclude_globs_list = None,
+                       show_hidden_files = False,
+                       follow_links = False,
+                       get_stats = True):
+    
+    '''
+    Generator which finds files in the given search folder (and optionally all sub-folders) using os.scandir.
+    Files are yielded as they're found (in no particular order), which keeps memory use flat,
+    even when searching folders with huge numbers of files.
+    
+    Inputs:
+        search_folder_path -> String. Folder to search
+        
+        recursive -> Boolean. If true, all sub-folders are searched as well
+        
+        allowable_exts_list -> List of strings or None. If provided, only files with these extensions are kept
+        
+        include_globs_list -> List of strings or None. If provided, only files whose name (or path relative to 
+                              the search folder) matches one of these glob patterns are kept (e.g. ["cam1_*"])
+        
+        exclude_globs_list -> List of strings or None. Files or folders whose name (or relative path) match
+                              any of these glob patterns are skipped (e.g. ["*_preview.mp4", "thumbnails"])
+        
+        show_hidden_files -> Boolean. If false, files & folders beginning with a dot are skipped
+        
+        follow_links -> Boolean. If true, linked folders will be searched (when recursive)
+        
+        get_stats -> Boolean. If true, the size & modification time of each file will be filled in.
+                     These come from the scandir entries (no separate os.path.getsize/getmtime calls)
+    
+    Outputs:
+        Scanned_File(path, rel_path, name, size, mtime) entries (size/mtime are None if get_stats is false)
+    '''
+    
+    # Clean up filtering inputs
+    safe_exts = _safeify_exts_list(allowable_exts_list)
+    include_globs_list = include_globs_list if include_globs_list else []
+    exclude_globs_list = exclude_globs_list if exclude_globs_list else []
+    
+    # Don't bother searching if the folder doesn't exist!
+    if not os.path.isdir(search_folder_path):
+        return
+    
+    # Use a stack of folders, rather than actual recursion, so very deep folder trees don't cause problems
+    folders_to_scan = [(search_folder_path, "")]
+    while folders_to_scan:
+        
+        folder_path, folder_rel_path = folders_to_scan.pop()
+        try:
+            dir_iter = os.scandir(folder_path)
+        except OSError:
+            continue
+        
+        with dir_iter:
+            for each_entry in dir_iter:
+                
+                # Skip hidden files/folders, if needed
+                each_name = each_entry.name
+                if not show_hidden_files and each_name.startswith("."):
+                    continue
+                
+                # Skip excluded files/folders
+                each_rel_path = os.path.join(folder_rel_path, each_name) if folder_rel_path else each_name
+                if exclude_globs_list and _matches_any_glob(each_name, each_rel_path, exclude_globs_list):
+                    continue
+                
+                try:
+                    # Queue up sub-folders for searching
+                    if each_entry.is_dir(follow_symlinks = follow_links):
+                        if recursive:
+                            folders_to_scan.append((each_entry.path, each_rel_path))
+                        continue
+                    
+                    # Skip anything that isn't a file (and files without allowable extensions)
+                    if not _has_allowable_ext(each_name, safe_exts):
+                        continue
+                    if include_globs_list and not _matches_any_glob(each_name, each_rel_path, include_globs_list):
+                        continue
+                    if not each_entry.is_file():
+                        continue
+                    
+                    # Get file info from the scandir entry, if needed
+                    file_size, file_mtime = None, None
+                    if get_stats:
+                        file_stat = each_entry.stat()
+                        file_size, file_mtime = file_stat.st_size, file_stat.st_mtime
+                    
+                except OSError:
+                    # Happens with broken links or files deleted mid-scan
+                    continue
+                
+                yield Scanned_File(each_entry.path, each_rel_path, each_name, file_size, file_mtime)
+    
+    return
+
+# .....................................................................................................................
+
+def scan_files(search_folder_path,
+               recursive = False,
+               allowable_exts_list = None,
+               include_globs_list = None,
+               exclude_globs_list = None,
+               show_hidden_files = False,
+               follow_links = False,
+               get_stats = True,
+               sort_list = True):
+    
+    '''
+    Returns a list of Scanned_File entries for all files found in the search folder.
+    See iter_scanned_files(...) for a description of the inputs.
+    When sorting, files are sorted by their path relative to the search folder
+    '''
+    
+    scanned_files_list = list(iter_scanned_files(search_folder_path,
+                                                 recursive = recursive,
+                                                 allowable_exts_list = allowable_exts_list,
+                                                 include_globs_list = include_globs_list,
+                                                 exclude_globs_list = exclude_globs_list,
+                                                 show_hidden_files = show_hidden_files,
+                                                 follow_links = follow_links,
+                                                 get_stats = get_stats))
+    
+    if sort_list:
+        scanned_files_list.sort(key = lambda entry: entry.rel_path)
+    
+    return scanned_files_list
+
+# .....................................................................................................................
+
+def natural_sort_key(text):
+    
+    '''
+    Sorting key which orders numbers inside of strings by value, rather than character-by-character
+    For example:
+        sorted(["clip10", "clip9", "clip100"], key = natural_sort_key) -> ["clip9", "clip10", "clip100"]
+    '''
+    
+    return [(0, int(each_part), "") if each_part.isdigit() else (1, 0, each_part.lower())
+            for each_part in re.split(r"(\d+)", text) if each_part != ""]
+
+# .....................................................................................................................
+
+def _iter_pickled_items(file_handle):
+    
+    ''' Helper used to read back items written (one after the other) into a file using pickle.dump '''
+    
+    file_handle.seek(0)
+    while True:
+        try:
+            yield pickle.load(file_handle)
+        except EOFError:
+            break
+    
+    return
+
+# .....................................................................................................................
+
+def iter_external_sort(items_iter, key = None, reverse = False, chunk_size = 250000):
+    
+    '''
+    Generator which sorts items using a bounded amount of memory (i.e. an 'external merge sort').
+    Items are read in chunks, each chunk is sorted and written to a temporary file, and then
+    all of the sorted chunks are merged (lazily) back together using heapq.merge.
+    If all of the items fit in a single chunk, no temporary files are used.
+    
+    Inputs:
+        items_iter -> Iterable. Items to be sorted (must be pickle-able)
+        
+        key -> Function or None. Same as the key used in sorted(...)
+        
+        reverse -> Boolean. Same as the reverse flag used in sorted(...)
+        
+        chunk_size -> Integer. Maximum number of items held in memory at any one time while reading/sorting
+    
+    Outputs:
+        Items, in sorted order
+    '''
+    
+    items_iter = iter(items_iter)
+    spill_files_list = []
+    try:
+        while True:
+            
+            # Read (and sort) the next chunk of items
+            chunk_list = [each_item for _, each_item in zip(range(chunk_size), items_iter)]
+            chunk_list.sort(key = key, reverse = reverse)
+            is_last_chunk = (len(chunk_list) < chunk_size)
+            
+            # If everything fit in one chunk, we don't need to bother with temporary files
+            if is_last_chunk and not spill_files_list:
+                yield from chunk_list
+                return
+            
+            # Write sorted chunk into a temporary file
+            if chunk_list:
+                spill_file = TemporaryFile()
+                for each_item in chunk_list:
+                    pickle.dump(each_item, spill_file, protocol = pickle.HIGHEST_PROTOCOL)
+                spill_files_list.append(spill_file)
+            del chunk_list
+            
+            if is_last_chunk:
+                break
+        
+        # Merge all of the sorted chunks back together
+        chunk_iters_list = [_iter_pickled_items(each_file) for each_file in spill_files_list]
+        yield from heapq.merge(*chunk_iters_list, key = key, reverse = reverse)
+        
+    finally:
+        for each_file in spill_files_list:
+            each_file.close()
+    
+    return
+
+# .....................................................................................................................
+
+def scanned_file_sort_key(sort_by):
+    
+    ''' Helper which returns the key function used to sort Scanned_File entries '''
+    
+    sort_key_lut = {"name": lambda entry: entry.rel_path,
+                    "natural": lambda entry: natural_sort_key(entry.rel_path),
+                    "mtime": lambda entry: (entry.mtime, entry.rel_path)}
+    
+    if sort_by not in sort_key_lut:
+        raise ValueError("Unrecognized sorting option: {} (expecting one of {})".format(sort_by, list(sort_key_lut)))
+    
+    return sort_key_lut[sort_by]
+
+# .....................................................................................................................
+
+def iter_sorted_files(search_folder_path, sort_by = "name", reverse = False, chunk_size = 250000, **scan_kwargs):
+    
+    '''
+    Generator which yields Scanned_File entries from the search folder in sorted order,
+    while keeping memory use bounded (see iter_external_sort(...)), even for millions of files.
+    
+    Inputs:
+        sort_by -> String. One of "name", "natural" or "mtime". Names are sorted using the path
+                   relative to the search folder. Natural sorting orders numbers by value (e.g. 9 before 10)
+        
+        reverse -> Boolean. If true, the sorting order is reversed (e.g. newest first, when sorting by mtime)
+        
+        chunk_size -> Integer. Maximum number of entries to hold in memory while sorting
+        
+        **scan_kwargs -> Any keyword arguments accepted by iter_scanned_files(...), e.g. recursive = True
+    '''
+    
+    # Modification times are needed for sorting by age
+    if sort_by == "mtime":
+        scan_kwargs["get_stats"] = True
+    
+    sort_key = scanned_file_sort_key(sort_by)
+    scanned_iter = iter_scanned_files(search_folder_path, **scan_kwargs)
+    
+    yield from iter_external_sort(scanned_iter, key = sort_key, reverse = reverse, chunk_size = chunk_size)
+    
+    return
+
+# .....................................................................................................................
+
+def get_top_n_files(search_folder_path, num_files, sort_by = "mtime", newest_first = True, **scan_kwargs):
+    
+    '''
+    Function which returns only the first N files (as Scanned_File entries) from the search folder, 
+    based on the given sorting. Uses a heap, so memory use only depends on the number of files returned,
+    not the number of files in the folder.
+    For example, to get the 10 most recently modified files:
+        get_top_n_files("/path/to/folder", 10, sort_by = "mtime", newest_first = True)
+    
+    Note: newest_first acts as a 'reverse' flag, when sorting by name
+    '''
+    
+    # Modification times are needed for sorting by age
+    if sort_by == "mtime":
+        scan_kwargs["get_stats"] = True
+    
+    sort_key = scanned_file_sort_key(sort_by)
+    scanned_iter = iter_scanned_files(search_folder_path, **scan_kwargs)
+    heap_func = heapq.nlargest if newest_first else heapq.nsmallest
+    
+    return heap_func(num_files, scanned_iter, key = sort_key)
+
+# .....................................................................................................................
+
 def split_to_sublists(input_list, maximum_sublist_size = 10):
     
     '''
@@ -312,15 +632,27 @@ def get_file_list_by_age(search_folder_path,
     sorted_timestamps, sorted_names_or_paths
     '''
     
-    # Get pathing to every file in the search folder
-    path_list = get_file_list(search_folder_path, 
-                              show_hidden_files = show_hidden_files, 
-                              create_missing_folder = create_missing_folder, 
-                              return_full_path = True,
-                              sort_list = False,
-                              allowable_exts_list = allowable_exts_list)
+    # Make sure the search folder exists before trying to list it's contents!
+    if not os.path.exists(search_folder_path):
+        if create_missing_folder:
+            os.makedirs(search_folder_path)
+        return ((), ())
     
-    sorted_timestamps, sorted_names_or_paths = sort_path_list_by_age(path_list, newest_first, return_full_path)
+    # Get every file in the search folder, sorted by age (using the modification times from scanning)
+    sorted_entries_list = list(iter_sorted_files(search_folder_path,
+                                                 sort_by = "mtime",
+                                                 reverse = newest_first,
+                                                 allowable_exts_list = allowable_exts_list,
+                                                 show_hidden_files = show_hidden_files))
+    
+    # Bail if we have an empty list
+    if len(sorted_entries_list) == 0:
+        return ((), ())
+    
+    # Split out timestamps & names/paths for output
+    sorted_timestamps = tuple(each_entry.mtime for each_entry in sorted_entries_list)
+    sorted_names_or_paths = tuple(each_entry.path if return_full_path else each_entry.name
+                                  for each_entry in sorted_entries_list)
     
     return sorted_timestamps, sorted_names_or_paths
 
@@ -350,7 +682,53 @@ def get_folder_list_by_age(search_folder_path,
 
 # .....................................................................................................................
 
-def get_total_folder_size(folder_path, size_units = "M"):
+def _scan_folder_sizes(folder_path):
+    
+    '''
+    Helper used by get_total_folder_size(...). Scans a single folder (non-recursively) using os.scandir,
+    which avoids re-building paths and re-checking file types for every entry.
+    
+    Outputs:
+        file_count, subdir_count, total_file_size, total_subdir_size, walkable_subdir_paths_list
+    '''
+    
+    # Initialize counters
+    file_count = 0
+    subdir_count = 0
+    total_file_size = 0
+    total_subdir_size = 0
+    walkable_subdir_paths_list = []
+    
+    # Skip folders we can't read (e.g. permissions), rather than crashing the whole walk
+    try:
+        dir_iter = os.scandir(folder_path)
+    except OSError:
+        return file_count, subdir_count, total_file_size, total_subdir_size, walkable_subdir_paths_list
+    
+    with dir_iter:
+        for each_entry in dir_iter:
+            try:
+                # Count folders (but don't follow linked folders, same as os.walk)
+                if each_entry.is_dir():
+                    subdir_count += 1
+                    if not each_entry.is_symlink():
+                        total_subdir_size += each_entry.stat(follow_symlinks = False).st_size
+                        walkable_subdir_paths_list.append(each_entry.path)
+                    continue
+                
+                # Everything else is treated as a file
+                file_count += 1
+                total_file_size += each_entry.stat().st_size
+                
+            except OSError:
+                # Happens with broken links or files deleted mid-scan
+                pass
+    
+    return file_count, subdir_count, total_file_size, total_subdir_size, walkable_subdir_paths_list
+
+# .....................................................................................................................
+
+def get_total_folder_size(folder_path, size_units = "M", max_workers = 1):
     
     ''' 
     Function for calculating the total size of all contents within the given folder path
@@ -359,15 +737,15 @@ def get_total_folder_size(folder_path, size_units = "M"):
         
         size_units -> String. One of None, "k", "M", "G", representing the unit scaling of the output
                       (None returns units in bytes, other options scale by powers of 1024)
+        
+        max_workers -> Integer. Number of threads used to scan folders in parallel. Scanning is mostly
+                       spent waiting on the file system, so using more workers can greatly speed up 
+                       scanning on network drives (NFS/SMB) with many sub-folders
                       
     Outputs:
         file_count, subdirectory_count, total_file_size, total_subdirectory_size
     '''
     
-    # Create helper functions to deal with os.walk output pathing
-    get_file_path = lambda dir_path, file: os.path.join(dir_path, file)
-    get_file_size = lambda dir_path, file: os.path.getsize(get_file_path(dir_path, file))
-    
     # Initialize loop counters
     file_count = 0
     subdir_count = 0
@@ -378,14 +756,36 @@ def get_total_folder_size(folder_path, size_units = "M"):
     if not os.path.exists(folder_path):
         return file_count, subdir_count, total_file_size, total_subdir_size
     
+    # Include the size of the parent folder itself (os.walk-style)
+    total_subdir_size += os.path.getsize(folder_path)
+    
     # Step through each directory (recursively) and sum the size of all folders & files
-    for each_dir_path, each_subdir_list, each_file_list in os.walk(folder_path):
-        
-        file_count += len(each_file_list)
-        subdir_count += len(each_subdir_list)
-        total_file_size += sum((get_file_size(each_dir_path, each_file) for each_file in each_file_list))
-        total_subdir_size += os.path.getsize(each_dir_path)
-        
+    if max_workers <= 1:
+        folders_to_scan = [folder_path]
+        while folders_to_scan:
+            scan_result = _scan_folder_sizes(folders_to_scan.pop())
+            file_count += scan_result[0]
+            subdir_count += scan_result[1]
+            total_file_size += scan_result[2]
+            total_subdir_size += scan_result[3]
+            folders_to_scan += scan_result[4]
+    
+    else:
+        # Scan folders in parallel, submitting sub-folders as soon as their parent folder has been scanned
+        from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+        with ThreadPoolExecutor(max_workers = max_workers) as executor:
+            pending_futures = {executor.submit(_scan_folder_sizes, folder_path)}
+            while pending_futures:
+                done_futures, pending_futures = wait(pending_futures, return_when = FIRST_COMPLETED)
+                for each_future in done_futures:
+                    scan_result = each_future.result()
+                    file_count += scan_result[0]
+                    subdir_count += scan_result[1]
+                    total_file_size += scan_result[2]
+                    total_subdir_size += scan_result[3]
+                    pending_futures.update(executor.submit(_scan_folder_sizes, each_path)
+                                           for each_path in scan_result[4])
+    
     # Scale output
     scaling_lut = {None: 1, "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3, "p": 1024 ** 4}
     safe_size_units = size_units.strip().lower() if size_units is not None else None
@@ -397,6 +797,32 @@ def get_total_folder_size(folder_path, size_units = "M"):
 
 # .....................................................................................................................
 
+def get_total_file_size(file_path_list, max_workers = 1):
+    
+    '''
+    Function for calculating the total size (in bytes) of a list of files.
+    Files that can't be found are ignored.
+    Using more than 1 worker will check file sizes in parallel, which helps on network drives
+    '''
+    
+    # Helper which doesn't crash on missing files
+    def safe_getsize(file_path):
+        try:
+            return os.path.getsize(file_path)
+        except OSError:
+            return 0
+    
+    if max_workers <= 1:
+        return sum(safe_getsize(each_path) for each_path in file_path_list)
+    
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers = max_workers) as executor:
+        total_size_bytes = sum(executor.map(safe_getsize, file_path_list))
+    
+    return total_size_bytes
+
+# .....................................................................................................................
+
 def replace_user_home_pathing(input_path):
     
     ''' 
@@ -12,6 +12,9 @@ Created on Mon Apr 22 13:22:42 2019
 
 import os
 
+# Hidden tkinter root window, shared by all dialogs (creating a new Tk instance for every dialog is slow)
+_SHARED_ROOT = None
+
 # ---------------------------------------------------------------------------------------------------------------------
 #%% Define classes
 
@@ -59,10 +62,9 @@ def _make_file_type_list(file_exts, file_exts_labels):
 
 def tkinter_exists():
     
+    # Only check the import, since creating a (throw-away) window just for the check is slow
     try:
         import tkinter
-        root = tkinter.Tk()
-        root.destroy()
         tk_exists = True
     except ImportError:
         tk_exists = False
@@ -71,6 +73,21 @@ def tkinter_exists():
 
 # .....................................................................................................................
 
+def _get_hidden_root():
+    
+    ''' Helper used to get the (hidden) root window used by all dialogs. Creates it on first use '''
+    
+    global _SHARED_ROOT
+    
+    if _SHARED_ROOT is None:
+        import tkinter
+        _SHARED_ROOT = tkinter.Tk()
+        _SHARED_ROOT.withdraw()
+    
+    return _SHARED_ROOT
+
+# .....................................................................................................................
+
 def tkinter_missing_message(quit_after_message = True):
     
     print("",
@@ -95,12 +112,10 @@ def gui_file_select(start_dir="~/Desktop",
     if not tkinter_exists():
         tkinter_missing_message(quit_after_message = True)
         
-    import tkinter
     from tkinter import filedialog
     
-    # UI: Hide main window
-    root = tkinter.Tk()
-    root.withdraw()
+    # UI: Use the shared (hidden) main window
+    root = _get_hidden_root()
     
     # Ask user to select file
     start_dir = os.path.expanduser(start_dir)
@@ -110,8 +125,8 @@ def gui_file_select(start_dir="~/Desktop",
                                              filetypes=file_type_list)
     file_select = file_select if file_select not in {None, ""} else None
     
-    # Get rid of UI elements
-    root.destroy()
+    # Clear out UI elements (main window is kept around for re-use)
+    root.update()
     
     # If needed, quit when a file isn't selected
     if quit_if_missing and file_select is None:
@@ -131,12 +146,10 @@ def gui_file_select_many(start_dir="~/Desktop",
     if not tkinter_exists():
         tkinter_missing_message(quit_after_message = True)
         
-    import tkinter
     from tkinter import filedialog
         
-    # UI: Hide main window
-    root = tkinter.Tk()
-    root.withdraw()
+    # UI: Use the shared (hidden) main window
+    root = _get_hidden_root()
     
     # Ask user to select file
     start_dir = os.path.expanduser(start_dir)
@@ -146,8 +159,8 @@ def gui_file_select_many(start_dir="~/Desktop",
                                                    filetypes = file_type_list)
     file_select_list = file_select_list if len(file_select_list) > 0 else None
     
-    # Get rid of UI elements
-    root.destroy()
+    # Clear out UI elements (main window is kept around for re-use)
+    root.update()
     
     # If needed, quit when files aren't selected
     if quit_if_missing and file_select_list is None:
@@ -167,12 +180,10 @@ def gui_text_entry(prompt_message,
     if not tkinter_exists():
         tkinter_missing_message(quit_after_message = True)
         
-    import tkinter
     from tkinter import simpledialog
     
-    # UI: Hide main window
-    root = tkinter.Tk()
-    root.withdraw()
+    # UI: Use the shared (hidden) main window
+    root = _get_hidden_root()
     
     # Append default text, if a value was provided
     if default_value is not None:
@@ -184,8 +195,8 @@ def gui_text_entry(prompt_message,
     user_entry = user_entry.strip() if type(user_entry) is str else user_entry
     user_entry = user_entry if user_entry not in {None, ""} else None
     
-    # Get rid of UI elements
-    root.destroy() 
+    # Clear out UI elements (main window is kept around for re-use)
+    root.update() 
     
     # Insert default value if present and user entered nothing
     if user_entry is None and default_value is not None:
@@ -209,18 +220,16 @@ def gui_confirm(confirm_text, windowTitle="Confirmation"):
     if not tkinter_exists():
         tkinter_missing_message(quit_after_message = True)
         
-    import tkinter
     from tkinter import messagebox
     
-    # UI: Hide main window
-    root = tkinter.Tk()
-    root.withdraw()
+    # UI: Use the shared (hidden) main window
+    root = _get_hidden_root()
     
     # Get user response
     userResponse = messagebox.askyesno(windowTitle, confirm_text)
     
-    # Get rid of UI elements
-    root.destroy()    
+    # Clear out UI elements (main window is kept around for re-use)
+    root.update()    
     
     return userResponse
 
@@ -236,12 +245,10 @@ def gui_save(start_dir="~/Desktop",
     if not tkinter_exists():
         tkinter_missing_message(quit_after_message = True)
         
-    import tkinter
     from tkinter import filedialog
         
-    # UI: Hide main window
-    root = tkinter.Tk()
-    root.withdraw()
+    # UI: Use the shared (hidden) main window
+    root = _get_hidden_root()
     
     
     # Ask user to select file
@@ -252,8 +259,8 @@ def gui_save(start_dir="~/Desktop",
                                                   filetypes = file_type_list)
     file_save_path = file_save_path if file_save_path not in {None, ""} else None
     
-    # Get rid of UI elements
-    root.destroy()    
+    # Clear out UI elements (main window is kept around for re-use)
+    root.update()    
     
     # If needed, quit when a save file isn't specified
     if quit_if_missing and file_save_path is None:
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 14:02:38 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import os
+import shutil
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def build_partial_path(final_path):
+
+    '''
+    Function which builds the (temporary) path used while an output is being written.
+    The partial file is a hidden file in the same folder as the final output (so that renaming is atomic)
+    and keeps the same extension, since ffmpeg uses the extension to decide on the output format.
+    For example:
+        "/path/to/stitched.mp4" -> "/path/to/.stitched.partial.mp4"
+    '''
+
+    folder_path, file_name = os.path.split(final_path)
+    name_only, file_ext = os.path.splitext(file_name)
+    partial_name = ".{}.partial{}".format(name_only, file_ext)
+
+    return os.path.join(folder_path, partial_name)
+
+# .....................................................................................................................
+
+def fsync_file(file_path):
+
+    ''' Helper used to make sure a file's data is flushed to disk '''
+
+    with open(file_path, "rb") as in_file:
+        os.fsync(in_file.fileno())
+
+    return
+
+# .....................................................................................................................
+
+def fsync_folder(folder_path):
+
+    ''' Helper used to make sure folder entries (e.g. renames) are flushed to disk. Does nothing on Windows '''
+
+    # Folders can't be opened for syncing on Windows
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+
+    folder_fd = os.open(folder_path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(folder_fd)
+    finally:
+        os.close(folder_fd)
+
+    return
+
+# .....................................................................................................................
+
+def discard_partial_output(partial_path):
+
+    ''' Function used to clean up partial outputs (files or folders), e.g. left over from a failed/killed run '''
+
+    if os.path.isdir(partial_path):
+        shutil.rmtree(partial_path, ignore_errors = True)
+    elif os.path.exists(partial_path):
+        os.remove(partial_path)
+
+    return
+
+# .....................................................................................................................
+
+def commit_partial_output(partial_path, final_path, sync_to_disk = True):
+
+    '''
+    Function which moves a (completed) partial output into its final location.
+    The data is flushed to disk before renaming, so that the final path never refers to
+    an incomplete file, even if the machine crashes right after the rename.
+    '''
+
+    folder_path = os.path.dirname(os.path.abspath(final_path))
+
+    if sync_to_disk:
+        fsync_file(partial_path)
+
+    os.replace(partial_path, final_path)
+
+    if sync_to_disk:
+        fsync_folder(folder_path)
+
+    return final_path
+
+# .....................................................................................................................
+
+def write_text_atomically(file_path, text_str, sync_to_disk = True):
+
+    '''
+    Function which writes a (small) text file, such that readers only ever see the complete file.
+    The text is written to a hidden temporary file (named so it won't match the final file's extension,
+    in case other programs are watching the folder for new files) and then renamed into place
+    '''
+
+    folder_path, file_name = os.path.split(os.path.abspath(file_path))
+    temp_path = os.path.join(folder_path, ".{}.tmp".format(file_name))
+
+    with open(temp_path, "w") as out_file:
+        out_file.write(text_str)
+        out_file.flush()
+        if sync_to_disk:
+            os.fsync(out_file.fileno())
+
+    os.replace(temp_path, file_path)
+    if sync_to_disk:
+        fsync_folder(folder_path)
+
+    return file_path
+
+# .....................................................................................................................
+
+def commit_partial_folder(partial_folder_path, final_folder_path, sync_to_disk = True):
+
+    '''
+    Function which moves every file inside of a partial output folder into the final output folder,
+    and then removes the (empty) partial folder. Used for jobs that create many output files (e.g. splitting)
+
+    Outputs:
+        final_file_paths_list
+    '''
+
+    final_file_paths_list = []
+    for each_name in sorted(os.listdir(partial_folder_path)):
+        each_partial_path = os.path.join(partial_folder_path, each_name)
+        each_final_path = os.path.join(final_folder_path, each_name)
+        if sync_to_disk:
+            fsync_file(each_partial_path)
+        os.replace(each_partial_path, each_final_path)
+        final_file_paths_list.append(each_final_path)
+
+    if sync_to_disk:
+        fsync_folder(final_folder_path)
+    os.rmdir(partial_folder_path)
+
+    return final_file_paths_list
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+
+    print(build_partial_path("/path/to/stitched.mp4"))
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 10:26:03 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import os
+import sys
+import shutil
+import platform
+import datetime as dt
+
+from local.lib.ffmpeg_helpers import captured_subprocess
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def _synthetic_video_codec_lut():
+
+    ''' Lookup table of ffmpeg encoder settings used to create synthetic clips, for each (output) video codec '''
+
+    return {"h264": ["-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p"],
+            "hevc": ["-c:v", "libx265", "-preset", "ultrafast", "-pix_fmt", "yuv420p", "-x265-params", "log-level=0"],
+            "mpeg4": ["-c:v", "mpeg4", "-q:v", "5"]}
+
+# .....................................................................................................................
+
+def build_synthetic_clip_command(save_path, duration_sec = 1.0,
+                                 video_codec = "h264",
+                                 include_audio = True,
+                                 frame_size = (320, 240),
+                                 frame_rate = 30):
+
+    '''
+    Function which builds an ffmpeg command for generating a synthetic test clip, using the
+    built-in 'lavfi' test sources (no input files needed). Video uses the 'testsrc2' pattern and
+    audio (if enabled) is a sine tone. Keyframes are placed every second, like typical camera recordings
+
+    Outputs:
+        run_command_list
+    '''
+
+    # Build the test source inputs
+    frame_w, frame_h = frame_size
+    video_src_str = "testsrc2=size={}x{}:rate={}:duration={}".format(frame_w, frame_h, frame_rate, duration_sec)
+    audio_src_str = "sine=frequency=440:sample_rate=48000:duration={}".format(duration_sec)
+    input_args = ["-f", "lavfi", "-i", video_src_str]
+    if include_audio:
+        input_args += ["-f", "lavfi", "-i", audio_src_str]
+
+    # Build the encoding settings
+    video_args = _synthetic_video_codec_lut()[video_codec]
+    audio_args = ["-c:a", "aac", "-b:a", "64k"] if include_audio else []
+
+    run_command_list = ["ffmpeg", "-nostdin", "-y", "-loglevel", "error",
+                        *input_args,
+                        *video_args,
+                        "-g", str(int(frame_rate)),
+                        *audio_args,
+                        "-shortest",
+                        save_path]
+
+    return run_command_list
+
+# .....................................................................................................................
+
+def generate_synthetic_clips(save_folder_path, num_clips,
+                             duration_sec = 1.0,
+                             video_codec = "h264",
+                             container_ext = ".mp4",
+                             include_audio = True,
+                             name_prefix = "clip"):
+
+    '''
+    Function which fills a folder with synthetic test clips, for benchmarking.
+    Encoding thousands of clips would take far longer than the benchmarks themselves, so a single
+    template clip is encoded and then hard-linked (or copied, if linking isn't supported) to create the rest.
+
+    Outputs:
+        clip_paths_list (or None if the template clip couldn't be created)
+    '''
+
+    os.makedirs(save_folder_path, exist_ok = True)
+
+    # Generate the single clip that all others are linked to
+    template_path = os.path.join(save_folder_path, ".template{}".format(container_ext))
+    if not os.path.exists(template_path):
+        proc_out = captured_subprocess(build_synthetic_clip_command(template_path, duration_sec,
+                                                                    video_codec, include_audio))
+        if proc_out.returncode != 0:
+            if os.path.exists(template_path):
+                os.remove(template_path)
+            return None
+
+    # Create all clips, with zero-padded numbering so that name sorting matches clip ordering
+    num_digits = len(str(num_clips))
+    clip_paths_list = []
+    for each_idx in range(num_clips):
+        each_name = "{}_{}{}".format(name_prefix, str(each_idx).zfill(num_digits), container_ext)
+        each_path = os.path.join(save_folder_path, each_name)
+        if not os.path.exists(each_path):
+            try:
+                os.link(template_path, each_path)
+            except OSError:
+                shutil.copyfile(template_path, each_path)
+        clip_paths_list.append(each_path)
+
+    return clip_paths_list
+
+# .....................................................................................................................
+
+def get_ffmpeg_version():
+
+    ''' Helper used to get the (first line of the) ffmpeg version string, or None if ffmpeg isn't available '''
+
+    try:
+        proc_out = captured_subprocess(["ffmpeg", "-hide_banner", "-version"])
+    except OSError:
+        return None
+
+    version_lines = proc_out.stdout.decode(errors = "ignore").splitlines()
+
+    return version_lines[0].strip() if len(version_lines) > 0 else None
+
+# .....................................................................................................................
+
+def get_repo_commit():
+
+    ''' Helper used to record which version of the code produced benchmark results. Returns None if unknown '''
+
+    repo_folder_path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    try:
+        proc_out = captured_subprocess(["git", "-C", repo_folder_path, "rev-parse", "--short", "HEAD"])
+    except OSError:
+        return None
+
+    return proc_out.stdout.decode().strip() if proc_out.returncode == 0 else None
+
+# .....................................................................................................................
+
+def get_machine_info(data_folder_path = None):
+
+    '''
+    Function which collects information about the machine running a benchmark,
+    so that results from different runs/machines can be compared sensibly
+    '''
+
+    # Get total memory, where the OS makes this easy (i.e. not on Windows)
+    total_memory_bytes = None
+    try:
+        total_memory_bytes = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        pass
+
+    machine_info_dict = {"datetime": dt.datetime.now().isoformat(timespec = "seconds"),
+                         "hostname": platform.node(),
+                         "system": platform.system(),
+                         "release": platform.release(),
+                         "machine": platform.machine(),
+                         "processor": platform.processor(),
+                         "cpu_count": os.cpu_count(),
+                         "total_memory_bytes": total_memory_bytes,
+                         "python_version": sys.version.split()[0],
+                         "ffmpeg_version": get_ffmpeg_version(),
+                         "code_version": get_repo_commit()}
+
+    # Record where the data lives, since disk type has a large effect on stream copying speeds
+    if data_folder_path is not None:
+        machine_info_dict["data_folder"] = os.path.abspath(data_folder_path)
+        machine_info_dict["data_free_bytes"] = shutil.disk_usage(data_folder_path).free
+
+    return machine_info_dict
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+
+    print(" ".join(build_synthetic_clip_command("clip.mp4")))
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Oct 30 14:05:38 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import os
+import json
+import mmap
+import struct
+
+from bisect import bisect_right
+
+from local.lib.containers import get_extension_family
+from local.lib.atomic_output import build_partial_path, commit_partial_output, write_text_atomically
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def _binary_index_header():
+
+    '''
+    Layout of the binary clip index header: magic bytes, format version & number of records.
+    Each record (see _binary_index_record()) follows, sorted by output start time
+    '''
+
+    return struct.Struct("<4sII")
+
+# .....................................................................................................................
+
+def _binary_index_record():
+
+    '''
+    Layout of each binary clip index record (all little-endian):
+        output start time (float64, seconds), output end time (float64, seconds),
+        source offset (float64, seconds), clip number (uint32, position in the json index 'clips' list),
+        padding (uint32, keeps records 8-byte aligned)
+    '''
+
+    return struct.Struct("<dddII")
+
+# .....................................................................................................................
+
+def chapters_supported(output_ext):
+
+    ''' Helper used to check if an output container can hold chapters (transport streams can't) '''
+
+    return get_extension_family(output_ext) in {"mp4", "mov", "mkv"}
+
+# .....................................................................................................................
+
+def build_clip_timeline(durations_list, trimmed_secs_list = None, filled_gaps_list = None):
+
+    '''
+    Function which figures out where each clip lands in the stitched output. Clips are placed
+    back-to-back (as done by the concat demuxer), less any time trimmed off their start, with any
+    filled gaps placed before the clip that follows them. Returns None if durations aren't available
+
+    Outputs:
+        timeline_list
+
+    Where timeline_list has the form:
+        [{"clip_index": ..., "start_sec": ..., "end_sec": ..., "source_offset_sec": ...}, ...]
+
+    The source offset is the time within the source clip (from its start) where its output range begins
+    '''
+
+    num_clips = len(durations_list)
+    trimmed_secs_list = trimmed_secs_list if trimmed_secs_list is not None else [0.0] * num_clips
+    filled_gaps_list = filled_gaps_list if filled_gaps_list is not None else [0.0] * num_clips
+    if any(each_duration is None for each_duration in durations_list):
+        return None
+
+    timeline_list = []
+    output_sec = 0.0
+    for each_idx, (each_duration, each_trim_sec, each_gap_sec) in enumerate(zip(durations_list, trimmed_secs_list,
+                                                                                 filled_gaps_list)):
+        start_sec = output_sec + each_gap_sec
+        end_sec = start_sec + max(0.0, each_duration - each_trim_sec)
+        timeline_list.append({"clip_index": each_idx,
+                              "start_sec": round(start_sec, 6),
+                              "end_sec": round(end_sec, 6),
+                              "source_offset_sec": round(each_trim_sec, 6)})
+        output_sec = end_sec
+
+    return timeline_list
+
+# .....................................................................................................................
+
+def split_timeline_into_parts(timeline_list, part_start_secs_list):
+
+    '''
+    Function which divides a clip timeline into separate timelines for each part of a split output
+    (see timeline.get_part_start_times(...)), with times relative to the start of each part.
+    Since parts are cut where clips begin, each part starts at the start of its first clip
+
+    Outputs:
+        part_timelines_list (one timeline per part)
+    '''
+
+    part_timelines_list = [[] for _ in range(len(part_start_secs_list) + 1)]
+    for each_entry in timeline_list:
+        each_part_idx = bisect_right(part_start_secs_list, each_entry["start_sec"])
+        part_timelines_list[each_part_idx].append(dict(each_entry))
+
+    for each_part_list in part_timelines_list:
+        part_offset_sec = each_part_list[0]["start_sec"] if len(each_part_list) > 0 else 0.0
+        for each_entry in each_part_list:
+            each_entry["start_sec"] = round(each_entry["start_sec"] - part_offset_sec, 6)
+            each_entry["end_sec"] = round(each_entry["end_sec"] - part_offset_sec, 6)
+
+    return part_timelines_list
+
+# .....................................................................................................................
+
+def _escape_ffmetadata(value_str):
+
+    ''' Helper used to escape special characters in ffmetadata values (with backslashes) '''
+
+    for each_char in ("\\", "=", ";", "#", "\n"):
+        value_str = value_str.replace(each_char, "\\{}".format(each_char))
+
+    return value_str
+
+# .....................................................................................................................
+
+def write_chapters_file(file_path, timeline_list, source_paths_list):
+
+    '''
+    Function which writes an ffmetadata file holding one chapter per clip (titled with the source file name),
+    which can be given to ffmpeg as an extra input to add chapters to an output (see build_stitch_command(...))
+
+    Outputs:
+        file_path
+    '''
+
+    with open(file_path, "w") as text_file:
+        text_file.write(";FFMETADATA1\n")
+        for each_entry in timeline_list:
+            each_title = os.path.basename(source_paths_list[each_entry["clip_index"]])
+            text_file.write("\n".join(["[CHAPTER]",
+                                       "TIMEBASE=1/1000",
+                                       "START={}".format(int(round(each_entry["start_sec"] * 1000))),
+                                       "END={}".format(int(round(each_entry["end_sec"] * 1000))),
+                                       "title={}".format(_escape_ffmetadata(each_title)),
+                                       ""]))
+
+    return file_path
+
+# .....................................................................................................................
+
+def build_index_paths(output_path):
+
+    ''' Helper used to build the paths of the (json & binary) clip index files, stored next to an output '''
+
+    return "{}.index.json".format(output_path), "{}.index.bin".format(output_path)
+
+# .....................................................................................................................
+
+def write_clip_index(output_path, timeline_list, source_paths_list):
+
+    '''
+    Function which saves a sidecar index next to a stitched output, mapping output time ranges back to the
+    source clip (path & offset) they came from. Two versions are saved:
+        "<output>.index.json" -> Readable version, holding the source paths
+        "<output>.index.bin" -> Compact array of fixed-size records (see _binary_index_record()),
+                                which can be searched without parsing (see find_in_binary_index(...))
+    Records in both are sorted by output time, so lookups can use a binary search (see find_source_clip(...))
+
+    Outputs:
+        index_paths_list
+    '''
+
+    json_path, binary_path = build_index_paths(output_path)
+
+    # Save readable version
+    clips_list = [{"start_sec": each_entry["start_sec"],
+                   "end_sec": each_entry["end_sec"],
+                   "path": os.path.abspath(source_paths_list[each_entry["clip_index"]]),
+                   "source_offset_sec": each_entry["source_offset_sec"]}
+                  for each_entry in timeline_list]
+    index_dict = {"version": 1, "output": os.path.basename(output_path), "clips": clips_list}
+    write_text_atomically(json_path, json.dumps(index_dict, indent = 2) + "\n")
+
+    # Save binary version (through a partial file, like every other output)
+    header_struct, record_struct = _binary_index_header(), _binary_index_record()
+    partial_path = build_partial_path(binary_path)
+    with open(partial_path, "wb") as out_file:
+        out_file.write(header_struct.pack(b"CIDX", 1, len(clips_list)))
+        for each_clip_idx, each_clip in enumerate(clips_list):
+            out_file.write(record_struct.pack(each_clip["start_sec"], each_clip["end_sec"],
+                                              each_clip["source_offset_sec"], each_clip_idx, 0))
+    commit_partial_output(partial_path, binary_path)
+
+    return [json_path, binary_path]
+
+# .....................................................................................................................
+
+def load_clip_index(json_index_path):
+
+    '''
+    Function which loads a json clip index (see write_clip_index(...)) for lookups with find_source_clip(...).
+    The start time of every clip is gathered once (stored under "start_secs"), so each lookup is O(log n)
+
+    Outputs:
+        index_dict
+    '''
+
+    with open(json_index_path, "r") as in_file:
+        index_dict = json.load(in_file)
+    index_dict["start_secs"] = [each_clip["start_sec"] for each_clip in index_dict["clips"]]
+
+    return index_dict
+
+# .....................................................................................................................
+
+def find_source_clip(index_dict, output_sec):
+
+    '''
+    Function which finds the source of a point in a stitched output, using a json clip index
+    (ideally loaded with load_clip_index(...)). Uses a binary search over the clip start times,
+    which are gathered into the index on the first lookup if they aren't already there.
+    Returns None if the time doesn't belong to any clip (e.g. it falls in a filled gap)
+
+    Outputs:
+        source_path, source_sec (or None, None)
+    '''
+
+    clips_list = index_dict["clips"]
+    if "start_secs" not in index_dict:
+        index_dict["start_secs"] = [each_clip["start_sec"] for each_clip in clips_list]
+    clip_idx = bisect_right(index_dict["start_secs"], output_sec) - 1
+    if clip_idx < 0 or output_sec >= clips_list[clip_idx]["end_sec"]:
+        return None, None
+
+    found_clip = clips_list[clip_idx]
+    source_sec = found_clip["source_offset_sec"] + (output_sec - found_clip["start_sec"])
+
+    return found_clip["path"], source_sec
+
+# .....................................................................................................................
+
+def find_in_binary_index(binary_index_path, output_sec):
+
+    '''
+    Function which finds the source of a point in a stitched output, by binary searching the binary
+    clip index directly (through mmap), so only a handful of records are read regardless of index size.
+    Returns None if the time doesn't belong to any clip (e.g. it falls in a filled gap)
+
+    Outputs:
+        clip_number, source_sec (or None, None)
+
+    Where clip_number is the position of the clip in the 'clips' list of the json index
+    '''
+
+    header_struct, record_struct = _binary_index_header(), _binary_index_record()
+    with open(binary_index_path, "rb") as in_file:
+        with mmap.mmap(in_file.fileno(), 0, access = mmap.ACCESS_READ) as mapped_file:
+            magic_bytes, _, num_records = header_struct.unpack_from(mapped_file, 0)
+            if magic_bytes != b"CIDX":
+                raise ValueError("Not a clip index file: {}".format(binary_index_path))
+            read_record = lambda record_idx: record_struct.unpack_from(mapped_file, header_struct.size
+                                                                       + record_idx * record_struct.size)
+
+            # Find the last record starting at (or before) the given time
+            low_idx, high_idx = 0, num_records
+            while low_idx < high_idx:
+                mid_idx = (low_idx + high_idx) // 2
+                if read_record(mid_idx)[0] <= output_sec:
+                    low_idx = mid_idx + 1
+                else:
+                    high_idx = mid_idx
+            if low_idx == 0:
+                return None, None
+            start_sec, end_sec, source_offset_sec, clip_number, _ = read_record(low_idx - 1)
+
+    if output_sec >= end_sec:
+        return None, None
+
+    return clip_number, source_offset_sec + (output_sec - start_sec)
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+
+    # Look up a time in an existing index, e.g.: python3 chapters.py stitched.mp4.index.json 125.5
+    import sys
+    if len(sys.argv) > 2:
+        print(find_source_clip(load_clip_index(sys.argv[1]), float(sys.argv[2])))
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
+
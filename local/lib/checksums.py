@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 26 09:14:36 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import os
+import hashlib
+
+from local.lib.containers import get_extension_family
+from local.lib.atomic_output import write_text_atomically
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define classes
+
+
+class Output_Hasher:
+
+    '''
+    Class used to compute checksums of an ffmpeg output while it is being written, so that archiving
+    doesn't require reading the whole output back from disk afterwards.
+
+    For outputs that ffmpeg can write sequentially (i.e. without seeking back to patch headers, see
+    is_streamable_output(...)), ffmpeg writes into a named pipe (fifo) rather than the output file.
+    A background thread reads from the pipe, hashing the data as it passes through on its way to the output file.
+    Other outputs (e.g. regular mp4s, which get patched once everything is written), or systems without
+    named pipes, fall back to hashing the finished file (i.e. a second read pass), which is flagged in the results.
+
+    Example usage:
+        hasher = Output_Hasher(output_path, temp_folder, ["sha256"], is_streamable_output(".ts"))
+        hasher.start()
+        ... (run ffmpeg, writing to hasher.ffmpeg_output_path, with hasher.ffmpeg_args_list as output args)
+        digests_dict = hasher.finish(ffmpeg_succeeded)
+    '''
+
+    # .................................................................................................................
+
+    def __init__(self, output_path, temp_folder_path, algorithm_names_list, is_streamable = True,
+                 chunk_size_bytes = 1024 ** 2):
+
+        # Store inputs
+        self.output_path = output_path
+        self.algorithm_names_list = list(algorithm_names_list)
+        self.chunk_size_bytes = chunk_size_bytes
+
+        # Hash inline through a named pipe when possible (keeping the extension, so ffmpeg picks the same format)
+        self.is_inline = is_streamable and hasattr(os, "mkfifo")
+        self.ffmpeg_output_path = output_path
+        self.ffmpeg_args_list = []
+        if self.is_inline:
+            fifo_name = "output_pipe{}".format(os.path.splitext(output_path)[1])
+            self.ffmpeg_output_path = os.path.join(temp_folder_path, fifo_name)
+            self.ffmpeg_args_list = ["-y"]
+
+        # Storage for the pipe-reading thread
+        self._hashers_dict = {}
+        self._out_file = None
+        self._pipe_thread = None
+        self._pipe_opened = False
+        self.error_msg = None
+
+    # .................................................................................................................
+
+    def start(self):
+
+        ''' Create the pipe for ffmpeg to write into and start reading from it (if hashing inline) '''
+
+        if not self.is_inline:
+            return
+
+        # Thread import is deferred, since it's only needed when hashing inline
+        from threading import Thread
+
+        os.mkfifo(self.ffmpeg_output_path)
+        self._hashers_dict = new_hashers(self.algorithm_names_list)
+
+        # Don't truncate the output file if it already exists, since it may have been preallocated
+        self._out_file = open(self.output_path, "r+b" if os.path.exists(self.output_path) else "wb")
+        self._pipe_thread = Thread(target = self._pipe_worker, daemon = True)
+        self._pipe_thread.start()
+
+        return
+
+    # .................................................................................................................
+
+    def finish(self, ffmpeg_succeeded = True):
+
+        '''
+        Finish hashing & return the digests of the output, or None if the output wasn't successfully written.
+        When not hashing inline, this reads the whole output back from disk!
+
+        Outputs:
+            digests_dict (or None)
+
+        Where digests_dict has the form:
+            {"sha256": "abc123...", ..., "inline": True or False}
+        '''
+
+        digests_dict = None
+        if self.is_inline:
+
+            # If ffmpeg failed before opening its output, the reader is stuck waiting for the pipe to open,
+            # so open (and close) the pipe ourselves. This fails until the reader is actually waiting
+            while not self._pipe_opened and self._pipe_thread.is_alive():
+                try:
+                    os.close(os.open(self.ffmpeg_output_path, os.O_WRONLY | os.O_NONBLOCK))
+                except OSError:
+                    self._pipe_thread.join(0.05)
+            self._pipe_thread.join()
+            self._out_file.close()
+            os.remove(self.ffmpeg_output_path)
+
+            if ffmpeg_succeeded and self.error_msg is None:
+                digests_dict = {each_name: each_hasher.hexdigest() for each_name, each_hasher in
+                                self._hashers_dict.items()}
+
+        elif ffmpeg_succeeded:
+            digests_dict = hash_file(self.output_path, self.algorithm_names_list, self.chunk_size_bytes)
+
+        # Record whether the checksum needed a second pass over the output
+        if digests_dict is not None:
+            digests_dict["inline"] = self.is_inline
+
+        return digests_dict
+
+    # .................................................................................................................
+
+    def _pipe_worker(self):
+
+        '''
+        Copies data out of the pipe & into the output file, hashing along the way.
+        If writing fails (e.g. the disk is full), the pipe is closed so that ffmpeg fails too,
+        rather than reporting success on an output that was never written
+        '''
+
+        with open(self.ffmpeg_output_path, "rb", buffering = 0) as pipe_file:
+            self._pipe_opened = True
+            try:
+                while True:
+                    data_chunk = pipe_file.read(self.chunk_size_bytes)
+                    if not data_chunk:
+                        break
+                    for each_hasher in self._hashers_dict.values():
+                        each_hasher.update(data_chunk)
+                    self._out_file.write(data_chunk)
+                self._out_file.flush()
+            except OSError as err:
+                self.error_msg = "Error writing output: {}".format(err)
+
+        return
+
+    # .................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def checksum_names():
+
+    '''
+    List of supported checksum algorithms. The xxh64 checksum is much faster to compute,
+    but requires the (optional) xxhash package to be installed
+    '''
+
+    return ["sha256", "xxh64"]
+
+# .....................................................................................................................
+
+def parse_checksums_arg(checksums_arg_str):
+
+    '''
+    Helper used to interpret the comma separated list of checksums given as a script argument.
+    Unavailable checksums (e.g. xxh64 without the xxhash package) are skipped, with a warning
+
+    Outputs:
+        algorithm_names_list
+    '''
+
+    if checksums_arg_str is None or checksums_arg_str.strip().lower() in ("", "off", "none"):
+        return []
+
+    algorithm_names_list = []
+    for each_name in checksums_arg_str.lower().split(","):
+        each_name = each_name.strip()
+        if each_name not in checksum_names():
+            print("", "WARNING: Unknown checksum ({}), must be one of: {}".format(each_name, checksum_names()),
+                  sep = "\n")
+            continue
+        if each_name == "xxh64" and not xxhash_available():
+            print("", "WARNING: Skipping xxh64 checksum, the xxhash package isn't installed",
+                  "Install with:", "", "  pip install xxhash", sep = "\n")
+            continue
+        algorithm_names_list.append(each_name)
+
+    return algorithm_names_list
+
+# .....................................................................................................................
+
+def xxhash_available():
+
+    ''' Helper used to check if the (optional) xxhash package is installed '''
+
+    try:
+        import xxhash
+    except ImportError:
+        return False
+
+    return True
+
+# .....................................................................................................................
+
+def new_hashers(algorithm_names_list):
+
+    ''' Helper used to create (empty) hashing objects, as a dictionary keyed by algorithm name '''
+
+    hashers_dict = {}
+    for each_name in algorithm_names_list:
+        if each_name == "xxh64":
+            import xxhash
+            hashers_dict[each_name] = xxhash.xxh64()
+        else:
+            hashers_dict[each_name] = hashlib.new(each_name)
+
+    return hashers_dict
+
+# .....................................................................................................................
+
+def is_streamable_output(output_ext, mp4_layout = "default"):
+
+    '''
+    Helper used to check if ffmpeg can write an output format without seeking, so that it can be hashed inline.
+    Transport streams are written purely sequentially, as are fragmented mp4s. Regular mp4s (and mkv)
+    go back to patch the file once all the data is written, which isn't possible through a pipe
+    '''
+
+    output_family = get_extension_family(output_ext)
+    is_fragmented_mp4 = (output_family == "mp4") and (mp4_layout == "fragmented")
+
+    return (output_family == "ts") or is_fragmented_mp4
+
+# .....................................................................................................................
+
+def hash_file(file_path, algorithm_names_list, chunk_size_bytes = 1024 ** 2):
+
+    ''' Function which computes checksums of an existing file, reading it once for all algorithms '''
+
+    hashers_dict = new_hashers(algorithm_names_list)
+    with open(file_path, "rb", buffering = 0) as in_file:
+        while True:
+            data_chunk = in_file.read(chunk_size_bytes)
+            if not data_chunk:
+                break
+            for each_hasher in hashers_dict.values():
+                each_hasher.update(data_chunk)
+
+    return {each_name: each_hasher.hexdigest() for each_name, each_hasher in hashers_dict.items()}
+
+# .....................................................................................................................
+
+def write_checksum_sidecars(file_path, digests_dict):
+
+    '''
+    Function which saves each checksum of a file next to it (e.g. "video.mp4" -> "video.mp4.sha256").
+    Sidecars use the same format as the sha256sum/xxhsum tools, so they can be checked with 'sha256sum -c'
+
+    Outputs:
+        sidecar_paths_list
+    '''
+
+    sidecar_paths_list = []
+    file_name = os.path.basename(file_path)
+    for each_name in checksum_names():
+        if each_name not in digests_dict:
+            continue
+        sidecar_path = "{}.{}".format(file_path, each_name)
+        write_text_atomically(sidecar_path, "{}  {}\n".format(digests_dict[each_name], file_name))
+        sidecar_paths_list.append(sidecar_path)
+
+    return sidecar_paths_list
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+
+    print("Checksum of this file:", hash_file(__file__, ["sha256"]))
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
+
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 11:26:40 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import os
+
+from collections import Counter
+
+from local.lib.probing import get_streams_by_type
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def _ext_to_family_lut():
+
+    ''' Lookup table used to group file extensions into container 'families' that behave the same when muxing '''
+
+    return {".mp4": "mp4", ".m4v": "mp4", ".mov": "mov",
+            ".ts": "ts", ".m2ts": "ts", ".mts": "ts",
+            ".mkv": "mkv", ".webm": "mkv",
+            ".flv": "flv", ".avi": "avi"}
+
+# .....................................................................................................................
+
+def _format_name_to_family_lut():
+
+    ''' Lookup table used to map (the first entry of) ffprobe 'format_name' strings to container families '''
+
+    return {"mov": "mp4", "mpegts": "ts", "matroska": "mkv", "flv": "flv", "avi": "avi"}
+
+# .....................................................................................................................
+
+def _supported_codecs_lut():
+
+    '''
+    Lookup table of the codecs that can be stream-copied into each container family.
+    Families that aren't listed (e.g. mkv) are assumed to accept anything
+    '''
+
+    return {"mp4": {"video": {"h264", "hevc", "mpeg4", "av1", "vp9", "mjpeg", "mpeg2video"},
+                    "audio": {"aac", "mp3", "ac3", "eac3", "opus", "alac", "flac"}},
+            "ts": {"video": {"h264", "hevc", "mpeg2video", "mpeg1video", "mpeg4"},
+                   "audio": {"aac", "mp3", "mp2", "ac3", "eac3", "opus"}},
+            "flv": {"video": {"h264", "flv1"},
+                    "audio": {"aac", "mp3"}}}
+
+# .....................................................................................................................
+
+def normalize_extension(file_ext):
+
+    ''' Helper which cleans up user-entered extensions, e.g. "MKV" -> ".mkv" '''
+
+    clean_ext = file_ext.strip().lower()
+    return clean_ext if clean_ext.startswith(".") else ".{}".format(clean_ext)
+
+# .....................................................................................................................
+
+def get_extension_family(file_ext):
+
+    ''' Returns the container family of a given file extension (or None if it isn't recognized) '''
+
+    return _ext_to_family_lut().get(normalize_extension(file_ext), None)
+
+# .....................................................................................................................
+
+def get_probed_family(probe_result):
+
+    ''' Returns the container family of a probed file, falling back to the file extension if needed '''
+
+    # Bail if we don't have probe data
+    if probe_result is None:
+        return None
+
+    # ffprobe reports formats as comma separated aliases (e.g. "mov,mp4,m4a,3gp,3g2,mj2"), use the first one
+    format_name = probe_result["format"].get("format_name", "")
+    first_format_name = format_name.split(",")[0]
+    family = _format_name_to_family_lut().get(first_format_name, None)
+
+    # Use the extension if the format name isn't recognized
+    if family is None:
+        family = get_extension_family(os.path.splitext(probe_result["path"])[1])
+
+    return family
+
+# .....................................................................................................................
+
+def get_majority_codecs(probe_results_list):
+
+    '''
+    Function which finds the most common video & audio codecs among the (probed) input files.
+    Also returns a list of warnings, if the inputs have mismatched codecs (which usually breaks stitching)
+
+    Outputs:
+        video_codec, audio_codec, warnings_list
+    '''
+
+    # Tally up the first video/audio codec of each file (None if the file has no stream of that type)
+    video_counter = Counter()
+    audio_counter = Counter()
+    for each_result in probe_results_list:
+        video_streams = get_streams_by_type(each_result, "video")
+        audio_streams = get_streams_by_type(each_result, "audio")
+        video_counter[video_streams[0].get("codec_name") if video_streams else None] += 1
+        audio_counter[audio_streams[0].get("codec_name") if audio_streams else None] += 1
+
+    # Pick the most common codecs
+    video_codec = video_counter.most_common(1)[0][0] if video_counter else None
+    audio_codec = audio_counter.most_common(1)[0][0] if audio_counter else None
+
+    # Warn about mismatches
+    warnings_list = []
+    for each_type, each_counter in [("video", video_counter), ("audio", audio_counter)]:
+        if len(each_counter) > 1:
+            codec_strs = ["{} ({} files)".format(each_codec, each_count)
+                          for each_codec, each_count in each_counter.most_common()]
+            warnings_list.append("Inputs have mixed {} codecs: {}".format(each_type, ", ".join(codec_strs)))
+
+    return video_codec, audio_codec, warnings_list
+
+# .....................................................................................................................
+
+def select_bitstream_filters(probe_results_list, output_ext):
+
+    '''
+    Function which picks the bitstream filters needed to stream-copy the (probed) inputs into the
+    container given by the output extension. For example, h264 stored in mp4/mkv uses length-prefixed
+    packets, which must be converted to 'annex b' (start-code) packets when copying into a .ts file,
+    while aac audio from a .ts file carries ADTS headers which must be stripped when copying into mp4/mkv.
+
+    Outputs:
+        output_args_list, notes_list
+
+    Where output_args_list contains ffmpeg output arguments, e.g. ["-bsf:v", "h264_mp4toannexb"]
+    '''
+
+    # Initialize outputs
+    output_args_list = []
+    notes_list = []
+
+    # Figure out the output container and (most common) input container
+    output_family = get_extension_family(output_ext)
+    input_families = Counter([get_probed_family(each_result) for each_result in probe_results_list])
+    input_families.pop(None, None)
+    if output_family is None or not input_families:
+        return output_args_list, notes_list
+    input_family = input_families.most_common(1)[0][0]
+
+    # No conversion needed when staying within the same container family
+    video_codec, audio_codec, _ = get_majority_codecs(probe_results_list)
+    if input_family == output_family:
+        return output_args_list, notes_list
+
+    # Families using length-prefixed (AVCC/HVCC) video packets vs. start-code (annex b) packets
+    length_prefixed_families = {"mp4", "mov", "mkv", "flv"}
+    annexb_video_filters_lut = {"h264": "h264_mp4toannexb", "hevc": "hevc_mp4toannexb"}
+
+    # Handle video conversion into transport streams
+    needs_annexb = (input_family in length_prefixed_families) and (output_family == "ts")
+    if needs_annexb and video_codec in annexb_video_filters_lut:
+        video_bsf = annexb_video_filters_lut[video_codec]
+        output_args_list += ["-bsf:v", video_bsf]
+        notes_list.append("Using {} for {} -> {} video copy".format(video_bsf, input_family, output_family))
+
+    # Handle audio conversion out of transport streams
+    needs_asc = (input_family == "ts") and (output_family in length_prefixed_families)
+    if needs_asc and audio_codec == "aac":
+        audio_bsf = "aac_adtstoasc"
+        output_args_list += ["-bsf:a", audio_bsf]
+        notes_list.append("Using {} for {} -> {} audio copy".format(audio_bsf, input_family, output_family))
+
+    return output_args_list, notes_list
+
+# .....................................................................................................................
+
+def check_codec_compatibility(probe_results_list, output_ext):
+
+    '''
+    Function which checks whether the (most common) input codecs can be stream-copied into the output
+    container. Returns a list of warning strings (empty if everything looks ok)
+    '''
+
+    warnings_list = []
+
+    # Assume things are ok if we don't know about the output container
+    output_family = get_extension_family(output_ext)
+    supported_codecs_dict = _supported_codecs_lut().get(output_family, None)
+    if supported_codecs_dict is None:
+        return warnings_list
+
+    # Check each stream type against the supported codecs
+    video_codec, audio_codec, _ = get_majority_codecs(probe_results_list)
+    for each_type, each_codec in [("video", video_codec), ("audio", audio_codec)]:
+        if each_codec is None:
+            continue
+        if each_codec not in supported_codecs_dict[each_type]:
+            warnings_list.append("{} codec '{}' can't be copied into {} files (try .mkv instead)".format(
+                each_type.capitalize(), each_codec, output_ext))
+
+    return warnings_list
+
+# .....................................................................................................................
+
+def _parse_frame_rate(frame_rate_str):
+    
+    ''' Helper used to convert ffprobe frame rate strings (e.g. "30000/1001") into floats. Returns 0 if invalid '''
+    
+    try:
+        numerator, _, denominator = str(frame_rate_str).partition("/")
+        frame_rate = float(numerator) / float(denominator if denominator else 1)
+    except (ValueError, ZeroDivisionError):
+        frame_rate = 0.0
+    
+    return frame_rate
+
+# .....................................................................................................................
+
+def count_probed_samples(probe_result):
+    
+    '''
+    Function which counts the number of video & audio samples (i.e. packets) in a probed file.
+    Uses the sample counts stored in the container when available (e.g. mp4 inputs), otherwise
+    estimates counts from the duration along with the frame rate (video) or sample rate (audio).
+    
+    Outputs:
+        num_video_samples, num_audio_samples, has_b_frames
+    '''
+    
+    # Initialize outputs
+    num_video_samples = 0
+    num_audio_samples = 0
+    has_b_frames = False
+    if probe_result is None:
+        return num_video_samples, num_audio_samples, has_b_frames
+    
+    # Get the file duration, in case we need to estimate sample counts
+    try:
+        file_duration_sec = float(probe_result["format"].get("duration", 0))
+    except ValueError:
+        file_duration_sec = 0.0
+    
+    for each_stream in probe_result["streams"]:
+        
+        # Get the stored sample count or estimate it from the duration
+        codec_type = each_stream.get("codec_type")
+        nb_frames_str = str(each_stream.get("nb_frames", ""))
+        stored_count = int(nb_frames_str) if nb_frames_str.isdigit() else 0
+        if codec_type == "video":
+            estimated_count = file_duration_sec * _parse_frame_rate(each_stream.get("avg_frame_rate", "0/1"))
+            num_video_samples += stored_count if stored_count > 0 else int(estimated_count) + 1
+            has_b_frames = has_b_frames or (int(each_stream.get("has_b_frames", 0) or 0) > 0)
+            
+        elif codec_type == "audio":
+            samples_per_frame = int(each_stream.get("frame_size", 0) or 0) or 1024
+            sample_rate = float(each_stream.get("sample_rate", 0) or 0)
+            estimated_count = file_duration_sec * sample_rate / samples_per_frame
+            num_audio_samples += stored_count if stored_count > 0 else int(estimated_count) + 1
+    
+    return num_video_samples, num_audio_samples, has_b_frames
+
+# .....................................................................................................................
+
+def estimate_moov_size_bytes(probe_results_list, safety_factor = 1.25):
+    
+    '''
+    Function which estimates (conservatively) the size of the mp4 'moov' atom needed to index the
+    stitched output, based on the sample counts of all the (probed) inputs. Each sample needs an
+    entry in several index tables (sample sizes, timing, chunk offsets etc.), so the estimate
+    assumes the worst case of no table compression.
+    '''
+    
+    # Worst-case bytes per sample: stsz (4) + stts (8) + stsc (12) + co64 (8) + stss for video (4)
+    video_bytes_per_sample = 36
+    audio_bytes_per_sample = 32
+    ctts_bytes_per_sample = 8
+    fixed_overhead_bytes = 64 * 1024
+    
+    # Add up sample counts across all inputs
+    total_video_samples = 0
+    total_audio_samples = 0
+    any_b_frames = False
+    for each_result in probe_results_list:
+        num_video, num_audio, has_b_frames = count_probed_samples(each_result)
+        total_video_samples += num_video
+        total_audio_samples += num_audio
+        any_b_frames = any_b_frames or has_b_frames
+    
+    # Video needs an extra (composition time) table when b-frames are present
+    video_bytes_per_sample += ctts_bytes_per_sample if any_b_frames else 0
+    table_bytes = (total_video_samples * video_bytes_per_sample) + (total_audio_samples * audio_bytes_per_sample)
+    moov_size_bytes = int((table_bytes + fixed_overhead_bytes) * safety_factor)
+    
+    return moov_size_bytes
+
+# .....................................................................................................................
+
+def build_mp4_layout_args(mp4_layout, probe_results_list, output_ext):
+    
+    '''
+    Function which builds the ffmpeg output arguments needed for 'web-ready' mp4 files, where
+    playback can begin without needing to fetch the end of the file. Supports layouts:
+        "default" -> Regular mp4 output, the index (moov) is written at the end of the file
+        "fragmented" -> Fragmented mp4, the file is written as a series of small self-indexed fragments
+        "faststart" -> The index is written at the start of the file, into space reserved up front
+                       (based on the probed sample counts). This avoids the second full rewrite pass
+                       that is used by ffmpeg's '-movflags +faststart' option
+    
+    Outputs:
+        output_args_list, notes_list
+    '''
+    
+    # Initialize outputs
+    output_args_list = []
+    notes_list = []
+    
+    # Nothing to do for the default layout
+    if mp4_layout in {None, "default"}:
+        return output_args_list, notes_list
+    
+    # Layouts only apply to mp4-like outputs
+    if get_extension_family(output_ext) not in {"mp4", "mov"}:
+        notes_list.append("Ignoring {} layout, since it only applies to mp4/mov outputs".format(mp4_layout))
+        return output_args_list, notes_list
+    
+    if mp4_layout == "fragmented":
+        output_args_list += ["-movflags", "+frag_keyframe+empty_moov+default_base_moof"]
+        notes_list.append("Using fragmented mp4 layout")
+        
+    elif mp4_layout == "faststart":
+        moov_size_bytes = estimate_moov_size_bytes(probe_results_list)
+        output_args_list += ["-moov_size", str(moov_size_bytes)]
+        notes_list.append("Using faststart layout, reserving {:.1f} kB for the index".format(moov_size_bytes / 1024))
+        
+    else:
+        raise ValueError("Unrecognized mp4 layout: {}".format(mp4_layout))
+    
+    return output_args_list, notes_list
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+    pass
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
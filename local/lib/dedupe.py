@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 26 15:48:03 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import os
+import mmap
+import hashlib
+
+from collections import OrderedDict
+
+from local.lib.checksums import hash_file
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def sample_fingerprint(file_path, num_samples = 4, block_size_bytes = 64 * 1024):
+
+    '''
+    Function which fingerprints a file by hashing a few evenly spaced blocks of it (always including the
+    first & last blocks), read through mmap so only the sampled pages are actually read from disk.
+    Files that are small enough to be completely covered by the sampled blocks are hashed entirely.
+
+    Outputs:
+        fingerprint_str, is_complete (or None, None if the file can't be read)
+
+    Where 'is_complete' is True if the fingerprint covers the whole file (i.e. no confirmation needed)
+    '''
+
+    try:
+        file_size_bytes = os.path.getsize(file_path)
+        hasher = hashlib.blake2b(digest_size = 16)
+        is_complete = (file_size_bytes <= num_samples * block_size_bytes)
+
+        # Empty files can't be memory mapped, but all look the same anyway
+        if file_size_bytes == 0:
+            return hasher.hexdigest(), True
+
+        with open(file_path, "rb") as in_file:
+            with mmap.mmap(in_file.fileno(), 0, access = mmap.ACCESS_READ) as mapped_file:
+                if is_complete:
+                    hasher.update(mapped_file[:])
+                else:
+                    last_offset = file_size_bytes - block_size_bytes
+                    for each_idx in range(num_samples):
+                        each_offset = (each_idx * last_offset) // (num_samples - 1) if num_samples > 1 else 0
+                        hasher.update(mapped_file[each_offset:(each_offset + block_size_bytes)])
+
+    except (OSError, ValueError):
+        return None, None
+
+    return hasher.hexdigest(), is_complete
+
+# .....................................................................................................................
+
+def _group_paths(file_paths_list, key_func):
+
+    ''' Helper used to group paths by some key, keeping only groups with more than one entry (in order) '''
+
+    groups_dict = OrderedDict()
+    for each_path in file_paths_list:
+        each_key = key_func(each_path)
+        if each_key is not None:
+            groups_dict.setdefault(each_key, []).append(each_path)
+
+    return [each_group for each_group in groups_dict.values() if len(each_group) > 1]
+
+# .....................................................................................................................
+
+def _get_file_id(file_path):
+    try:
+        file_stat = os.stat(file_path)
+    except OSError:
+        return None
+    return (file_stat.st_dev, file_stat.st_ino)
+
+# .....................................................................................................................
+
+def _get_size_or_none(file_path):
+    try:
+        return os.path.getsize(file_path)
+    except OSError:
+        return None
+
+# .....................................................................................................................
+
+def _full_hash_or_none(file_path):
+
+    ''' Helper used to hash a whole file, returning None if it can't be read (so it's treated as unique) '''
+
+    try:
+        return hash_file(file_path, ["sha256"])["sha256"]
+    except OSError:
+        return None
+
+# .....................................................................................................................
+
+def _collect_duplicates(file_paths_list, distinct_idxs_list, content_duplicates_dict, path_duplicates_dict):
+
+    '''
+    Helper used to combine duplicates found by content (keyed by path, among distinct paths) with repeated
+    paths (keyed by position), into the (in order) outputs of find_duplicate_inputs(...)
+    '''
+
+    duplicates_by_idx_dict = dict(path_duplicates_dict)
+    for each_idx in distinct_idxs_list:
+        each_path = file_paths_list[each_idx]
+        if each_path in content_duplicates_dict:
+            duplicates_by_idx_dict[each_idx] = content_duplicates_dict[each_path]
+
+    unique_paths_list = [each_path for each_idx, each_path in enumerate(file_paths_list)
+                         if each_idx not in duplicates_by_idx_dict]
+    duplicates_list = [duplicates_by_idx_dict[each_idx] for each_idx in sorted(duplicates_by_idx_dict.keys())]
+
+    return unique_paths_list, duplicates_list
+
+# .....................................................................................................................
+
+def find_duplicate_inputs(file_paths_list, max_workers = 8):
+
+    '''
+    Function which finds byte-identical files in a list of inputs (e.g. re-named copies left behind by
+    recorder retries or sync tools), so that they aren't stitched more than once. Paths listed more than once
+    are dropped first (without reading anything). Other checks are done in stages, so that the (expensive)
+    full read of a file only happens when it's needed:
+        1. Files are grouped by size (files with a unique size can't be duplicates)
+        2. Files with matching sizes are fingerprinted by hashing a few sampled blocks
+        3. Files with matching fingerprints are confirmed by hashing the whole file
+           (unless the fingerprint already covered the whole file or the paths are the same file)
+    Fingerprinting & hashing run in a thread pool. The first copy of every file (in input order) is kept.
+    Files that can't be read are kept (as unique), with a warning.
+
+    Outputs:
+        unique_paths_list, duplicates_list
+
+    Where duplicates_list has the form:
+        [{"path": ..., "duplicate_of": ..., "size_bytes": ..., "confirmed_by": ...}, ...]
+    '''
+
+    # Drop repeated listings of the same path first (keeping the first), so no path is compared with itself
+    # -> Duplicates are tracked by position, since the same path string may appear more than once
+    path_duplicates_dict = {}
+    first_idx_by_path_dict = OrderedDict()
+    for each_idx, each_path in enumerate(file_paths_list):
+        each_path_key = os.path.normcase(os.path.abspath(each_path))
+        if each_path_key not in first_idx_by_path_dict:
+            first_idx_by_path_dict[each_path_key] = each_idx
+            continue
+        path_duplicates_dict[each_idx] = {"path": each_path,
+                                          "duplicate_of": file_paths_list[first_idx_by_path_dict[each_path_key]],
+                                          "size_bytes": _get_size_or_none(each_path),
+                                          "confirmed_by": "same_path"}
+    distinct_idxs_list = list(first_idx_by_path_dict.values())
+    distinct_paths_list = [file_paths_list[each_idx] for each_idx in distinct_idxs_list]
+
+    # Only files sharing a size with another file need to be read at all
+    size_groups_list = _group_paths(distinct_paths_list, _get_size_or_none)
+    if len(size_groups_list) == 0:
+        return _collect_duplicates(file_paths_list, distinct_idxs_list, {}, path_duplicates_dict)
+
+    # Thread pool import is deferred, since it noticeably adds to start-up time
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers = max(1, max_workers)) as executor:
+
+        # Fingerprint files that share a size
+        candidate_paths_list = [each_path for each_group in size_groups_list for each_path in each_group]
+        fingerprints_dict = dict(zip(candidate_paths_list, executor.map(sample_fingerprint, candidate_paths_list)))
+        fingerprint_key_func = lambda each_path: ((os.path.getsize(each_path), fingerprints_dict[each_path][0])
+                                                  if fingerprints_dict[each_path][0] is not None else None)
+        fingerprint_groups_list = _group_paths(candidate_paths_list, fingerprint_key_func)
+
+        # Confirm suspected duplicates with a full hash, unless the fingerprint already covers the whole file
+        confirm_paths_list = []
+        for each_group in fingerprint_groups_list:
+            group_is_complete = fingerprints_dict[each_group[0]][1]
+            group_is_same_file = (len(set(_get_file_id(each_path) for each_path in each_group)) == 1)
+            if not (group_is_complete or group_is_same_file):
+                confirm_paths_list += each_group
+        full_hashes_dict = dict(zip(confirm_paths_list, executor.map(_full_hash_or_none, confirm_paths_list)))
+
+    # Warn about files that couldn't be read, since they can't be checked (and are kept)
+    unreadable_paths_list = [each_path for each_path in candidate_paths_list
+                             if fingerprints_dict[each_path][0] is None or
+                             (each_path in full_hashes_dict and full_hashes_dict[each_path] is None)]
+    if len(unreadable_paths_list) > 0:
+        print("", "WARNING: Couldn't read file(s) when checking for duplicates, they will be kept:",
+              *["  {}".format(each_path) for each_path in unreadable_paths_list], sep = "\n")
+
+    # Record every copy after the first one (in input order) as a duplicate
+    duplicates_dict = {}
+    for each_group in fingerprint_groups_list:
+        if each_group[0] in full_hashes_dict:
+            confirmed_groups_list = _group_paths(each_group, lambda each_path: full_hashes_dict[each_path])
+            confirmed_by = "full_hash"
+        else:
+            confirmed_groups_list = [each_group]
+            confirmed_by = "full_hash" if fingerprints_dict[each_group[0]][1] else "same_file"
+        for each_confirmed_group in confirmed_groups_list:
+            for each_path in each_confirmed_group[1:]:
+                duplicates_dict[each_path] = {"path": each_path,
+                                              "duplicate_of": each_confirmed_group[0],
+                                              "size_bytes": os.path.getsize(each_path),
+                                              "confirmed_by": confirmed_by}
+
+    return _collect_duplicates(file_paths_list, distinct_idxs_list, duplicates_dict, path_duplicates_dict)
+
+# .....................................................................................................................
+
+def duplicates_feedback(duplicates_list, max_listed = 20):
+
+    ''' Function which prints out the duplicate inputs that were dropped (if any) '''
+
+    if len(duplicates_list) == 0:
+        return
+
+    print("", "Dropped {} duplicate file(s):".format(len(duplicates_list)), sep = "\n")
+    for each_duplicate in duplicates_list[:max_listed]:
+        print("  {} (same as {})".format(os.path.basename(each_duplicate["path"]),
+                                         os.path.basename(each_duplicate["duplicate_of"])))
+    if len(duplicates_list) > max_listed:
+        print("  ... and {} more".format(len(duplicates_list) - max_listed))
+
+    return
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+    pass
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
+
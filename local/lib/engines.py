@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 13:48:35 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import os
+import json
+import time
+
+import datetime as dt
+
+from tempfile import TemporaryDirectory
+
+from local.lib.containers import get_probed_family
+from local.lib.stitching import build_stitch_command
+from local.lib.ffmpeg_helpers import captured_subprocess
+
+# Result of checking ffmpeg for 'concatf' protocol support, so the check only runs once per session
+_CONCATF_SUPPORT_CACHE = {}
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def stitch_engine_names():
+
+    ''' List of all available stitching engines (see build_stitch_command(...)) '''
+
+    return ["demuxer", "protocol"]
+
+# .....................................................................................................................
+
+def calibration_profile_path():
+
+    ''' Path to the (local) engine calibration profile. Stored alongside the history file '''
+
+    return ".engine_profile.json"
+
+# .....................................................................................................................
+
+def ffmpeg_supports_concatf():
+
+    ''' Helper used to check if ffmpeg supports the 'concatf' protocol (added in ffmpeg 5.1) '''
+
+    if "concatf" not in _CONCATF_SUPPORT_CACHE:
+        try:
+            proc_out = captured_subprocess(["ffmpeg", "-hide_banner", "-protocols"])
+            protocol_names = proc_out.stdout.decode(errors = "ignore").split()
+            _CONCATF_SUPPORT_CACHE["concatf"] = ("concatf" in protocol_names)
+        except OSError:
+            _CONCATF_SUPPORT_CACHE["concatf"] = False
+
+    return _CONCATF_SUPPORT_CACHE["concatf"]
+
+# .....................................................................................................................
+
+def _get_stream_layout(probe_result):
+
+    ''' Helper used to summarize the streams of a file, for checking if files can be joined byte-for-byte '''
+
+    return tuple((each_stream.get("codec_type"), each_stream.get("codec_name"), each_stream.get("id"))
+                 for each_stream in probe_result["streams"])
+
+# .....................................................................................................................
+
+def check_engine_validity(stitch_engine, input_file_paths_list, probe_results_list, packet_summary_dict = None):
+
+    '''
+    Function which checks whether a stitching engine can be used on the (probed) inputs.
+    If packet analysis results are given (see packet_analysis.py), they're used for more detailed checks
+
+    Outputs:
+        is_valid, reason_str
+    '''
+
+    # The concat demuxer handles everything ffmpeg can read
+    if stitch_engine == "demuxer":
+        return True, "demuxer works with any container"
+
+    if stitch_engine != "protocol":
+        return False, "unrecognized engine: {}".format(stitch_engine)
+
+    # The concat protocol joins raw bytes, so every input must be a transport stream...
+    if any(each_result is None for each_result in probe_results_list):
+        return False, "protocol needs every input to be probed, but some inputs couldn't be read"
+    input_families_set = set(get_probed_family(each_result) for each_result in probe_results_list)
+    if input_families_set != {"ts"}:
+        return False, "protocol only works on transport streams (inputs are: {})".format(
+            ", ".join(sorted(str(each_family) for each_family in input_families_set)))
+
+    # ... with the exact same streams (including stream ids), otherwise players see streams appear/disappear
+    num_layouts = len(set(_get_stream_layout(each_result) for each_result in probe_results_list))
+    if num_layouts > 1:
+        return False, "protocol needs identical streams in every input (found {} different layouts)".format(num_layouts)
+
+    # Very long lists can only be used if ffmpeg supports reading the list from a file
+    joined_paths_length = sum(len(each_path) + 1 for each_path in input_file_paths_list)
+    if joined_paths_length > 8000 and not ffmpeg_supports_concatf():
+        return False, "protocol input list is too long for the command line (ffmpeg lacks 'concatf' support)"
+
+    # Joined bytes keep their original timestamps, so they must keep running from one input to the next
+    # (the demuxer shifts the timestamps of each input to follow the previous one, so it doesn't care)
+    num_resets = packet_summary_dict.get("timestamp_resets", None) if packet_summary_dict is not None else None
+    if num_resets is not None and num_resets > 0:
+        return False, "protocol needs timestamps that continue across inputs ({} reset(s) found)".format(num_resets)
+
+    return True, "all inputs are transport streams with identical streams"
+
+# .....................................................................................................................
+
+def predict_engine_time_sec(engine_profile_dict, num_files, total_input_bytes):
+
+    ''' Helper used to predict stitching time, using the calibrated cost model of an engine '''
+
+    return (engine_profile_dict["fixed_sec"]
+            + engine_profile_dict["sec_per_file"] * num_files
+            + engine_profile_dict["sec_per_byte"] * total_input_bytes)
+
+# .....................................................................................................................
+
+def select_stitch_engine(requested_engine, input_file_paths_list, probe_results_list, total_input_bytes,
+                         calibration_profile_dict = None, packet_summary_dict = None):
+
+    '''
+    Function which picks the stitching engine to use for a job. If an engine is requested (i.e. not "auto")
+    it is used if valid. Otherwise, the fastest valid engine is chosen, using the predicted stitching time
+    from the calibration profile (if available) or a simple rule of thumb (if not).
+
+    Outputs:
+        stitch_engine, reasons_list
+
+    Where reasons_list holds human-readable explanations of the choice (for logging)
+    '''
+
+    # Figure out which engines can be used at all
+    reasons_list = []
+    valid_engines_list = []
+    for each_engine in stitch_engine_names():
+        is_valid, reason_str = check_engine_validity(each_engine, input_file_paths_list, probe_results_list,
+                                                     packet_summary_dict)
+        if is_valid:
+            valid_engines_list.append(each_engine)
+        elif requested_engine in {"auto", each_engine}:
+            reasons_list.append("Skipping {}: {}".format(each_engine, reason_str))
+
+    # Only pick the protocol automatically if packet analysis confirmed that timestamps continue across inputs,
+    # since joined bytes keep their original timestamps (a reset would leave broken timestamps in the output)
+    num_resets = packet_summary_dict.get("timestamp_resets", None) if packet_summary_dict is not None else None
+    if requested_engine == "auto" and "protocol" in valid_engines_list and num_resets != 0:
+        valid_engines_list.remove("protocol")
+        reasons_list.append("Skipping protocol: timestamps weren't checked for resets across inputs (use --analyze)")
+
+    # Use the requested engine, if possible
+    if requested_engine != "auto":
+        if requested_engine in valid_engines_list:
+            return requested_engine, reasons_list + ["Using {} (requested)".format(requested_engine)]
+        return "demuxer", reasons_list + ["Falling back to demuxer, since {} can't be used".format(requested_engine)]
+
+    # No choice to make if only one engine is valid
+    if len(valid_engines_list) == 1:
+        only_engine = valid_engines_list[0]
+        return only_engine, reasons_list + ["Using {} (only valid engine)".format(only_engine)]
+
+    # Use measured performance to choose between engines, if we have it
+    engine_profiles_dict = {} if calibration_profile_dict is None else calibration_profile_dict.get("engines", {})
+    predicted_times_dict = {}
+    failed_engines_set = set()
+    for each_engine in valid_engines_list:
+        each_profile = engine_profiles_dict.get(each_engine, None)
+        if each_profile is None:
+            continue
+        if not each_profile.get("usable", False):
+            reasons_list.append("Skipping {}: failed during calibration".format(each_engine))
+            failed_engines_set.add(each_engine)
+            continue
+        predicted_times_dict[each_engine] = predict_engine_time_sec(each_profile, len(input_file_paths_list),
+                                                                    total_input_bytes)
+
+    if len(predicted_times_dict) > 0:
+        best_engine = min(predicted_times_dict, key = predicted_times_dict.get)
+        predictions_str = ", ".join(["{} {:.2f}s".format(each_engine, each_time)
+                                     for each_engine, each_time in sorted(predicted_times_dict.items())])
+        reasons_list.append("Using {} (fastest predicted: {}, calibrated {})".format(
+            best_engine, predictions_str, calibration_profile_dict.get("created", "unknown")))
+        return best_engine, reasons_list
+
+    # Without calibration, prefer the protocol for transport streams, since it skips per-file demuxing
+    if "protocol" in valid_engines_list and "protocol" not in failed_engines_set:
+        return "protocol", reasons_list + ["Using protocol (transport stream inputs, no calibration profile)"]
+
+    return "demuxer", reasons_list + ["Using demuxer (default)"]
+
+# .....................................................................................................................
+
+def _time_engine_run(stitch_engine, input_file_paths_list, temp_folder_path, num_repeats):
+
+    ''' Helper used to time (the fastest of a few) stitching runs of a single engine. Returns None on errors '''
+
+    output_path = os.path.join(temp_folder_path, "calibration.ts")
+    best_time_sec = None
+    for _ in range(num_repeats):
+
+        run_command_list, _ = build_stitch_command(stitch_engine, input_file_paths_list, temp_folder_path,
+                                                   output_path, ["-y"],
+                                                   protocol_list_file = ffmpeg_supports_concatf())
+        t_start = time.perf_counter()
+        proc_out = captured_subprocess(run_command_list)
+        run_time_sec = time.perf_counter() - t_start
+        if os.path.exists(output_path):
+            os.remove(output_path)
+
+        if proc_out.returncode != 0:
+            return None
+        best_time_sec = run_time_sec if best_time_sec is None else min(best_time_sec, run_time_sec)
+
+    return best_time_sec
+
+# .....................................................................................................................
+
+def run_engine_calibration(num_repeats = 3):
+
+    '''
+    Function which runs a quick microbenchmark of every stitching engine, using small synthetic
+    transport stream clips (since every engine supports them). Each engine is timed on 3 clip sets,
+    in order to fit a simple cost model:
+        time = fixed_sec + (sec_per_file * number of files) + (sec_per_byte * total bytes)
+
+    Outputs:
+        calibration_profile_dict
+    '''
+
+    # Import here, since the benchmarking helpers are only needed when calibrating
+    from local.lib.benchmarking import generate_synthetic_clips, get_ffmpeg_version
+
+    # Clip sets: few short clips, many short clips and few long clips
+    clip_sets_list = [("few_short", 4, 1.0), ("many_short", 16, 1.0), ("few_long", 4, 4.0)]
+
+    engine_profiles_dict = {}
+    with TemporaryDirectory() as temp_folder_path:
+
+        # Generate clips for calibration
+        clip_paths_dict = {}
+        for each_name, each_count, each_duration_sec in clip_sets_list:
+            each_folder_path = os.path.join(temp_folder_path, each_name)
+            clip_paths_dict[each_name] = generate_synthetic_clips(each_folder_path, each_count, each_duration_sec,
+                                                                  container_ext = ".ts", include_audio = True)
+        if any(each_paths is None for each_paths in clip_paths_dict.values()):
+            raise OSError("Couldn't generate calibration clips! Is ffmpeg installed (with libx264)?")
+
+        # Time every engine on every clip set
+        for each_engine in stitch_engine_names():
+
+            times_dict = {}
+            for each_name, _, _ in clip_sets_list:
+                times_dict[each_name] = _time_engine_run(each_engine, clip_paths_dict[each_name],
+                                                         temp_folder_path, num_repeats)
+
+            # Record engines that fail, so they aren't picked later
+            if any(each_time is None for each_time in times_dict.values()):
+                engine_profiles_dict[each_engine] = {"usable": False}
+                continue
+
+            # Fit the cost model, from the differences between clip sets
+            count_a, bytes_a = 4, sum(os.path.getsize(each_path) for each_path in clip_paths_dict["few_short"])
+            count_b, bytes_b = 16, sum(os.path.getsize(each_path) for each_path in clip_paths_dict["many_short"])
+            bytes_c = sum(os.path.getsize(each_path) for each_path in clip_paths_dict["few_long"])
+            time_a, time_b, time_c = times_dict["few_short"], times_dict["many_short"], times_dict["few_long"]
+
+            sec_per_byte = max(0.0, (time_c - time_a) / max(1, bytes_c - bytes_a))
+            sec_per_file = max(0.0, (time_b - time_a - sec_per_byte * (bytes_b - bytes_a)) / (count_b - count_a))
+            fixed_sec = max(0.0, time_a - (sec_per_file * count_a) - (sec_per_byte * bytes_a))
+            engine_profiles_dict[each_engine] = {"usable": True,
+                                                 "fixed_sec": fixed_sec,
+                                                 "sec_per_file": sec_per_file,
+                                                 "sec_per_byte": sec_per_byte,
+                                                 "measured_sec": times_dict}
+
+    calibration_profile_dict = {"created": dt.datetime.now().isoformat(timespec = "seconds"),
+                                "ffmpeg_version": get_ffmpeg_version(),
+                                "concatf": ffmpeg_supports_concatf(),
+                                "engines": engine_profiles_dict}
+
+    return calibration_profile_dict
+
+# .....................................................................................................................
+
+def save_calibration_profile(calibration_profile_dict, profile_path = None):
+
+    ''' Save calibration results, so they can be used when picking engines on later runs '''
+
+    profile_path = calibration_profile_path() if profile_path is None else profile_path
+    with open(profile_path, "w") as out_file:
+        json.dump(calibration_profile_dict, out_file, indent = 2)
+
+    return profile_path
+
+# .....................................................................................................................
+
+def load_calibration_profile(profile_path = None):
+
+    ''' Load previously saved calibration results. Returns None if calibration hasn't been run (or is unreadable) '''
+
+    profile_path = calibration_profile_path() if profile_path is None else profile_path
+    if not os.path.exists(profile_path):
+        return None
+
+    try:
+        with open(profile_path, "r") as in_file:
+            calibration_profile_dict = json.load(in_file)
+    except ValueError:
+        return None
+
+    return calibration_profile_dict
+
+# .....................................................................................................................
+
+def engine_feedback(stitch_engine, reasons_list):
+
+    ''' Helper used to print out which engine was picked (and why) '''
+
+    print("", "Stitching engine: {}".format(stitch_engine), *["  {}".format(each) for each in reasons_list], sep = "\n")
+
+    return
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+
+    print(json.dumps(run_engine_calibration(num_repeats = 1), indent = 2))
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 09:20:37 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import os
+import time
+import subprocess
+
+from shutil import which
+from collections import Counter
+
+from local.lib.timing import get_active_timer
+
+# Results of searching for programs, so each program is only searched for once per session
+_FOUND_PROGRAMS_CACHE = {}
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def captured_subprocess(run_command_list):
+    
+    ''' Use subprocess with captured stdout and stderr. Timing is recorded if a run timer is active '''
+    
+    # Skip timing entirely if nothing is recording it
+    run_timer = get_active_timer()
+    if run_timer is None:
+        return subprocess.run(run_command_list, stderr = subprocess.PIPE, stdout = subprocess.PIPE)
+    
+    t_start = time.perf_counter()
+    subproc_return = subprocess.run(run_command_list, stderr = subprocess.PIPE, stdout = subprocess.PIPE)
+    program_name = os.path.basename(run_command_list[0])
+    run_timer.add_subprocess_time(program_name, time.perf_counter() - t_start, subproc_return.returncode)
+    
+    return subproc_return
+
+# .....................................................................................................................
+
+def supervised_subprocess(run_command_list, timeout_sec = None, stall_timeout_sec = None, partial_output_path = None,
+                          progress_callback = None, control_callback = None):
+    
+    '''
+    Function used to run a single (ffmpeg) command with a time limit & stall detection, see Process_Supervisor.
+    Works like captured_subprocess(...), but the result also has a 'status' (e.g. "ok", "timeout" or "stalled").
+    Progress reporting is added to ffmpeg commands automatically, for stall detection.
+    If given, the partial output path is deleted if the command doesn't finish successfully and the
+    progress callback is called with every (parsed) ffmpeg progress report, as a dictionary.
+    A list of progress callbacks can also be given, in which case each is called (in order) with every report.
+    The control callback, if given, is called (before running) with functions for pausing & resuming the process
+    '''
+    
+    # Import here, since asyncio noticeably adds to start-up time
+    from local.lib.supervisor import Process_Supervisor, add_progress_args
+    
+    # Allow for multiple progress callbacks (e.g. for staging inputs & syncing the output at the same time)
+    progress_func = None
+    if progress_callback:
+        callbacks_list = progress_callback if isinstance(progress_callback, (list, tuple)) else [progress_callback]
+        callbacks_list = [each_callback for each_callback in callbacks_list if each_callback is not None]
+        def progress_func(job_index, report_dict):
+            for each_callback in callbacks_list:
+                each_callback(report_dict)
+    
+    supervisor = Process_Supervisor(1, timeout_sec, stall_timeout_sec, progress_callback = progress_func)
+    if control_callback is not None:
+        control_callback(lambda: supervisor.pause_job(0), lambda: supervisor.resume_job(0))
+    supervised_result, = supervisor.run_all([add_progress_args(run_command_list)], [partial_output_path])
+    
+    return supervised_result
+
+# .....................................................................................................................
+
+def find_program(program_name):
+    
+    '''
+    Function which returns the full path to a program (e.g. ffmpeg), or None if it can't be found.
+    Searching is done in-process (rather than calling 'which' or 'where') and results are cached,
+    so repeated checks are free
+    '''
+    
+    if program_name not in _FOUND_PROGRAMS_CACHE:
+        _FOUND_PROGRAMS_CACHE[program_name] = which(program_name)
+    
+    return _FOUND_PROGRAMS_CACHE[program_name]
+
+# .....................................................................................................................
+
+def check_req_installs(check_ranger = True):
+    
+    if find_program("ffmpeg") is None:
+        print("",
+              "WARNING: Couldn't find ffmpeg! This script may fail...",
+              "On Ubuntu, install with:",
+              "",
+              "  sudo apt install ffmpeg",
+              "",
+              sep = "\n")
+    
+    # Only check for ranger when the calling script actually uses it for file selection
+    if not check_ranger:
+        return
+    
+    if find_program("ranger") is None:
+        print("",
+              "WARNING: Couldn't find ranger! This script may fail...",
+              "On Ubuntu, install with:",
+              "",
+              "  sudo apt install ranger",
+              "",
+              sep = "\n")
+    
+    return
+
+# .....................................................................................................................
+
+def get_save_extension(input_file_paths_list):
+    
+    # First split ext off every file
+    file_exts_only = [os.path.splitext(each_path)[1].lower() for each_path in input_file_paths_list]
+    
+    # Count occurances of extensions (in case there is more than one) and pick the most common
+    ext_counter = Counter(file_exts_only)
+    ordered_exts_list = ext_counter.most_common()
+    save_ext, num_occurances = ordered_exts_list[0]
+    
+    # Provide feedback if we got multiple extension types
+    num_exts = len(ordered_exts_list)
+    if num_exts > 1:
+        print("", 
+              "Got more than 1 file extension type!",
+              "Will use: {}".format(save_ext),
+              "However, different extensions may cause errors while stitching...",
+              sep = "\n")
+    
+    return save_ext
+
+# .....................................................................................................................
+
+def process_feedback(subproc_return, output_save_path, human_readable_command_str):
+    
+    # Figure out what kind of feedback to give
+    return_code = subproc_return.returncode
+    no_errors = (return_code == 0)
+    if no_errors:
+        print("",
+              "*** Done! No errors ***", 
+              "",
+              "Saved result:",
+              "@ {}".format(output_save_path),
+              "", 
+              sep="\n")
+    else:
+        # Check for a full disk, since this leaves behind a truncated (but otherwise normal looking) file
+        stderr_str = subproc_return.stderr.decode(errors = "ignore") if subproc_return.stderr else ""
+        disk_full = ("No space left on device" in stderr_str)
+        disk_full_msg = ["Output disk is full! Saved file (if any) is incomplete", ""] if disk_full else []
+        
+        # Explain why the process was stopped, if it was run by the supervisor
+        stop_reason_lut = {"timeout": "Stopped for running too long!",
+                           "stalled": "Stopped for not making progress (hung input/output?)",
+                           "cancelled": "Cancelled!"}
+        stop_status = getattr(subproc_return, "status", None)
+        stop_reason_msg = [stop_reason_lut[stop_status], ""] if stop_status in stop_reason_lut else []
+        
+        save_exists = os.path.exists(output_save_path)
+        print("", 
+              "!" * 48,
+              "",
+              "Possible error! Got return code: {}".format(return_code),
+              "File {} saved...".format("was" if save_exists else "was not"),
+              "",
+              *disk_full_msg,
+              *stop_reason_msg,
+              "Using command:",
+              "  {}".format(human_readable_command_str),
+              "",
+              "!" * 48,
+              sep="\n")
+    
+    return
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+    pass
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
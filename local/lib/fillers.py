@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Thu Oct 29 11:20:43 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import os
+import json
+import hashlib
+
+from fractions import Fraction
+
+from local.lib.ffmpeg_helpers import captured_subprocess
+from local.lib.probing import get_streams_by_type
+from local.lib.containers import get_majority_codecs, normalize_extension
+from local.lib.atomic_output import build_partial_path, discard_partial_output, commit_partial_output
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def filler_cache_folder():
+
+    '''
+    Path to the (local) folder of cached filler clips (and copies of clips with added audio).
+    Stored alongside the history file
+    '''
+
+    return ".filler_cache"
+
+# .....................................................................................................................
+
+def _video_encoders_lut():
+
+    ''' Encoders used to create filler video, by (probed) codec name. Other codecs aren't supported '''
+
+    return {"h264": "libx264", "hevc": "libx265"}
+
+# .....................................................................................................................
+
+def _audio_encoders_lut():
+
+    ''' Encoders used to create silent audio, by (probed) codec name. Other codecs aren't supported '''
+
+    return {"aac": "aac", "mp3": "libmp3lame", "opus": "libopus", "ac3": "ac3",
+            "pcm_s16le": "pcm_s16le", "pcm_mulaw": "pcm_mulaw", "pcm_alaw": "pcm_alaw"}
+
+# .....................................................................................................................
+
+def get_stream_profile(probe_results_list):
+
+    '''
+    Function which describes the (majority) video & audio streams of the inputs, with enough detail
+    to encode new clips that can be stream-copied alongside them. Each profile is taken from the
+    first input that uses the most common codec of each type
+
+    Outputs:
+        stream_profile_dict
+
+    Where stream_profile_dict has the form:
+        {"ext": ".mp4", "video": {...} or None, "audio": {...} or None}
+    '''
+
+    video_codec, audio_codec, _ = get_majority_codecs(probe_results_list)
+
+    stream_profile_dict = {"ext": None, "video": None, "audio": None}
+    for each_result in probe_results_list:
+        video_streams_list = get_streams_by_type(each_result, "video")
+        if stream_profile_dict["video"] is None and video_streams_list:
+            each_stream = video_streams_list[0]
+            if each_stream.get("codec_name") == video_codec:
+                stream_profile_dict["ext"] = normalize_extension(os.path.splitext(each_result["path"])[1])
+                stream_profile_dict["video"] = {"codec_name": each_stream.get("codec_name"),
+                                                "profile": each_stream.get("profile"),
+                                                "level": each_stream.get("level"),
+                                                "width": each_stream.get("width"),
+                                                "height": each_stream.get("height"),
+                                                "pix_fmt": each_stream.get("pix_fmt"),
+                                                "frame_rate": each_stream.get("r_frame_rate"),
+                                                "time_base": each_stream.get("time_base")}
+
+        audio_streams_list = get_streams_by_type(each_result, "audio")
+        if stream_profile_dict["audio"] is None and audio_streams_list:
+            each_stream = audio_streams_list[0]
+            if each_stream.get("codec_name") == audio_codec:
+                stream_profile_dict["audio"] = {"codec_name": each_stream.get("codec_name"),
+                                                "profile": each_stream.get("profile"),
+                                                "sample_rate": each_stream.get("sample_rate"),
+                                                "channels": each_stream.get("channels"),
+                                                "channel_layout": each_stream.get("channel_layout"),
+                                                "time_base": each_stream.get("time_base")}
+
+    return stream_profile_dict
+
+# .....................................................................................................................
+
+def build_profile_key(stream_profile_dict):
+
+    ''' Helper used to build a short key which uniquely identifies a stream profile (e.g. for naming cache files) '''
+
+    profile_json = json.dumps(stream_profile_dict, sort_keys = True)
+
+    return hashlib.sha1(profile_json.encode()).hexdigest()[:16]
+
+# .....................................................................................................................
+
+def build_video_encoder_args(video_profile_dict, output_ext):
+
+    '''
+    Function which builds the ffmpeg arguments for encoding video that matches a video profile
+    (see get_stream_profile(...)). B-frames are disabled so that clips can be cut at any frame.
+    Returns None if the codec isn't supported
+    '''
+
+    encoder_name = _video_encoders_lut().get(video_profile_dict["codec_name"], None)
+    if encoder_name is None:
+        return None
+
+    try:
+        frame_rate = float(Fraction(video_profile_dict["frame_rate"]))
+    except (TypeError, ValueError, ZeroDivisionError):
+        frame_rate = 30.0
+    keyframe_interval = max(1, int(round(2 * frame_rate)))
+    encoder_args_list = ["-c:v", encoder_name,
+                         "-preset", "veryfast",
+                         "-g", str(keyframe_interval),
+                         "-bf", "0"]
+    if video_profile_dict["pix_fmt"]:
+        encoder_args_list += ["-pix_fmt", video_profile_dict["pix_fmt"]]
+
+    # Match the codec profile & level, so players don't need to re-initialize their decoder at every filler
+    profile_str = str(video_profile_dict["profile"] or "").lower()
+    if encoder_name == "libx264" and profile_str:
+        x264_profiles_lut = {"constrained baseline": "baseline", "high 10": "high10", "high 10 intra": "high10",
+                             "high 4:2:2": "high422", "high 4:2:2 intra": "high422",
+                             "high 4:4:4 predictive": "high444", "high 4:4:4 intra": "high444"}
+        encoder_args_list += ["-profile:v", x264_profiles_lut.get(profile_str, profile_str)]
+        if isinstance(video_profile_dict["level"], int) and video_profile_dict["level"] > 0:
+            encoder_args_list += ["-level:v", "{:.1f}".format(video_profile_dict["level"] / 10)]
+    elif encoder_name == "libx265" and profile_str:
+        encoder_args_list += ["-profile:v", profile_str.replace(" ", "")]
+
+    # Keep the same timestamp resolution as the inputs (mp4/mov only, other containers use a fixed time base)
+    if output_ext in {".mp4", ".mov", ".m4v"} and video_profile_dict["time_base"]:
+        _, _, timescale_str = str(video_profile_dict["time_base"]).partition("/")
+        if timescale_str.isdigit():
+            encoder_args_list += ["-video_track_timescale", timescale_str]
+
+    return encoder_args_list
+
+# .....................................................................................................................
+
+def build_audio_encoder_args(audio_profile_dict):
+
+    ''' Function which builds the ffmpeg arguments for encoding audio that matches an audio profile (or None) '''
+
+    encoder_name = _audio_encoders_lut().get(audio_profile_dict["codec_name"], None)
+    if encoder_name is None:
+        return None
+
+    encoder_args_list = ["-c:a", encoder_name]
+    if audio_profile_dict["sample_rate"]:
+        encoder_args_list += ["-ar", str(audio_profile_dict["sample_rate"])]
+    if audio_profile_dict["channels"]:
+        encoder_args_list += ["-ac", str(audio_profile_dict["channels"])]
+    if encoder_name == "aac" and str(audio_profile_dict["profile"]).upper() == "HE-AAC":
+        encoder_args_list += ["-profile:a", "aac_he"]
+
+    return encoder_args_list
+
+# .....................................................................................................................
+
+def build_silence_source_args(audio_profile_dict):
+
+    ''' Helper used to build the (lavfi) input arguments for generating silence matching an audio profile '''
+
+    silence_options_list = ["r={}".format(audio_profile_dict["sample_rate"] or 48000)]
+    if audio_profile_dict["channel_layout"]:
+        silence_options_list.append("cl={}".format(audio_profile_dict["channel_layout"]))
+
+    return ["-f", "lavfi", "-i", "anullsrc={}".format(":".join(silence_options_list))]
+
+# .....................................................................................................................
+
+def build_filler_command(stream_profile_dict, output_path, duration_sec):
+
+    '''
+    Function which builds an ffmpeg command for encoding a filler clip (black video & silent audio)
+    matching a stream profile (see get_stream_profile(...)). Returns None if the profile isn't supported
+
+    Outputs:
+        run_command_list (or None)
+    '''
+
+    video_profile_dict = stream_profile_dict["video"]
+    audio_profile_dict = stream_profile_dict["audio"]
+    if video_profile_dict is None or not video_profile_dict["width"] or not video_profile_dict["height"]:
+        return None
+
+    video_args_list = build_video_encoder_args(video_profile_dict, stream_profile_dict["ext"])
+    audio_args_list = build_audio_encoder_args(audio_profile_dict) if audio_profile_dict is not None else []
+    if video_args_list is None or audio_args_list is None:
+        return None
+
+    black_source_str = "color=c=black:s={}x{}:r={}".format(video_profile_dict["width"], video_profile_dict["height"],
+                                                           video_profile_dict["frame_rate"] or 30)
+    input_args_list = ["-f", "lavfi", "-i", black_source_str]
+    map_args_list = ["-map", "0:v"]
+    if audio_profile_dict is not None:
+        input_args_list += build_silence_source_args(audio_profile_dict)
+        map_args_list += ["-map", "1:a"]
+
+    run_command_list = ["ffmpeg", "-nostdin", "-y", "-v", "error",
+                        *input_args_list,
+                        *map_args_list,
+                        *video_args_list,
+                        *audio_args_list,
+                        "-t", "{:.3f}".format(duration_sec),
+                        output_path]
+
+    return run_command_list
+
+# .....................................................................................................................
+
+def get_filler_clip(stream_profile_dict, duration_sec = 10.0, cache_folder_path = None):
+
+    '''
+    Function which gets a filler clip (black video & silent audio) matching the given stream profile.
+    Fillers are encoded once & cached by profile, so later runs (and every gap within a run) re-use
+    the same file and stitching itself stays a pure stream copy.
+    Returns None if a filler can't be made for the profile (e.g. unsupported codecs)
+
+    Outputs:
+        filler_path (or None)
+    '''
+
+    cache_folder_path = filler_cache_folder() if cache_folder_path is None else cache_folder_path
+    if stream_profile_dict["ext"] is None:
+        return None
+
+    # Fillers are named by profile & duration, so any change in either leads to a new filler
+    profile_key = build_profile_key({"profile": stream_profile_dict, "duration": duration_sec})
+    filler_name = "filler_{}{}".format(profile_key, stream_profile_dict["ext"])
+    filler_path = os.path.abspath(os.path.join(cache_folder_path, filler_name))
+    if os.path.exists(filler_path):
+        return filler_path
+
+    run_command_list = build_filler_command(stream_profile_dict, build_partial_path(filler_path), duration_sec)
+    if run_command_list is None:
+        return None
+
+    # Encode into a partial file first, so an interrupted encode is never mistaken for a cached filler
+    os.makedirs(cache_folder_path, exist_ok = True)
+    partial_path = build_partial_path(filler_path)
+    proc_out = captured_subprocess(run_command_list)
+    if proc_out.returncode != 0:
+        discard_partial_output(partial_path)
+        return None
+    commit_partial_output(partial_path, filler_path)
+
+    return filler_path
+
+# .....................................................................................................................
+
+def insert_gap_fillers(stitch_paths_list, inpoints_list, gaps_list, filler_path, filler_duration_sec):
+
+    '''
+    Function which inserts filler clips into a list of clips to stitch, so that each gap is filled.
+    Fillers are repeated to cover long gaps, with the last one cut short (using an 'outpoint' for the
+    concat demuxer) to match the length of the gap
+
+    Outputs:
+        stitch_paths_list, inpoints_list, outpoints_list, filler_entries_list
+
+    Where filler_entries_list holds the (path, used_sec) of every inserted filler
+    '''
+
+    inpoints_list = inpoints_list if inpoints_list is not None else [None] * len(stitch_paths_list)
+
+    new_paths_list, new_inpoints_list, new_outpoints_list, filler_entries_list = [], [], [], []
+    for each_path, each_inpoint, each_gap_sec in zip(stitch_paths_list, inpoints_list, gaps_list):
+
+        # Add enough whole fillers to cover the gap, followed by a partial filler for the remainder
+        num_whole_fillers = int(each_gap_sec // filler_duration_sec)
+        remainder_sec = each_gap_sec - num_whole_fillers * filler_duration_sec
+        fill_secs_list = [filler_duration_sec] * num_whole_fillers + ([remainder_sec] if remainder_sec > 0.05 else [])
+        for each_fill_sec in fill_secs_list:
+            is_partial = (each_fill_sec < filler_duration_sec)
+            new_paths_list.append(filler_path)
+            new_inpoints_list.append(None)
+            new_outpoints_list.append(each_fill_sec if is_partial else None)
+            filler_entries_list.append((filler_path, each_fill_sec))
+
+        new_paths_list.append(each_path)
+        new_inpoints_list.append(each_inpoint)
+        new_outpoints_list.append(None)
+
+    return new_paths_list, new_inpoints_list, new_outpoints_list, filler_entries_list
+
+# .....................................................................................................................
+
+def find_clips_missing_audio(probe_results_list):
+
+    '''
+    Function which finds clips that have video but no audio, when most of the other clips do have audio.
+    Mixing these clips in breaks the audio of concat demuxer outputs (or drops it entirely)
+
+    Outputs:
+        missing_indices_list
+    '''
+
+    _, audio_codec, _ = get_majority_codecs(probe_results_list)
+    if audio_codec is None:
+        return []
+
+    missing_indices_list = []
+    for each_idx, each_result in enumerate(probe_results_list):
+        has_video = len(get_streams_by_type(each_result, "video")) > 0
+        has_audio = len(get_streams_by_type(each_result, "audio")) > 0
+        if has_video and not has_audio:
+            missing_indices_list.append(each_idx)
+
+    return missing_indices_list
+
+# .....................................................................................................................
+
+def build_silent_audio_command(input_path, output_path, audio_profile_dict):
+
+    '''
+    Function which builds an ffmpeg command for remuxing a clip with an added silent audio track.
+    All existing streams are copied as-is, with the audio added after them. Metadata is copied explicitly,
+    since ffmpeg otherwise drops the creation time (needed for finding gaps/overlaps).
+    Returns None if the audio profile isn't supported
+    '''
+
+    audio_args_list = build_audio_encoder_args(audio_profile_dict)
+    if audio_args_list is None:
+        return None
+
+    run_command_list = ["ffmpeg", "-nostdin", "-y", "-v", "error",
+                        "-i", input_path,
+                        *build_silence_source_args(audio_profile_dict),
+                        "-map", "0",
+                        "-map", "1:a",
+                        "-map_metadata", "0",
+                        "-c", "copy",
+                        *audio_args_list,
+                        "-shortest",
+                        output_path]
+
+    return run_command_list
+
+# .....................................................................................................................
+
+def get_silent_audio_clip(input_path, audio_profile_dict, cache_folder_path = None):
+
+    '''
+    Function which gets a copy of a clip with a silent audio track added (see build_silent_audio_command(...)).
+    Copies are cached by input file (path, size & modification time) & audio profile, so re-running
+    a stitch doesn't remux the same clips again. Returns None if the clip can't be remuxed
+
+    Outputs:
+        remuxed_path (or None)
+    '''
+
+    cache_folder_path = filler_cache_folder() if cache_folder_path is None else cache_folder_path
+
+    try:
+        input_stat = os.stat(input_path)
+    except OSError:
+        return None
+
+    # Name copies by input file & audio profile, so changes to either leads to a new copy
+    input_ext = normalize_extension(os.path.splitext(input_path)[1])
+    clip_key = build_profile_key({"path": os.path.abspath(input_path),
+                                  "size": input_stat.st_size,
+                                  "mtime_ns": input_stat.st_mtime_ns,
+                                  "audio": audio_profile_dict})
+    remuxed_path = os.path.abspath(os.path.join(cache_folder_path, "audio_{}{}".format(clip_key, input_ext)))
+    if os.path.exists(remuxed_path):
+        return remuxed_path
+
+    partial_path = build_partial_path(remuxed_path)
+    run_command_list = build_silent_audio_command(input_path, partial_path, audio_profile_dict)
+    if run_command_list is None:
+        return None
+
+    # Remux into a partial file first, so an interrupted remux is never mistaken for a cached copy
+    os.makedirs(cache_folder_path, exist_ok = True)
+    proc_out = captured_subprocess(run_command_list)
+    if proc_out.returncode != 0:
+        discard_partial_output(partial_path)
+        return None
+    commit_partial_output(partial_path, remuxed_path)
+
+    return remuxed_path
+
+# .....................................................................................................................
+
+def add_missing_audio(probe_results_list, max_workers = 4):
+
+    '''
+    Function which gives every clip that's missing audio a silent audio track, in the majority
+    audio format of the other clips. Only the clips that need it are remuxed (in parallel) & the
+    video is always stream copied. See find_clips_missing_audio(...) & get_silent_audio_clip(...)
+
+    Outputs:
+        remuxed_list
+
+    Where remuxed_list has the form:
+        [{"index": ..., "path": ..., "remuxed_path": ... (or None if remuxing failed)}, ...]
+    '''
+
+    missing_indices_list = find_clips_missing_audio(probe_results_list)
+    if len(missing_indices_list) == 0:
+        return []
+
+    audio_profile_dict = get_stream_profile(probe_results_list)["audio"]
+    missing_paths_list = [probe_results_list[each_idx]["path"] for each_idx in missing_indices_list]
+
+    # Thread pool import is deferred, since it noticeably adds to start-up time
+    from concurrent.futures import ThreadPoolExecutor
+
+    remux_func = lambda each_path: get_silent_audio_clip(each_path, audio_profile_dict)
+    num_workers = max(1, min(max_workers, len(missing_paths_list)))
+    with ThreadPoolExecutor(max_workers = num_workers) as executor:
+        remuxed_paths_list = list(executor.map(remux_func, missing_paths_list))
+
+    return [{"index": each_idx, "path": each_path, "remuxed_path": each_remuxed_path}
+            for each_idx, each_path, each_remuxed_path in zip(missing_indices_list, missing_paths_list,
+                                                              remuxed_paths_list)]
+
+# .....................................................................................................................
+
+def missing_audio_feedback(remuxed_list):
+
+    ''' Function which prints out which clips were given silent audio (if any) '''
+
+    if len(remuxed_list) == 0:
+        return
+
+    num_failed = sum(1 for each_entry in remuxed_list if each_entry["remuxed_path"] is None)
+    print("", "Added silent audio to {} file(s) without audio:".format(len(remuxed_list) - num_failed), sep = "\n")
+    for each_entry in remuxed_list:
+        each_name = os.path.basename(each_entry["path"])
+        print("  {}{}".format(each_name, "" if each_entry["remuxed_path"] is not None else " (failed!)"))
+    if num_failed > 0:
+        print("", "WARNING: Couldn't add audio to {} file(s) (unsupported audio codec?)".format(num_failed),
+              "Output audio may be broken...", sep = "\n")
+
+    return
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+    pass
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
+
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 09:12:04 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import os
+import json
+
+import datetime as dt
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def history_date_format():
+    return "%Y/%m/%d"
+
+# .....................................................................................................................
+
+def history_save_data(search_directory, date_dt):
+    
+    # Some useful variables
+    history_file = ".history.json"    
+    
+    # Create a new history data
+    date_str = date_dt.strftime(history_date_format())
+    save_data = {"search_directory": search_directory, "last_used_date": date_str}
+    
+    return history_file, save_data
+
+# .....................................................................................................................
+
+def load_default_search_directory():
+    
+    # Get current date, since we'll use this to determine if the history is 'fresh' enough to use
+    date_now_dt = dt.datetime.now()
+    default_directory = "~/Desktop"
+    
+    # Save a new history file if one doesn't already exist
+    history_file, default_history = history_save_data(default_directory, date_now_dt)
+    if not os.path.exists(history_file):
+        with open(history_file, "w") as out_file:
+            json.dump(default_history, out_file, indent = 2)
+    
+    # Load history file and compare with current date to decide if we should use it
+    with open(history_file, "r") as in_file:
+        history_dict = json.load(in_file)
+    
+    # Pull out history data
+    history_directory = history_dict.get("search_directory")
+    history_date = history_dict.get("last_used_date")    
+    
+    # Check if the history data is fresh enough to use
+    history_dt = dt.datetime.strptime(history_date, history_date_format())
+    history_age_delta = (date_now_dt - history_dt)
+    fresh_enough = (history_age_delta < dt.timedelta(days = 1))
+    
+    search_directory = history_directory if fresh_enough else default_directory
+    
+    return search_directory
+
+# .....................................................................................................................
+
+def save_search_directory(example_file_path):
+    
+    # Get data to save into history file
+    date_now_dt = dt.datetime.now()
+    parent_folder_path = os.path.dirname(example_file_path)
+    
+    # Remove user pathing for cleanliness
+    user_path = os.path.expanduser("~")
+    save_file_directory = parent_folder_path.replace(user_path, "~")
+    
+    # Construct saving dictionary and save the file!
+    history_file, save_data = history_save_data(save_file_directory, date_now_dt)
+    with open(history_file, "w") as out_file:
+        json.dump(save_data, out_file, indent = 2)
+    
+    return parent_folder_path
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+    pass
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
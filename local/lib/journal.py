@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 14:31:50 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import os
+import json
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define classes
+
+
+class Job_Journal:
+
+    '''
+    Class used to keep track of completed units of work (e.g. each file of a batch job), so that
+    a job which is killed part way through can be re-run and pick up where it left off.
+
+    The journal is stored as a json-lines file, with one line per completed unit. Lines are appended
+    (and flushed to disk) as each unit completes, so that a crash can't lose previously recorded progress.
+    The first line stores a 'signature' of the job settings. If a job is re-run with different settings,
+    the old journal is ignored and the job starts from scratch.
+
+    Example usage:
+        journal = Job_Journal("/path/to/.job.journal", {"duration": 600})
+        for each_path in file_paths:
+            if journal.is_done(each_path):
+                continue
+            ...
+            journal.mark_done(each_path, {"outputs": 5})
+        journal.finish()
+    '''
+
+    # .................................................................................................................
+
+    def __init__(self, journal_path, job_signature_dict):
+
+        # Store inputs
+        self.journal_path = journal_path
+        self.job_signature = json.loads(json.dumps(job_signature_dict, sort_keys = True))
+
+        # Load any previous progress, if the job settings haven't changed
+        self._done_units_dict = self._load_existing()
+        if not self._done_units_dict:
+            self._write_header()
+
+    # .................................................................................................................
+
+    def __len__(self):
+        return len(self._done_units_dict)
+
+    # .................................................................................................................
+
+    def _load_existing(self):
+
+        # Nothing to load if there is no journal yet
+        if not os.path.exists(self.journal_path):
+            return {}
+
+        done_units_dict = {}
+        with open(self.journal_path, "r") as in_file:
+
+            # First line should be the job signature, if it doesn't match, ignore the old journal
+            try:
+                header_dict = json.loads(in_file.readline())
+            except ValueError:
+                return {}
+            if header_dict.get("signature") != self.job_signature:
+                return {}
+
+            # Read every completed unit (the last line may be incomplete, if a crash happened while writing)
+            for each_line in in_file:
+                try:
+                    each_entry = json.loads(each_line)
+                    done_units_dict[each_entry["unit"]] = each_entry.get("info", {})
+                except (ValueError, KeyError):
+                    break
+
+        return done_units_dict
+
+    # .................................................................................................................
+
+    def _write_header(self):
+
+        # Start a fresh journal, containing only the job signature
+        with open(self.journal_path, "w") as out_file:
+            out_file.write(json.dumps({"signature": self.job_signature}) + "\n")
+            out_file.flush()
+            os.fsync(out_file.fileno())
+
+        return
+
+    # .................................................................................................................
+
+    def is_done(self, unit_key):
+        return (unit_key in self._done_units_dict)
+
+    # .................................................................................................................
+
+    def get_info(self, unit_key):
+        return self._done_units_dict.get(unit_key, None)
+
+    # .................................................................................................................
+
+    def mark_done(self, unit_key, info_dict = None):
+
+        ''' Record a unit of work as complete. The record is flushed to disk before returning '''
+
+        info_dict = info_dict if info_dict is not None else {}
+        with open(self.journal_path, "a") as out_file:
+            out_file.write(json.dumps({"unit": unit_key, "info": info_dict}) + "\n")
+            out_file.flush()
+            os.fsync(out_file.fileno())
+
+        self._done_units_dict[unit_key] = info_dict
+
+        return
+
+    # .................................................................................................................
+
+    def finish(self):
+
+        ''' Remove the journal, once the whole job is complete '''
+
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+        return
+
+    # .................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def build_journal_path(save_folder_path, job_name):
+
+    ''' Helper used to build the (hidden) journal file path for a job, stored alongside the job outputs '''
+
+    return os.path.join(save_folder_path, ".{}.journal".format(job_name))
+
+# .....................................................................................................................
+
+def build_file_unit_key(file_path):
+
+    '''
+    Helper used to build a journal unit key representing an input file. Includes the file size and
+    modification time, so that files which have changed since a previous run are processed again
+    '''
+
+    file_stat = os.stat(file_path)
+    return "{}|{}|{}".format(os.path.abspath(file_path), file_stat.st_size, int(file_stat.st_mtime))
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+    pass
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 28 09:52:17 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import os
+
+from io import BytesIO
+
+from local.lib.ffmpeg_helpers import captured_subprocess
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def analyze_mode_names():
+
+    '''
+    List of supported packet analysis modes:
+        "off" -> No analysis
+        "on" -> Analyze the packets of every input before stitching, using the results to plan the stitch
+        "only" -> Analyze the packets of every input, print (and optionally save) the results and quit
+    '''
+
+    return ["off", "on", "only"]
+
+# .....................................................................................................................
+
+def numpy_available():
+
+    ''' Helper used to check if the (optional) numpy package is installed '''
+
+    try:
+        import numpy
+    except ImportError:
+        return False
+
+    return True
+
+# .....................................................................................................................
+
+def probe_packet_table(video_path):
+
+    '''
+    Function which asks ffprobe for the timing of every packet of a file, as compact csv data
+    (one line per packet: stream_index,pts,dts,duration,flags). Returns None if probing fails
+    '''
+
+    run_command_list = ["ffprobe",
+                        "-v", "error",
+                        "-show_entries", "packet=stream_index,pts,dts,duration,flags",
+                        "-of", "csv=p=0",
+                        video_path]
+    proc_out = captured_subprocess(run_command_list)
+    if proc_out.returncode != 0:
+        return None
+
+    return proc_out.stdout
+
+# .....................................................................................................................
+
+def load_packet_arrays(packet_table_bytes):
+
+    '''
+    Function which loads the packet table from ffprobe (see probe_packet_table(...)) into numpy arrays.
+    Timestamps are left in (stream) time base units, with missing values stored as NaN
+
+    Outputs:
+        packet_arrays_dict (or None if there are no packets)
+
+    Where packet_arrays_dict has the form:
+        {"stream_index": int array, "pts": float array, "dts": float array,
+         "duration": float array, "is_keyframe": bool array}
+    '''
+
+    # Numpy import is deferred, since it's an optional dependency
+    import numpy as np
+
+    packet_table_bytes = packet_table_bytes.strip().replace(b"N/A", b"nan")
+    if packet_table_bytes == b"":
+        return None
+
+    # Parse the numeric columns
+    table_array = np.loadtxt(BytesIO(packet_table_bytes), delimiter = ",", dtype = np.float64, usecols = range(4),
+                             ndmin = 2)
+
+    # The flags column isn't numeric, so check for keyframes directly on the raw bytes. The keyframe flag ('K')
+    # follows the 4th comma of each line. Blank lines (printed after packets with side data) are skipped
+    raw_array = np.frombuffer(packet_table_bytes, dtype = np.uint8)
+    line_starts_array = np.append(0, np.flatnonzero(raw_array == ord("\n")) + 1)
+    line_starts_array = line_starts_array[line_starts_array < raw_array.size]
+    line_starts_array = line_starts_array[~np.isin(raw_array[line_starts_array], (ord("\n"), ord("\r")))]
+    commas_array = np.append(np.flatnonzero(raw_array == ord(",")), [raw_array.size - 1] * 4)
+    flags_starts_array = np.minimum(commas_array[np.searchsorted(commas_array, line_starts_array) + 3] + 1,
+                                    raw_array.size - 1)
+    is_keyframe_array = (raw_array[flags_starts_array] == ord("K"))
+
+    return {"stream_index": table_array[:, 0].astype(np.int64),
+            "pts": table_array[:, 1],
+            "dts": table_array[:, 2],
+            "duration": table_array[:, 3],
+            "is_keyframe": is_keyframe_array}
+
+# .....................................................................................................................
+
+def _parse_time_base(time_base_str):
+
+    ''' Helper used to convert time bases reported by ffprobe (e.g. "1/90000") into seconds per tick '''
+
+    try:
+        numerator_str, denominator_str = time_base_str.split("/")
+        return int(numerator_str) / int(denominator_str)
+    except (AttributeError, ValueError, ZeroDivisionError):
+        return None
+
+# .....................................................................................................................
+
+def _count_true_runs(bool_array):
+
+    ''' Helper used to count the number of separate runs of True values in an array (e.g. [0,1,1,0,1] -> 2) '''
+
+    import numpy as np
+
+    if bool_array.size == 0:
+        return 0
+
+    return int(bool_array[0]) + int(np.count_nonzero(bool_array[1:] & ~bool_array[:-1]))
+
+# .....................................................................................................................
+
+def _nan_stat(stat_func, values_array):
+
+    ''' Helper used to apply a (nan-ignoring) statistic to an array, giving None if there are no valid values '''
+
+    import numpy as np
+
+    if not np.isfinite(values_array).any():
+        return None
+
+    return round(float(stat_func(values_array)), 4)
+
+# .....................................................................................................................
+
+def analyze_stream_timing(pts_sec_array, dts_sec_array, duration_sec_array, gap_threshold_sec = 0.5):
+
+    '''
+    Function which checks the timing of the packets of a single stream (in decoding order), using seconds.
+    A 'gap' is a jump forward in time, beyond the end of the previous packet, of more than the given threshold.
+    Packets without a duration are assumed to have the typical (median) duration of the stream
+
+    Outputs:
+        stream_timing_dict
+    '''
+
+    import numpy as np
+
+    # Use presentation timestamps where decoding timestamps are missing (e.g. on some audio packets)
+    dts_sec_array = np.where(np.isnan(dts_sec_array), pts_sec_array, dts_sec_array)
+    valid_durations_array = duration_sec_array[np.isfinite(duration_sec_array)]
+    typical_duration_sec = float(np.median(valid_durations_array)) if valid_durations_array.size > 0 else 0.0
+    duration_sec_array = np.where(np.isfinite(duration_sec_array), duration_sec_array, typical_duration_sec)
+
+    # Decoding timestamps must always increase, anything else confuses players & muxers
+    dts_steps_array = np.diff(dts_sec_array)
+    is_non_monotonic_array = (dts_steps_array <= 0)
+
+    # Gaps are measured from the end of each packet to the start of the next
+    gaps_sec_array = dts_steps_array - duration_sec_array[:-1]
+    is_gap_array = (gaps_sec_array > gap_threshold_sec)
+    gap_sizes_array = gaps_sec_array[is_gap_array]
+
+    # Time covered by the stream (in presentation order)
+    end_secs_array = pts_sec_array + duration_sec_array
+    has_times = np.isfinite(pts_sec_array).any()
+
+    return {"num_packets": int(pts_sec_array.size),
+            "start_sec": float(np.nanmin(pts_sec_array)) if has_times else None,
+            "end_sec": float(np.nanmax(end_secs_array)) if has_times else None,
+            "first_dts_sec": float(dts_sec_array[0]) if np.isfinite(dts_sec_array[0]) else None,
+            "last_dts_sec": float(dts_sec_array[-1]) if np.isfinite(dts_sec_array[-1]) else None,
+            "non_monotonic_dts": int(np.count_nonzero(is_non_monotonic_array)),
+            "non_monotonic_regions": _count_true_runs(is_non_monotonic_array),
+            "num_gaps": int(gap_sizes_array.size),
+            "max_gap_sec": float(gap_sizes_array.max()) if gap_sizes_array.size > 0 else 0.0,
+            "total_gap_sec": float(gap_sizes_array.sum())}
+
+# .....................................................................................................................
+
+def analyze_gop_structure(pts_sec_array, is_keyframe_array):
+
+    '''
+    Function which measures the keyframe spacing (GOP) of a video stream.
+    Only complete GOPs (from one keyframe to the next) are measured
+
+    Outputs:
+        gop_dict
+    '''
+
+    import numpy as np
+
+    keyframe_indices_array = np.flatnonzero(is_keyframe_array)
+    gop_frames_array = np.diff(keyframe_indices_array)
+    gop_secs_array = np.diff(np.sort(pts_sec_array[keyframe_indices_array]))
+    gop_secs_array = gop_secs_array[np.isfinite(gop_secs_array)]
+    has_gops = (gop_frames_array.size > 0)
+
+    return {"num_keyframes": int(keyframe_indices_array.size),
+            "starts_on_keyframe": bool(is_keyframe_array[0]) if is_keyframe_array.size > 0 else False,
+            "mean_frames": round(float(gop_frames_array.mean()), 2) if has_gops else None,
+            "max_frames": int(gop_frames_array.max()) if has_gops else None,
+            "mean_sec": round(float(gop_secs_array.mean()), 4) if gop_secs_array.size > 0 else None,
+            "max_sec": round(float(gop_secs_array.max()), 4) if gop_secs_array.size > 0 else None}
+
+# .....................................................................................................................
+
+def analyze_clip_packets(probe_result, gap_threshold_sec = 0.5):
+
+    '''
+    Function which reads every packet of a (probed) clip & checks the timing of the first
+    video and audio streams, as well as the drift between them. Packet arrays only live inside this
+    function, so that memory use stays bounded even when analyzing many large clips in parallel
+
+    Outputs:
+        clip_analysis_dict (or None if the clip couldn't be analyzed)
+
+    Where clip_analysis_dict has the form:
+        {"path": ..., "num_packets": ..., "video": {...}, "audio": {...} or None, "gop": {...} or None,
+         "av_start_offset_sec": ..., "av_end_drift_sec": ...}
+    '''
+
+    import numpy as np
+
+    if probe_result is None:
+        return None
+
+    packet_table_bytes = probe_packet_table(probe_result["path"])
+    packet_arrays_dict = load_packet_arrays(packet_table_bytes) if packet_table_bytes is not None else None
+    if packet_arrays_dict is None:
+        return None
+
+    # Convert timestamps to seconds, using the time base of each packet's stream
+    stream_index_array = packet_arrays_dict["stream_index"]
+    time_bases_array = np.full(int(stream_index_array.max()) + 1, np.nan)
+    first_stream_idx_dict = {}
+    for each_stream in probe_result["streams"]:
+        each_idx = each_stream.get("index", -1)
+        each_time_base = _parse_time_base(each_stream.get("time_base"))
+        if 0 <= each_idx < time_bases_array.size and each_time_base is not None:
+            time_bases_array[each_idx] = each_time_base
+            first_stream_idx_dict.setdefault(each_stream.get("codec_type"), each_idx)
+    packet_time_bases_array = time_bases_array[stream_index_array]
+    pts_sec_array = packet_arrays_dict["pts"] * packet_time_bases_array
+    dts_sec_array = packet_arrays_dict["dts"] * packet_time_bases_array
+    duration_sec_array = packet_arrays_dict["duration"] * packet_time_bases_array
+
+    # Check the timing of the main video & audio streams
+    streams_dict = {"video": None, "audio": None}
+    gop_dict = None
+    for each_type in streams_dict.keys():
+        each_mask_array = (stream_index_array == first_stream_idx_dict.get(each_type, -1))
+        if not each_mask_array.any():
+            continue
+        streams_dict[each_type] = analyze_stream_timing(pts_sec_array[each_mask_array],
+                                                        dts_sec_array[each_mask_array],
+                                                        duration_sec_array[each_mask_array],
+                                                        gap_threshold_sec)
+        if each_type == "video":
+            gop_dict = analyze_gop_structure(pts_sec_array[each_mask_array],
+                                             packet_arrays_dict["is_keyframe"][each_mask_array])
+
+    # Measure how far the audio is from the video, at the start & end of the clip
+    av_start_offset_sec, av_end_drift_sec = None, None
+    video_dict, audio_dict = streams_dict["video"], streams_dict["audio"]
+    if video_dict is not None and audio_dict is not None and video_dict["start_sec"] is not None:
+        av_start_offset_sec = round(audio_dict["start_sec"] - video_dict["start_sec"], 4)
+        av_end_drift_sec = round(audio_dict["end_sec"] - video_dict["end_sec"], 4)
+
+    return {"path": probe_result["path"],
+            "num_packets": int(stream_index_array.size),
+            "video": video_dict,
+            "audio": audio_dict,
+            "gop": gop_dict,
+            "av_start_offset_sec": av_start_offset_sec,
+            "av_end_drift_sec": av_end_drift_sec}
+
+# .....................................................................................................................
+
+def summarize_packet_analysis(clip_analysis_list, drift_threshold_sec = 0.1):
+
+    '''
+    Function which combines the per-clip packet analysis into a summary of the whole job.
+    Besides problems within clips, this also checks the clip boundaries: the timestamps of each clip
+    are expected to continue on from the previous clip (as they do with transport stream segments from
+    a single recording). Backwards jumps at boundaries are counted as 'timestamp resets'
+
+    Outputs:
+        summary_dict
+    '''
+
+    import numpy as np
+
+    analyzed_list = [each_clip for each_clip in clip_analysis_list if each_clip is not None]
+    video_list = [each_clip["video"] for each_clip in analyzed_list if each_clip["video"] is not None]
+    gops_list = [each_clip["gop"] for each_clip in analyzed_list if each_clip["gop"] is not None]
+    get_array = lambda dicts_list, key: np.array([np.nan if each_dict[key] is None else each_dict[key]
+                                                  for each_dict in dicts_list], dtype = np.float64)
+
+    # Count up problems within clips (over both video & audio streams)
+    stream_dicts_list = video_list + [each_clip["audio"] for each_clip in analyzed_list if each_clip["audio"]]
+    has_dts_errors = lambda each_clip: any(each_clip[each_type]["non_monotonic_dts"] > 0
+                                           for each_type in ("video", "audio") if each_clip[each_type])
+    has_gaps = lambda each_clip: any(each_clip[each_type]["num_gaps"] > 0
+                                     for each_type in ("video", "audio") if each_clip[each_type])
+    max_gaps_array = get_array(stream_dicts_list, "max_gap_sec")
+
+    # Check how far the audio & video drift apart
+    end_drifts_array = np.abs(get_array(analyzed_list, "av_end_drift_sec"))
+    start_offsets_array = np.abs(get_array(analyzed_list, "av_start_offset_sec"))
+    is_drifting_array = (np.nan_to_num(end_drifts_array) > drift_threshold_sec)
+    is_drifting_array |= (np.nan_to_num(start_offsets_array) > drift_threshold_sec)
+
+    # Check keyframe spacing
+    gop_max_secs_array = get_array(gops_list, "max_sec")
+    gop_mean_secs_array = get_array(gops_list, "mean_sec")
+    num_not_on_keyframe = sum(1 for each_gop in gops_list if not each_gop["starts_on_keyframe"])
+
+    # Check for timestamps jumping backwards between clips (only meaningful if every clip has video)
+    num_resets = None
+    if len(video_list) == len(clip_analysis_list):
+        first_dts_array = get_array(video_list, "first_dts_sec")
+        last_dts_array = get_array(video_list, "last_dts_sec")
+        num_resets = int(np.count_nonzero(first_dts_array[1:] <= last_dts_array[:-1]))
+
+    return {"num_clips": len(clip_analysis_list),
+            "num_failed": len(clip_analysis_list) - len(analyzed_list),
+            "num_packets": sum(each_clip["num_packets"] for each_clip in analyzed_list),
+            "clips_with_dts_errors": sum(1 for each_clip in analyzed_list if has_dts_errors(each_clip)),
+            "clips_with_gaps": sum(1 for each_clip in analyzed_list if has_gaps(each_clip)),
+            "max_gap_sec": _nan_stat(np.nanmax, max_gaps_array),
+            "clips_with_drift": int(np.count_nonzero(is_drifting_array)),
+            "max_av_drift_sec": _nan_stat(np.nanmax, end_drifts_array),
+            "clips_not_starting_on_keyframe": num_not_on_keyframe,
+            "gop_mean_sec": _nan_stat(np.nanmean, gop_mean_secs_array),
+            "gop_max_sec": _nan_stat(np.nanmax, gop_max_secs_array),
+            "timestamp_resets": num_resets,
+            "drift_threshold_sec": drift_threshold_sec}
+
+# .....................................................................................................................
+
+def analyze_packet_timelines(probe_results_list, gap_threshold_sec = 0.5, drift_threshold_sec = 0.1,
+                             max_workers = 8):
+
+    '''
+    Function which analyzes the packets of every (probed) input in parallel.
+    See analyze_clip_packets(...) & summarize_packet_analysis(...)
+
+    Outputs:
+        clip_analysis_list, summary_dict
+    '''
+
+    # Thread pool import is deferred, since it noticeably adds to start-up time
+    from concurrent.futures import ThreadPoolExecutor
+
+    analyze_func = lambda each_result: analyze_clip_packets(each_result, gap_threshold_sec)
+    num_workers = max(1, min(max_workers, len(probe_results_list)))
+    with ThreadPoolExecutor(max_workers = num_workers) as executor:
+        clip_analysis_list = list(executor.map(analyze_func, probe_results_list))
+
+    summary_dict = summarize_packet_analysis(clip_analysis_list, drift_threshold_sec)
+
+    return clip_analysis_list, summary_dict
+
+# .....................................................................................................................
+
+def packet_analysis_warnings(summary_dict):
+
+    ''' Helper used to turn the results of packet analysis into (human-readable) warnings about the inputs '''
+
+    warnings_list = []
+    if summary_dict["num_failed"] > 0:
+        warnings_list.append("Couldn't read the packets of {} file(s)".format(summary_dict["num_failed"]))
+    if summary_dict["clips_with_dts_errors"] > 0:
+        warnings_list.append("{} file(s) have non-increasing timestamps, "
+                             "which may cause playback glitches".format(summary_dict["clips_with_dts_errors"]))
+    if summary_dict["clips_with_gaps"] > 0:
+        warnings_list.append("{} file(s) have gaps in their timestamps (up to {:.2f} s)".format(
+            summary_dict["clips_with_gaps"], summary_dict["max_gap_sec"]))
+    if summary_dict["clips_with_drift"] > 0:
+        warnings_list.append("{} file(s) have audio & video out of sync by more than {} s (up to {} s), "
+                             "which adds up over the output".format(summary_dict["clips_with_drift"],
+                                                                    summary_dict["drift_threshold_sec"],
+                                                                    summary_dict["max_av_drift_sec"]))
+    if summary_dict["clips_not_starting_on_keyframe"] > 0:
+        warnings_list.append("{} file(s) don't start on a keyframe, "
+                             "so their first frames may not display".format(
+                                 summary_dict["clips_not_starting_on_keyframe"]))
+
+    return warnings_list
+
+# .....................................................................................................................
+
+def packet_analysis_feedback(clip_analysis_list, summary_dict, max_listed = 20):
+
+    ''' Function which prints out a summary of the packet analysis, including any files with problems '''
+
+    gop_str = "unknown"
+    if summary_dict["gop_mean_sec"] is not None:
+        gop_str = "{:.2f} s average, {:.2f} s max".format(summary_dict["gop_mean_sec"], summary_dict["gop_max_sec"])
+    resets_str = "unknown" if summary_dict["timestamp_resets"] is None else summary_dict["timestamp_resets"]
+    print("",
+          "Packet analysis ({} files, {} packets):".format(summary_dict["num_clips"], summary_dict["num_packets"]),
+          "  Keyframe interval: {}".format(gop_str),
+          "  Timestamp resets between files: {}".format(resets_str),
+          sep = "\n")
+
+    # List out the files with problems
+    problems_list = []
+    for each_clip in clip_analysis_list:
+        if each_clip is None:
+            continue
+        each_issues_list = []
+        for each_type in ("video", "audio"):
+            each_dict = each_clip[each_type]
+            if each_dict is None:
+                continue
+            if each_dict["non_monotonic_dts"] > 0:
+                each_issues_list.append("{} non-increasing {} dts".format(each_dict["non_monotonic_dts"], each_type))
+            if each_dict["num_gaps"] > 0:
+                each_issues_list.append("{} {} gap(s), {:.2f} s total".format(each_dict["num_gaps"], each_type,
+                                                                                 each_dict["total_gap_sec"]))
+        drift_sec = each_clip["av_end_drift_sec"]
+        if drift_sec is not None and abs(drift_sec) > summary_dict["drift_threshold_sec"]:
+            each_issues_list.append("a/v drift {:+.3f} s".format(drift_sec))
+        if each_clip["gop"] is not None and not each_clip["gop"]["starts_on_keyframe"]:
+            each_issues_list.append("no starting keyframe")
+        if len(each_issues_list) > 0:
+            problems_list.append("  {}: {}".format(os.path.basename(each_clip["path"]), ", ".join(each_issues_list)))
+
+    for each_warning in packet_analysis_warnings(summary_dict):
+        print("", "WARNING: {}".format(each_warning), sep = "\n")
+    if len(problems_list) > 0:
+        print("", "Files with problems:", *problems_list[:max_listed], sep = "\n")
+        if len(problems_list) > max_listed:
+            print("  ... and {} more".format(len(problems_list) - max_listed))
+
+    return
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+    pass
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
+
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Oct 23 10:17:44 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import os
+
+from bisect import bisect_right
+from itertools import accumulate
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define classes
+
+
+class Input_Prefetcher:
+
+    '''
+    Class used to give the OS page cache hints while ffmpeg reads through a list of inputs, one after another.
+    Upcoming inputs are prefetched (posix_fadvise WILLNEED), so that ffmpeg doesn't stall on a cold
+    open/read at every file boundary, while inputs that have already been read are dropped from the cache
+    (posix_fadvise DONTNEED), so that footage we'll never re-read doesn't push out data used by other services.
+
+    The input currently being read is figured out from ffmpeg progress reports (see Process_Supervisor),
+    using the output time (compared to the probed input durations) or if durations aren't available,
+    the output size (compared to the input file sizes, which is close enough when stream copying).
+    Hints are given on a background thread, since prefetch requests can block on a busy disk.
+    Does nothing on systems without posix_fadvise (e.g. Windows & macOS).
+
+    Example usage:
+        prefetcher = Input_Prefetcher(input_paths, input_durations, num_prefetch = 2)
+        prefetcher.start()
+        supervised_subprocess(run_command_list, progress_callback = prefetcher.on_progress)
+        prefetcher.finish(output_path)
+    '''
+
+    # .................................................................................................................
+
+    def __init__(self, input_paths_list, input_durations_list = None, num_prefetch = 2, enabled = True):
+
+        # Store inputs
+        self.input_paths_list = list(input_paths_list)
+        self.num_prefetch = max(0, num_prefetch)
+        self.enabled = enabled and cache_hints_supported() and (len(self.input_paths_list) > 0)
+
+        # Use durations to figure out which input is being read, if we have them all, otherwise use file sizes
+        have_all_durations = (input_durations_list is not None) and all(input_durations_list)
+        self._use_durations = have_all_durations
+        input_amounts_list = input_durations_list if have_all_durations else self._get_sizes()
+        self._input_end_points_list = list(accumulate(input_amounts_list))
+
+        # Storage for hints that were already given, so that each file is only hinted once
+        self._next_prefetch_idx = 0
+        self._next_drop_idx = 0
+        self._hint_queue = None
+        self._hint_thread = None
+
+    # .................................................................................................................
+
+    def _get_sizes(self):
+        return [os.path.getsize(each_path) if os.path.exists(each_path) else 0 for each_path in self.input_paths_list]
+
+    # .................................................................................................................
+
+    def start(self):
+
+        ''' Start the background hinting thread and prefetch the first few inputs '''
+
+        if not self.enabled:
+            return
+
+        # Thread imports are deferred, since they're only needed when hinting is supported
+        from queue import Queue
+        from threading import Thread
+
+        self._hint_queue = Queue()
+        self._hint_thread = Thread(target = self._hint_worker, daemon = True)
+        self._hint_thread.start()
+        self._update_hints(0)
+
+        return
+
+    # .................................................................................................................
+
+    def on_progress(self, report_values_dict):
+
+        ''' Handle a (parsed) ffmpeg progress report, for use as a progress callback '''
+
+        if not self.enabled or self._hint_queue is None:
+            return
+
+        # Figure out how far through the inputs ffmpeg has gotten
+        try:
+            if self._use_durations:
+                done_amount = int(report_values_dict.get("out_time_us", 0)) / 1000000.0
+            else:
+                done_amount = int(report_values_dict.get("total_size", 0))
+        except ValueError:
+            # Values are reported as 'N/A' before anything has been written
+            return
+
+        current_idx = min(bisect_right(self._input_end_points_list, done_amount), len(self.input_paths_list) - 1)
+        self._update_hints(current_idx)
+
+        return
+
+    # .................................................................................................................
+
+    def finish(self, output_path = None):
+
+        '''
+        Drop all inputs (and the output, if given) from the page cache and stop the background thread.
+        The output should already be flushed to disk (e.g. with fsync), since dirty pages can't be dropped
+        '''
+
+        if not self.enabled or self._hint_queue is None:
+            return
+
+        # Drop anything that hasn't been dropped yet
+        for each_path in self.input_paths_list[self._next_drop_idx:]:
+            self._hint_queue.put((each_path, "dontneed"))
+        self._next_drop_idx = len(self.input_paths_list)
+        if output_path is not None:
+            self._hint_queue.put((output_path, "dontneed"))
+
+        # Wait for the hints to be given
+        self._hint_queue.put(None)
+        self._hint_thread.join()
+        self._hint_queue = None
+
+        return
+
+    # .................................................................................................................
+
+    def _update_hints(self, current_idx):
+
+        ''' Queue up hints for the inputs around the current input, if they haven't been given already '''
+
+        # Prefetch the current input & the next few after it
+        last_prefetch_idx = min(current_idx + self.num_prefetch, len(self.input_paths_list) - 1)
+        while self._next_prefetch_idx <= last_prefetch_idx:
+            self._hint_queue.put((self.input_paths_list[self._next_prefetch_idx], "willneed"))
+            self._next_prefetch_idx += 1
+
+        # Drop inputs that have been fully read
+        while self._next_drop_idx < current_idx:
+            self._hint_queue.put((self.input_paths_list[self._next_drop_idx], "dontneed"))
+            self._next_drop_idx += 1
+
+        return
+
+    # .................................................................................................................
+
+    def _hint_worker(self):
+
+        ''' Gives queued hints, one at a time, until a None entry is found '''
+
+        while True:
+            hint_entry = self._hint_queue.get()
+            if hint_entry is None:
+                break
+            each_path, each_advice = hint_entry
+            give_cache_hint(each_path, each_advice)
+
+        return
+
+    # .................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def cache_hints_supported():
+
+    ''' Helper used to check if page cache hints (posix_fadvise) are available on this system '''
+
+    return hasattr(os, "posix_fadvise")
+
+# .....................................................................................................................
+
+def give_cache_hint(file_path, advice = "willneed"):
+
+    '''
+    Function which gives the OS a hint about how a (whole) file will be used, using posix_fadvise.
+    Advice can be "willneed" (start reading the file into the page cache in the background) or
+    "dontneed" (drop the file's clean pages from the cache). Returns False if the hint couldn't be given
+    '''
+
+    if not cache_hints_supported():
+        return False
+
+    advice_lut = {"willneed": os.POSIX_FADV_WILLNEED, "dontneed": os.POSIX_FADV_DONTNEED}
+    try:
+        file_fd = os.open(file_path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(file_fd, 0, 0, advice_lut[advice])
+        finally:
+            os.close(file_fd)
+    except OSError:
+        return False
+
+    return True
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+
+    print("Cache hints supported:", cache_hints_supported())
+    print("Prefetched this file:", give_cache_hint(__file__, "willneed"))
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
+
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 13:05:11 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import os
+import shutil
+
+from local.lib.containers import get_extension_family
+from local.lib.scheduling import get_device_key
+
+from local.eolib.utils.files import get_total_file_size
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def _container_overhead_lut():
+
+    '''
+    Lookup table of the (approximate) size of stream-copied outputs relative to the inputs, for each
+    output container family. Transport streams add noticeable packetization overhead, others add very little
+    '''
+
+    return {"ts": 1.08, "mp4": 1.01, "mov": 1.01, "mkv": 1.01, "flv": 1.02, "avi": 1.02}
+
+# .....................................................................................................................
+
+def get_free_space_bytes(folder_path):
+
+    '''
+    Function which returns the number of bytes available (to non-root users) on the file system
+    holding the given folder. Uses statvfs when available, otherwise falls back to shutil.disk_usage
+    '''
+
+    # Check the closest existing parent, in case the output folder hasn't been created yet
+    check_path = os.path.abspath(os.path.expanduser(folder_path))
+    while not os.path.exists(check_path):
+        parent_path = os.path.dirname(check_path)
+        if parent_path == check_path:
+            break
+        check_path = parent_path
+
+    # Use statvfs where possible (not available on Windows)
+    if hasattr(os, "statvfs"):
+        fs_stats = os.statvfs(check_path)
+        return fs_stats.f_bavail * fs_stats.f_frsize
+
+    return shutil.disk_usage(check_path).free
+
+# .....................................................................................................................
+
+def estimate_output_size_bytes(total_input_bytes, output_ext, extra_bytes = 0):
+
+    '''
+    Function which estimates the size of a stream-copied output, given the total size of all inputs.
+    The 'extra_bytes' input can be used to account for reserved space (e.g. mp4 faststart index)
+    '''
+
+    overhead_factor = _container_overhead_lut().get(get_extension_family(output_ext), 1.05)
+    return int(total_input_bytes * overhead_factor) + int(extra_bytes)
+
+# .....................................................................................................................
+
+def check_output_space(input_file_paths_list, save_folder_path, output_ext,
+                       extra_bytes = 0,
+                       safety_margin_bytes = 256 * (1024 ** 2),
+                       max_workers = 8):
+
+    '''
+    Function which checks if there is enough free space to hold the output of a stitch/split job.
+    Input sizes are read in parallel, since this can be slow on network drives.
+
+    Outputs:
+        has_enough_space, preflight_dict
+
+    Where preflight_dict holds the numbers used for the check (all in bytes):
+        {"input_bytes", "estimated_output_bytes", "required_bytes", "free_bytes"}
+    '''
+
+    # Add up inputs and estimate the output size
+    total_input_bytes = get_total_file_size(input_file_paths_list, max_workers = max_workers)
+    estimated_output_bytes = estimate_output_size_bytes(total_input_bytes, output_ext, extra_bytes)
+    required_bytes = estimated_output_bytes + safety_margin_bytes
+
+    # Compare against the free space on the output file system
+    free_bytes = get_free_space_bytes(save_folder_path)
+    has_enough_space = (free_bytes >= required_bytes)
+
+    preflight_dict = {"input_bytes": total_input_bytes,
+                      "estimated_output_bytes": estimated_output_bytes,
+                      "required_bytes": required_bytes,
+                      "free_bytes": free_bytes}
+
+    return has_enough_space, preflight_dict
+
+# .....................................................................................................................
+
+def check_split_space(input_file_paths_list, save_folder_path,
+                      safety_margin_bytes = 256 * (1024 ** 2),
+                      max_workers = 8):
+
+    '''
+    Function which checks if there is enough free space to hold the segments of a split job.
+    Unlike stitching, each input is split into segments of its own container type,
+    so the output size is estimated separately for each input extension.
+
+    Outputs:
+        has_enough_space, preflight_dict (same format as check_output_space(...))
+    '''
+
+    # Group inputs by extension, so each group can be sized (in parallel) & estimated together
+    paths_by_ext_dict = {}
+    for each_path in input_file_paths_list:
+        paths_by_ext_dict.setdefault(os.path.splitext(each_path)[1].lower(), []).append(each_path)
+
+    total_input_bytes, estimated_output_bytes = 0, 0
+    for each_ext, each_paths_list in paths_by_ext_dict.items():
+        each_input_bytes = get_total_file_size(each_paths_list, max_workers = max_workers)
+        total_input_bytes += each_input_bytes
+        estimated_output_bytes += estimate_output_size_bytes(each_input_bytes, each_ext)
+    required_bytes = estimated_output_bytes + safety_margin_bytes
+
+    free_bytes = get_free_space_bytes(save_folder_path)
+    has_enough_space = (free_bytes >= required_bytes)
+
+    preflight_dict = {"input_bytes": total_input_bytes,
+                      "estimated_output_bytes": estimated_output_bytes,
+                      "required_bytes": required_bytes,
+                      "free_bytes": free_bytes}
+
+    return has_enough_space, preflight_dict
+
+# .....................................................................................................................
+
+def check_scratch_space(input_file_paths_list, scratch_folder_path, save_folder_path, output_ext,
+                        safety_margin_bytes = 256 * (1024 ** 2)):
+
+    '''
+    Function which checks if there is enough free space in a scratch folder to hold (staged) copies of the inputs.
+    Copying may get ahead of stitching, so room is needed for every input at once. If the output is
+    saved onto the same file system as the scratch folder, room for the output is needed as well.
+
+    Outputs:
+        has_enough_space, preflight_dict (same format as check_output_space(...))
+    '''
+
+    total_input_bytes = get_total_file_size(input_file_paths_list)
+    estimated_output_bytes = 0
+    if get_device_key(scratch_folder_path) == get_device_key(save_folder_path):
+        estimated_output_bytes = estimate_output_size_bytes(total_input_bytes, output_ext)
+    required_bytes = total_input_bytes + estimated_output_bytes + safety_margin_bytes
+
+    free_bytes = get_free_space_bytes(scratch_folder_path)
+    has_enough_space = (free_bytes >= required_bytes)
+
+    preflight_dict = {"input_bytes": total_input_bytes,
+                      "estimated_output_bytes": estimated_output_bytes,
+                      "required_bytes": required_bytes,
+                      "free_bytes": free_bytes}
+
+    return has_enough_space, preflight_dict
+
+# .....................................................................................................................
+
+def space_check_feedback(has_enough_space, preflight_dict, save_folder_path, space_check_mode = "refuse"):
+
+    '''
+    Function which prints out feedback about the output space check. Depending on the check mode,
+    will quit if there isn't enough space. Supports modes:
+        "refuse" -> Quit if there isn't enough space
+        "warn" -> Print a warning, but continue anyways
+        "off" -> Don't print anything
+    '''
+
+    # Don't say anything if things are ok (or if we're not supposed to check)
+    if has_enough_space or space_check_mode == "off":
+        return
+
+    to_gb = lambda num_bytes: "{:.2f} GB".format(num_bytes / (1024 ** 3))
+    print("",
+          "!" * 48,
+          "",
+          "Not enough free space for output!",
+          "@ {}".format(save_folder_path),
+          "",
+          "  Inputs: {}".format(to_gb(preflight_dict["input_bytes"])),
+          "  Estimated output: {}".format(to_gb(preflight_dict["estimated_output_bytes"])),
+          "  Free space: {}".format(to_gb(preflight_dict["free_bytes"])),
+          "",
+          "!" * 48,
+          sep = "\n")
+
+    if space_check_mode == "refuse":
+        print("", "Quitting...", "(use '--spacecheck warn' to try anyways)", "", sep = "\n")
+        quit()
+
+    return
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+
+    print("Free space in home folder: {:.2f} GB".format(get_free_space_bytes("~") / (1024 ** 3)))
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 10:02:45 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import json
+
+from local.lib.ffmpeg_helpers import captured_subprocess
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def probe_duration_sec(video_path):
+    
+    ''' Function which asks ffprobe for the (container) duration of a video. Returns None if probing fails '''
+    
+    # Ask ffprobe for only the duration, printed without any key/section text
+    run_command_list = ["ffprobe",
+                        "-v", "error",
+                        "-show_entries", "format=duration",
+                        "-of", "default=noprint_wrappers=1:nokey=1",
+                        video_path]
+    proc_out = captured_subprocess(run_command_list)
+    
+    # Bail if probing fails, so callers can decide how to handle it
+    if proc_out.returncode != 0:
+        return None
+    
+    try:
+        duration_sec = float(proc_out.stdout.decode().strip())
+    except ValueError:
+        duration_sec = None
+    
+    return duration_sec
+
+# .....................................................................................................................
+
+def probe_video_info(video_path):
+    
+    '''
+    Function which asks ffprobe for container & stream info about a video. Returns None if probing fails,
+    otherwise returns a dictionary of the form:
+        {"path": video_path, "format": {...}, "streams": [{...}, {...}, ...]}
+    
+    Where the format/stream dictionaries are the (json) entries reported by ffprobe.
+    Some of the more useful keys are:
+        format -> "format_name", "duration", "size", "bit_rate", "start_time"
+        streams -> "codec_type", "codec_name", "profile", "sample_rate", "channels", "width", "height"
+    '''
+    
+    # Ask ffprobe for format & stream info, as json
+    run_command_list = ["ffprobe",
+                        "-v", "error",
+                        "-show_format",
+                        "-show_streams",
+                        "-of", "json",
+                        video_path]
+    proc_out = captured_subprocess(run_command_list)
+    
+    # Bail if probing fails, so callers can decide how to handle it
+    if proc_out.returncode != 0:
+        return None
+    
+    try:
+        probe_dict = json.loads(proc_out.stdout.decode())
+    except ValueError:
+        return None
+    
+    return {"path": video_path, "format": probe_dict.get("format", {}), "streams": probe_dict.get("streams", [])}
+
+# .....................................................................................................................
+
+def probe_many_videos(video_paths_list, max_workers = 8):
+    
+    '''
+    Function which runs ffprobe on many videos in parallel (each probe is a separate process).
+    Returns a list of probe results (see probe_video_info(...)), in the same order as the input paths.
+    Entries will be None for any file that couldn't be probed
+    '''
+    
+    # Don't bother spinning up threads if there's only one thing (or nothing) to probe
+    if len(video_paths_list) < 2:
+        return [probe_video_info(each_path) for each_path in video_paths_list]
+    
+    # Thread pool import is deferred, since it noticeably adds to start-up time
+    from concurrent.futures import ThreadPoolExecutor
+    
+    num_workers = max(1, min(max_workers, len(video_paths_list)))
+    with ThreadPoolExecutor(max_workers = num_workers) as executor:
+        probe_results_list = list(executor.map(probe_video_info, video_paths_list))
+    
+    return probe_results_list
+
+# .....................................................................................................................
+
+def get_streams_by_type(probe_result, codec_type):
+    
+    ''' Helper which pulls out all streams of a given type (e.g. "video" or "audio") from a probe result '''
+    
+    if probe_result is None:
+        return []
+    
+    return [each_stream for each_stream in probe_result["streams"] if each_stream.get("codec_type") == codec_type]
+
+# .....................................................................................................................
+
+def get_probed_duration_sec(probe_result):
+    
+    ''' Helper which pulls the (container) duration out of a probe result. Returns None if it isn't available '''
+    
+    try:
+        return float(probe_result["format"]["duration"])
+    except (TypeError, KeyError, ValueError):
+        return None
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+    pass
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
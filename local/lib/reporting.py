@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 21 09:05:27 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import os
+import re
+import sys
+import json
+
+from collections import OrderedDict
+
+from local.lib.atomic_output import write_text_atomically
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def _ffmpeg_error_keywords():
+
+    ''' Keywords marking ffmpeg messages as errors (anything else reported by a component counts as a warning) '''
+
+    return ("error", "invalid", "failed", "could not", "couldn't", "no space left", "no such file",
+            "permission denied", "corrupt", "truncat")
+
+# .....................................................................................................................
+
+def _ffmpeg_info_keywords():
+
+    ''' Keywords marking (component) messages that are purely informational, so they aren't reported '''
+
+    return ("auto-inserting", "press [q]")
+
+# .....................................................................................................................
+
+def parse_ffmpeg_messages(stderr_str, max_messages = 50):
+
+    '''
+    Function which pulls warning/error messages out of (captured) ffmpeg stderr output.
+    Repeated messages (e.g. "Non-monotonous DTS..." for every packet) are grouped together, ignoring
+    numbers & memory addresses, and reported once (using the first occurrence) with a count.
+
+    Outputs:
+        messages_list
+
+    Where each entry is a dictionary: {"level": "warning" or "error", "message": str, "count": int}
+    '''
+
+    grouped_messages_dict = OrderedDict()
+
+    # Progress updates are separated with carriage returns rather than newlines
+    for each_line in re.split(r"[\r\n]+", stderr_str):
+
+        clean_line = each_line.strip()
+        lower_line = clean_line.lower()
+        if clean_line == "" or any(each_keyword in lower_line for each_keyword in _ffmpeg_info_keywords()):
+            continue
+
+        # Component messages look like: "[mp4 @ 0x26e69880] Non-monotonous DTS ..."
+        is_component_msg = clean_line.startswith("[") and ("]" in clean_line)
+        is_error = any(each_keyword in lower_line for each_keyword in _ffmpeg_error_keywords())
+        if not (is_component_msg or is_error):
+            continue
+
+        # Group messages that only differ by numbers/addresses
+        group_key = re.sub(r"0x[0-9a-f]+|\d+", "#", lower_line)
+        if group_key not in grouped_messages_dict:
+            grouped_messages_dict[group_key] = {"level": "error" if is_error else "warning",
+                                                "message": clean_line,
+                                                "count": 0}
+        grouped_messages_dict[group_key]["count"] += 1
+
+    return list(grouped_messages_dict.values())[:max_messages]
+
+# .....................................................................................................................
+
+def verify_output_duration(output_path, probe_results_list, tolerance_sec = 1.0, relative_tolerance = 0.01,
+                           offset_sec = 0.0):
+
+    '''
+    Function which does a basic check of a stitched output, by comparing its duration to the total
+    duration of the (probed) inputs. The offset is added to the expected duration, to account for
+    time added or removed while stitching (e.g. filled gaps or trimmed overlaps).
+    A list of paths can be given for outputs that were split into parts, in which case the total
+    duration of the parts is checked.
+
+    Outputs:
+        verification_dict
+
+    Where verification_dict has the form:
+        {"status": "ok" or "mismatch" or "unverified", "expected_duration_sec": ..., "output_duration_sec": ...}
+    '''
+
+    # Import here, since probing is only needed when reporting
+    from local.lib.probing import probe_duration_sec
+
+    # Add up input durations, if we have them all
+    input_durations_list = []
+    for each_result in probe_results_list:
+        try:
+            input_durations_list.append(float(each_result["format"]["duration"]))
+        except (TypeError, KeyError, ValueError):
+            input_durations_list = None
+            break
+    expected_duration_sec = (sum(input_durations_list) + offset_sec) if input_durations_list else None
+
+    # Add up the output duration (over every part, for split outputs)
+    output_paths_list = output_path if isinstance(output_path, (list, tuple)) else [output_path]
+    part_durations_list = [probe_duration_sec(each_path) if os.path.exists(each_path) else None
+                           for each_path in output_paths_list]
+    output_duration_sec = None
+    if len(part_durations_list) > 0 and None not in part_durations_list:
+        output_duration_sec = sum(part_durations_list)
+    verification_dict = {"status": "unverified",
+                         "expected_duration_sec": expected_duration_sec,
+                         "output_duration_sec": output_duration_sec}
+
+    # Only judge the output if we know what to expect
+    if expected_duration_sec is None or output_duration_sec is None:
+        return verification_dict
+
+    allowed_error_sec = max(tolerance_sec, expected_duration_sec * relative_tolerance)
+    durations_match = (abs(output_duration_sec - expected_duration_sec) <= allowed_error_sec)
+    verification_dict["status"] = "ok" if durations_match else "mismatch"
+
+    return verification_dict
+
+# .....................................................................................................................
+
+def build_inputs_report(input_file_paths_list, probe_results_list = None):
+
+    ''' Helper used to summarize the inputs of a run, for reporting '''
+
+    probe_results_list = probe_results_list if probe_results_list is not None else [None] * len(input_file_paths_list)
+
+    inputs_list = []
+    for each_path, each_result in zip(input_file_paths_list, probe_results_list):
+        each_duration = None
+        if each_result is not None:
+            each_duration = each_result["format"].get("duration", None)
+            each_duration = float(each_duration) if each_duration is not None else None
+        inputs_list.append({"path": os.path.abspath(each_path),
+                            "size_bytes": os.path.getsize(each_path) if os.path.exists(each_path) else None,
+                            "duration_sec": each_duration})
+
+    return inputs_list
+
+# .....................................................................................................................
+
+def build_report_path(save_folder_path, output_name):
+
+    ''' Helper used to build the default report path, stored next to the output(s) of a run '''
+
+    return os.path.join(save_folder_path, "{}.report.json".format(output_name))
+
+# .....................................................................................................................
+
+def write_run_report(report_dict, report_path, stdout_stream = None):
+
+    '''
+    Function which saves a run report as json. The report is written atomically (so that anything
+    collecting reports never reads a partial file), or printed to stdout if the path is "-"
+    '''
+
+    report_str = json.dumps(report_dict, indent = 2)
+
+    if report_path == "-":
+        stdout_stream = stdout_stream if stdout_stream is not None else sys.stdout
+        stdout_stream.write(report_str + "\n")
+        stdout_stream.flush()
+        return report_path
+
+    return write_text_atomically(report_path, report_str + "\n")
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+
+    example_stderr = "\n".join(["[mp4 @ 0x26e69880] Non-monotonous DTS in output stream 0:1; previous: 10, current: 9",
+                                "[mp4 @ 0x26e69880] Non-monotonous DTS in output stream 0:1; previous: 20, current: 19",
+                                "video:223kB audio:338kB subtitle:0kB other streams:0kB global headers:0kB"])
+    print(parse_ffmpeg_messages(example_stderr))
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Thu Oct 22 14:12:38 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import os
+import time
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define classes
+
+
+class Device_Limiter:
+
+    '''
+    Class used to limit how many (I/O heavy) jobs run at the same time on each storage device.
+    Stream copying several files from the same spinning disk causes seek thrashing (total throughput can
+    end up worse than running one job at a time), while jobs on separate disks don't slow each other down.
+
+    Each job is tagged with the devices it reads from/writes to (see get_job_device_keys(...)) and
+    can only start once every one of its devices is below its concurrency limit.
+    The limit of each device is tuned automatically using AIMD (additive increase, multiplicative decrease),
+    based on the measured throughput of each device:
+        - Each device starts with a limit of 1 job
+        - Whenever the throughput of a device is measured (over at least 'min_window_sec'), the limit is
+          increased by 1 if throughput held up, otherwise it is halved
+        - Limits are also halved when a job times out or stalls on the device
+
+    Example usage:
+        limiter = Device_Limiter(max_per_device = 4)
+        device_keys = get_job_device_keys(input_path, output_folder)
+        if limiter.can_start(device_keys):
+            limiter.job_started(device_keys)
+            ...
+            limiter.job_finished(device_keys, num_bytes)
+    '''
+
+    # .................................................................................................................
+
+    def __init__(self, max_per_device = 4, initial_limit = 1, min_window_sec = 2.0, drop_tolerance = 0.1):
+
+        # Store settings
+        self.max_per_device = max(1, max_per_device)
+        self.initial_limit = max(1, min(initial_limit, self.max_per_device))
+        self.min_window_sec = min_window_sec
+        self.drop_tolerance = drop_tolerance
+
+        # Storage for the state of each device, created as devices are encountered
+        self._device_states_dict = {}
+
+    # .................................................................................................................
+
+    def _get_state(self, device_key):
+
+        if device_key not in self._device_states_dict:
+            self._device_states_dict[device_key] = {"limit": self.initial_limit,
+                                                    "active": 0,
+                                                    "window_start": None,
+                                                    "window_bytes": 0,
+                                                    "last_bytes_per_sec": None,
+                                                    "best_bytes_per_sec": None,
+                                                    "total_bytes": 0,
+                                                    "total_jobs": 0}
+
+        return self._device_states_dict[device_key]
+
+    # .................................................................................................................
+
+    def can_start(self, device_keys):
+
+        '''
+        Check if a job using the given devices could start now.
+        Limits never drop below 1, so a job can always start on devices that have nothing running
+        '''
+
+        for each_key in device_keys:
+            each_state = self._get_state(each_key)
+            if each_state["active"] >= each_state["limit"]:
+                return False
+
+        return True
+
+    # .................................................................................................................
+
+    def job_started(self, device_keys):
+
+        t_now = time.perf_counter()
+        for each_key in device_keys:
+            each_state = self._get_state(each_key)
+            each_state["active"] += 1
+            if each_state["window_start"] is None:
+                each_state["window_start"] = t_now
+
+        return
+
+    # .................................................................................................................
+
+    def job_finished(self, device_keys, num_bytes, succeeded = True, congested = False):
+
+        '''
+        Record a finished job, and update the concurrency limits of its devices if enough time has passed
+        since the last update. Jobs that timed out or stalled should be marked as 'congested',
+        which immediately halves the limit of every device the job used
+        '''
+
+        t_now = time.perf_counter()
+        for each_key in device_keys:
+            each_state = self._get_state(each_key)
+            each_state["active"] = max(0, each_state["active"] - 1)
+            each_state["total_jobs"] += 1
+
+            # Back off right away if the device seems to be overloaded (or hung)
+            if congested:
+                self._decrease_limit(each_state)
+                self._reset_window(each_state, t_now)
+                continue
+
+            # Failed jobs don't tell us anything about throughput
+            if not succeeded:
+                continue
+            each_state["window_bytes"] += num_bytes
+            each_state["total_bytes"] += num_bytes
+
+            # Only adjust limits once we have a reasonable measurement
+            window_sec = t_now - each_state["window_start"]
+            if window_sec < self.min_window_sec:
+                continue
+
+            # Increase concurrency as long as throughput keeps up, otherwise back off
+            bytes_per_sec = each_state["window_bytes"] / window_sec
+            last_bytes_per_sec = each_state["last_bytes_per_sec"]
+            throughput_dropped = False
+            if last_bytes_per_sec is not None:
+                throughput_dropped = (bytes_per_sec < last_bytes_per_sec * (1.0 - self.drop_tolerance))
+            if throughput_dropped:
+                self._decrease_limit(each_state)
+            else:
+                each_state["limit"] = min(self.max_per_device, each_state["limit"] + 1)
+
+            # Start a new measurement window
+            each_state["last_bytes_per_sec"] = bytes_per_sec
+            each_state["best_bytes_per_sec"] = max(bytes_per_sec, each_state["best_bytes_per_sec"] or 0)
+            self._reset_window(each_state, t_now)
+
+        return
+
+    # .................................................................................................................
+
+    def _decrease_limit(self, device_state):
+        device_state["limit"] = max(1, device_state["limit"] // 2)
+
+    # .................................................................................................................
+
+    def _reset_window(self, device_state, t_now):
+        device_state["window_start"] = t_now if device_state["active"] > 0 else None
+        device_state["window_bytes"] = 0
+
+    # .................................................................................................................
+
+    def to_dict(self):
+
+        ''' Returns a summary of each device (limit & measured throughput), for reporting '''
+
+        summary_dict = {}
+        for each_key, each_state in self._device_states_dict.items():
+            best_bytes_per_sec = each_state["best_bytes_per_sec"]
+            best_bytes_per_sec = round(best_bytes_per_sec, 1) if best_bytes_per_sec is not None else None
+            summary_dict[each_key] = {"limit": each_state["limit"],
+                                      "jobs": each_state["total_jobs"],
+                                      "bytes": each_state["total_bytes"],
+                                      "best_bytes_per_sec": best_bytes_per_sec}
+
+        return summary_dict
+
+    # .................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def get_device_key(path):
+
+    '''
+    Function which returns a key identifying the storage device (or mount) holding the given path.
+    If the path doesn't exist yet (e.g. an output file), the closest existing parent folder is used.
+    Keys have the form "major:minor" (e.g. "8:1"), or just the device number on systems without major/minor
+    '''
+
+    # Walk up to something that exists
+    check_path = os.path.abspath(path)
+    while not os.path.exists(check_path):
+        parent_path = os.path.dirname(check_path)
+        if parent_path == check_path:
+            break
+        check_path = parent_path
+
+    try:
+        st_dev = os.stat(check_path).st_dev
+    except OSError:
+        return "unknown"
+
+    try:
+        device_key = "{}:{}".format(os.major(st_dev), os.minor(st_dev))
+    except AttributeError:
+        device_key = str(st_dev)
+
+    return device_key
+
+# .....................................................................................................................
+
+def get_job_device_keys(input_path, output_path):
+
+    '''
+    Helper used to get the (unique) set of devices used by a job that reads the input path & writes
+    to the output path. Jobs reading & writing to the same disk only count once against its limit
+
+    Outputs:
+        device_keys_tuple
+    '''
+
+    input_key = get_device_key(input_path)
+    output_key = get_device_key(output_path)
+
+    return (input_key,) if input_key == output_key else (input_key, output_key)
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+
+    example_keys = get_job_device_keys(__file__, "/tmp/example_output.mp4")
+    example_limiter = Device_Limiter()
+    example_limiter.job_started(example_keys)
+    example_limiter.job_finished(example_keys, 1000000)
+    print(example_keys, example_limiter.to_dict())
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
+
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 09:34:51 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import os
+
+from local.lib.splitting import find_created_segments
+
+from local.eolib.utils.files import iter_sorted_files, get_top_n_files, scanned_file_sort_key, natural_sort_key
+from local.eolib.utils.cli_tools import cli_prompt_with_defaults, cli_confirm
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def default_video_exts():
+    
+    ''' List of file extensions treated as videos when searching folders for files to stitch/split '''
+    
+    return [".mp4", ".m4v", ".mov", ".mkv", ".webm", ".avi", ".flv", ".wmv",
+            ".ts", ".m2ts", ".mts", ".mpg", ".mpeg", ".3gp", ".h264", ".h265"]
+
+# .....................................................................................................................
+
+def parse_exts_arg(exts_arg_str):
+    
+    '''
+    Helper used to interpret the extensions script argument. Expects a comma separated list of extensions 
+    (e.g. "mp4,mkv"), or the word "all" to disable filtering. Uses default video extensions if None is given
+    '''
+    
+    if exts_arg_str is None:
+        return default_video_exts()
+    
+    if exts_arg_str.strip().lower() == "all":
+        return None
+    
+    return [each_ext.strip() for each_ext in exts_arg_str.split(",") if each_ext.strip() != ""]
+
+# .....................................................................................................................
+
+def sort_selected_paths(file_paths_list, sort_by = "name"):
+    
+    ''' Helper used to sort file paths that were selected by the user (i.e. not found by searching a folder) '''
+    
+    sort_key_lut = {"name": None, "natural": natural_sort_key, "mtime": lambda path: (os.path.getmtime(path), path)}
+    
+    return sorted(file_paths_list, key = sort_key_lut[sort_by])
+
+# .....................................................................................................................
+
+def select_input_files(arg_input_folder, search_directory, use_gui = False, action_name = "stitching",
+                       recursive = False,
+                       allowable_exts_list = default_video_exts(),
+                       include_globs_list = None,
+                       exclude_globs_list = None,
+                       sort_by = "name",
+                       latest_count = None):
+    
+    '''
+    Function which gets the user to select video files (using ranger or a gui), or searches for all 
+    video files in the provided folder path, if one is given (i.e. from a script argument).
+    Quits if the provided folder is not valid.
+    
+    When searching a folder, files can be filtered by extension (use None to allow all files) 
+    and with include/exclude glob patterns (e.g. "cam1_*"). If a latest count is given, only that 
+    many of the most recently modified files are kept. Files are sorted by their path (relative to 
+    the provided folder), using either "name", "natural" (numbers ordered by value) or "mtime" sorting.
+    Searching & sorting use bounded memory, so this works on folders with huge numbers of files.
+    
+    Outputs:
+        input_file_paths_list
+    '''
+    
+    # Get the user to select videos if a folder isn't provided
+    if arg_input_folder is None:
+        
+        # Import selection tools only when needed, since they're specific to the cli/gui scripts
+        if use_gui:
+            from local.eolib.utils.gui_tools import gui_file_select_many
+            input_file_paths_list = gui_file_select_many(search_directory, window_title = "Select video files")
+            return sort_selected_paths(input_file_paths_list, sort_by)
+        
+        from local.eolib.utils.ranger_tools import ranger_multifile_select
+        
+        # Some feedback before suddenly jumping into ranger
+        print("",
+              "Please use ranger cli to select video files for {}".format(action_name),
+              "  --> Use spacebar to select multiple videos.",
+              "  --> When finished, hit enter to complete selection.",
+              "",
+              sep="\n")
+        input("  Press Enter key to continue...")
+        
+        input_file_paths_list = ranger_multifile_select(start_dir = search_directory, sort_output = True)
+        
+        return sort_selected_paths(input_file_paths_list, sort_by)
+    
+    # Make sure the provided folder is valid
+    arg_input_folder = os.path.expanduser(arg_input_folder)
+    valid_input_folder = os.path.exists(arg_input_folder)
+    if not valid_input_folder:
+        print("", 
+              "Provided input folder path is not valid!",
+              "@ {}".format(arg_input_folder),
+              "",
+              "Quitting...", 
+              sep = "\n")
+        quit()
+    
+    # Provide some feedback about the selected files
+    print("", 
+          "Using input files from provided folder path:",
+          "@ {}".format(arg_input_folder),
+          sep="\n")
+    
+    # Find all (video) files in provided folder
+    scan_kwargs = {"recursive": recursive,
+                   "allowable_exts_list": allowable_exts_list,
+                   "include_globs_list": include_globs_list,
+                   "exclude_globs_list": exclude_globs_list,
+                   "show_hidden_files": False,
+                   "get_stats": (sort_by == "mtime")}
+    
+    # Either keep only the most recent files (re-sorted afterwards), or stream every file in sorted order
+    if latest_count is not None:
+        latest_files_list = get_top_n_files(arg_input_folder, latest_count, "mtime", True, **scan_kwargs)
+        sorted_files_iter = sorted(latest_files_list, key = scanned_file_sort_key(sort_by))
+    else:
+        sorted_files_iter = iter_sorted_files(arg_input_folder, sort_by = sort_by, **scan_kwargs)
+    input_file_paths_list = [each_file.path for each_file in sorted_files_iter]
+    
+    return input_file_paths_list
+
+# .....................................................................................................................
+
+def print_file_listing(input_file_paths_list, heading = "Files to stitch:", max_listed = 50):
+    
+    # Only print the start & end of very long listings
+    num_files = len(input_file_paths_list)
+    num_hidden = max(0, num_files - max_listed)
+    half_listed = (max_listed // 2)
+    listed_paths = input_file_paths_list
+    if num_hidden > 0:
+        listed_paths = [*input_file_paths_list[:half_listed], None, *input_file_paths_list[-half_listed:]]
+        num_hidden = num_files - 2 * half_listed
+    
+    # Print out files (in order) for confirmation
+    file_names_strs = ["  {}".format(os.path.basename(each_path)) if each_path is not None
+                       else "  ... ({} more files) ...".format(num_hidden)
+                       for each_path in listed_paths]
+    print("",
+          heading,
+          "(in order)",
+          "",
+          *file_names_strs,
+          sep = "\n")
+    
+    return
+
+# .....................................................................................................................
+
+def get_output_name(arg_output_name, default_save_name):
+    
+    # Ask the user for a file name or user the script argument
+    if arg_output_name is None:
+        user_outname = cli_prompt_with_defaults("Enter output file name: ", 
+                                                default_value = default_save_name, 
+                                                return_type = str)
+    else:
+        user_outname = arg_output_name
+        print("", "Using input argument for output file name:", "  {}".format(user_outname), sep="\n")
+    
+    return user_outname
+
+# .....................................................................................................................
+
+def get_output_folder(arg_output_path, parent_folder_path):
+    
+    # Overwrite the default output path if a script argument is available
+    save_folder_path = parent_folder_path
+    if arg_output_path is not None:
+        save_folder_path = os.path.expanduser(arg_output_path)
+        os.makedirs(save_folder_path, exist_ok = True)
+        print("", "Using input argument for output folder path:", "  {}".format(save_folder_path), sep="\n")
+    
+    return save_folder_path
+
+# .....................................................................................................................
+
+def confirm_overwrite(save_path):
+    
+    ''' Function which asks the user before replacing an existing output file. Quits if the user says no '''
+    
+    if not os.path.exists(save_path):
+        return
+    
+    print("", "Output file already exists!", "@ {}".format(save_path), sep = "\n")
+    overwrite = cli_confirm("Overwrite?", default_response = False)
+    if not overwrite:
+        print("", "Quitting...", sep = "\n")
+        quit()
+    
+    return
+
+# .....................................................................................................................
+
+def confirm_segments_overwrite(segment_patterns_list):
+    
+    '''
+    Function which asks the user before replacing existing (numbered) segment files, given the segment
+    naming patterns that will be used for saving (see splitting.build_segment_pattern(...)).
+    Quits if the user says no
+    '''
+    
+    existing_paths_list = []
+    for each_pattern in segment_patterns_list:
+        existing_paths_list += find_created_segments(each_pattern)
+    if len(existing_paths_list) == 0:
+        return
+    
+    print("", "Output segment files already exist!", *["@ {}".format(each_path) for each_path in existing_paths_list],
+          sep = "\n")
+    overwrite = cli_confirm("Overwrite?", default_response = False)
+    if not overwrite:
+        print("", "Quitting...", sep = "\n")
+        quit()
+    
+    return
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+    pass
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
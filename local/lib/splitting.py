@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 10:15:22 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import os
+import re
+
+from local.lib.probing import probe_duration_sec
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def parse_time_to_sec(time_str):
+
+    '''
+    Function which converts time strings into a number of seconds. Accepts ffmpeg-like time formats:
+        "600", "600.5", "10:00", "00:10:00", "1:02:03.5"
+    Raises a ValueError if the string can't be interpretted
+    '''
+
+    # Split into hours/minutes/seconds (from the right, so that missing hours/minutes are allowed)
+    clean_str = str(time_str).strip()
+    time_parts = clean_str.split(":")
+    if len(time_parts) > 3 or clean_str == "":
+        raise ValueError("Couldn't interpret time: {}".format(time_str))
+
+    # Accumulate parts, with each step to the left being 60x larger
+    total_sec = 0.0
+    for each_part in time_parts:
+        total_sec = (total_sec * 60.0) + float(each_part)
+
+    if total_sec < 0:
+        raise ValueError("Time can't be negative: {}".format(time_str))
+
+    return total_sec
+
+# .....................................................................................................................
+
+def parse_size_to_bytes(size_str):
+
+    '''
+    Function which converts size strings into a number of bytes. Accepts numbers with (optional) suffixes:
+        "500000", "500k", "250M", "2G" (suffixes scale by powers of 1024)
+    Raises a ValueError if the string can't be interpretted
+    '''
+
+    scaling_lut = {"": 1, "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3, "t": 1024 ** 4}
+
+    # Split off the (optional) suffix, allowing for things like "250MB"
+    clean_str = str(size_str).strip().lower().rstrip("b")
+    suffix = clean_str[-1:] if clean_str[-1:].isalpha() else ""
+    number_str = clean_str[:-1] if suffix else clean_str
+    if suffix not in scaling_lut:
+        raise ValueError("Unrecognized size units: {}".format(size_str))
+
+    size_bytes = int(float(number_str) * scaling_lut[suffix])
+    if size_bytes <= 0:
+        raise ValueError("Size must be positive: {}".format(size_str))
+
+    return size_bytes
+
+# .....................................................................................................................
+
+def parse_timestamps_list(timestamps_str):
+
+    ''' Function which converts a comma separated string of times into a sorted list of seconds '''
+
+    time_strs_list = [each_str for each_str in timestamps_str.split(",") if each_str.strip() != ""]
+    timestamps_sec_list = sorted(set(parse_time_to_sec(each_str) for each_str in time_strs_list))
+
+    return timestamps_sec_list
+
+# .....................................................................................................................
+
+def segment_time_from_size(input_path, target_size_bytes):
+
+    '''
+    Function which converts a target segment size into a segment duration, based on the average
+    bitrate of the input file. Since cuts only happen on keyframes, actual sizes will vary a bit!
+    Returns None if the input duration can't be probed
+    '''
+
+    duration_sec = probe_duration_sec(input_path)
+    if duration_sec is None or duration_sec <= 0:
+        return None
+
+    # Convert target size to a duration using the average bytes-per-second of the file
+    file_size_bytes = os.path.getsize(input_path)
+    bytes_per_sec = (file_size_bytes / duration_sec)
+    segment_time_sec = max(1.0, target_size_bytes / bytes_per_sec)
+
+    return segment_time_sec
+
+# .....................................................................................................................
+
+def build_segment_pattern(save_folder_path, output_name_prefix, save_ext):
+
+    ''' Helper used to build the (numbered) output naming pattern given to the ffmpeg segment muxer '''
+
+    # Percent signs are special in the segment muxer naming, so they need escaping
+    safe_prefix = output_name_prefix.replace("%", "%%")
+    segment_name = "{}_%03d{}".format(safe_prefix, save_ext)
+
+    return os.path.join(save_folder_path, segment_name)
+
+# .....................................................................................................................
+
+def build_split_command(input_video_path, output_segment_pattern,
+                        segment_time_sec = None,
+                        segment_timestamps_list = None):
+
+    '''
+    Function which builds an ffmpeg command for (losslessly) splitting a single video into segments.
+    Uses stream copying with the segment muxer, which only cuts on keyframes.
+    Either a fixed segment time or a list of cut timestamps must be given.
+
+    Outputs:
+        run_command_list, human_readable_str
+    '''
+
+    # Figure out which segmenting option to use
+    if segment_timestamps_list:
+        times_str = ",".join(["{:.3f}".format(each_time) for each_time in segment_timestamps_list])
+        segment_args = ["-segment_times", times_str]
+    elif segment_time_sec is not None:
+        segment_args = ["-segment_time", "{:.3f}".format(segment_time_sec)]
+    else:
+        raise ValueError("Must provide either a segment time or list of timestamps for splitting!")
+
+    # Build command used to split files from terminal
+    run_command_list = ["ffmpeg",
+                        "-nostdin",
+                        "-i", input_video_path,
+                        "-map", "0",
+                        "-c", "copy",
+                        "-f", "segment",
+                        *segment_args,
+                        "-reset_timestamps", "1",
+                        output_segment_pattern]
+
+    # Also make a human reable version (by removing full pathing), in case the user needs to debug
+    human_friendly_list = [*run_command_list[:3], "<input_path>", *run_command_list[4:-1], "<output_pattern>"]
+    human_readable_str = " ".join(human_friendly_list)
+
+    return run_command_list, human_readable_str
+
+# .....................................................................................................................
+
+def find_created_segments(output_segment_pattern):
+
+    '''
+    Helper used to find all segment files created from a given segment naming pattern (see build_segment_pattern).
+    The folder is listed & names are matched literally, so names with glob characters (e.g. 'cam[1]') work,
+    along with segment numbers that grow past 3 digits. Results are sorted by segment number
+    '''
+
+    # Split the pattern back into its (unescaped) prefix & extension
+    folder_path, pattern_name = os.path.split(output_segment_pattern)
+    name_prefix, name_ext = pattern_name.rsplit("_%03d", 1)
+    name_prefix = name_prefix.replace("%%", "%")
+    segment_name_regex = re.compile(r"{}_(\d{{3,}}){}".format(re.escape(name_prefix), re.escape(name_ext)))
+
+    try:
+        folder_names_list = os.listdir(folder_path if folder_path else ".")
+    except OSError:
+        return []
+
+    numbered_names_list = []
+    for each_name in folder_names_list:
+        each_match = segment_name_regex.fullmatch(each_name)
+        if each_match is not None:
+            numbered_names_list.append((int(each_match.group(1)), each_name))
+
+    return [os.path.join(folder_path, each_name) for _, each_name in sorted(numbered_names_list)]
+
+# .....................................................................................................................
+
+def run_parallel_splits(split_commands_list, max_workers = 4, completion_callback = None,
+                        partial_paths_list = None,
+                        timeout_sec = None,
+                        stall_timeout_sec = None,
+                        device_limiter = None,
+                        device_keys_list = None,
+                        job_bytes_list = None):
+
+    '''
+    Function which runs multiple ffmpeg split commands in parallel.
+    Since splitting is done with stream copying, the work is mostly I/O bound, so the ffmpeg processes
+    are launched (and waited on) using asyncio, see Process_Supervisor.
+
+    Inputs:
+        split_commands_list -> List of run_command_lists (see build_split_command(...))
+
+        max_workers -> Integer. Maximum number of ffmpeg processes to run at the same time
+
+        completion_callback -> Function or None. If provided, will be called (on the calling thread) as
+                               each command finishes, with arguments: (command_index, subproc_return)
+
+        partial_paths_list -> List or None. Partial output folder of each command, which is deleted
+                              if the command fails, times out, stalls or is cancelled
+
+        timeout_sec -> Float or None. Maximum time allowed for each command
+
+        stall_timeout_sec -> Float or None. Maximum time each command can go without making progress
+
+        device_limiter -> Device_Limiter or None. If provided, limits the number of commands running
+                          on each storage device (in addition to the max_workers limit)
+
+        device_keys_list -> List or None. Storage devices used by each command (see get_job_device_keys(...))
+
+        job_bytes_list -> List or None. Size of the input of each command, used to measure device throughput
+
+    Outputs:
+        subproc_returns_list (in the same order as the input commands)
+    '''
+
+    # Supervisor import is deferred, since asyncio noticeably adds to start-up time
+    from local.lib.supervisor import Process_Supervisor, add_progress_args
+
+    supervisor = Process_Supervisor(max_workers, timeout_sec, stall_timeout_sec, device_limiter)
+    run_commands_list = [add_progress_args(each_command) for each_command in split_commands_list]
+
+    return supervisor.run_all(run_commands_list, partial_paths_list, completion_callback,
+                              device_keys_list, job_bytes_list)
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+
+    print(parse_time_to_sec("00:10:00"), parse_size_to_bytes("250M"), parse_timestamps_list("90, 1:00, 10:00"))
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Oct 23 15:36:02 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import os
+import shutil
+
+from tempfile import mkdtemp
+from bisect import bisect_right
+from itertools import accumulate
+from threading import Condition
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define classes
+
+
+class Input_Stager:
+
+    '''
+    Class used to copy inputs from slow (e.g. network) storage onto a local scratch folder, using multiple
+    copies in parallel, while ffmpeg reads the copies that have already landed (producer/consumer).
+    Copies are started in input order, and ffmpeg can be started once the leading copies have landed
+    (see wait_until_ready()). If ffmpeg catches up to the copying, it is paused until enough data has landed.
+
+    Every staged path starts out as a symlink to the original input, which is atomically replaced by the copy
+    once it lands. This way ffmpeg always finds a complete file, even if it gets ahead of the copying
+    (otherwise the concat demuxer treats a missing file as the end of the inputs, giving a truncated output!).
+    If symlinks aren't supported, stitching has to wait for every copy to land.
+
+    How far ffmpeg has read is figured out from progress reports (see Process_Supervisor), by converting the
+    output time into a position within the inputs (using probed durations). Since progress reports only arrive
+    every ~0.5 seconds, ffmpeg is paused while it is within 'margin_bytes' of the first copy that hasn't
+    landed yet. Scratch copies are deleted as soon as ffmpeg has moved past them.
+
+    Example usage:
+        stager = Input_Stager(input_paths, scratch_folder, input_durations)
+        stager.start()
+        stager.wait_until_ready()
+        ... (run ffmpeg on stager.staged_paths_list, with progress_callback = stager.on_progress
+             and control_callback = stager.bind_controls)
+        stager.finish()
+    '''
+
+    # .................................................................................................................
+
+    def __init__(self, input_paths_list, scratch_folder_path, input_durations_list = None,
+                 num_copiers = 4, margin_bytes = 1024 ** 3):
+
+        # Store inputs
+        self.input_paths_list = list(input_paths_list)
+        self.num_copiers = max(1, num_copiers)
+        self.margin_bytes = margin_bytes
+
+        # Create a (unique) folder for the copies, in case other jobs are using the same scratch space
+        self.staging_folder_path = mkdtemp(prefix = ".staging_", dir = os.path.expanduser(scratch_folder_path))
+
+        # Name copies by index, so inputs with the same name (from different folders) don't collide
+        num_digits = len(str(len(self.input_paths_list)))
+        self.staged_paths_list = [os.path.join(self.staging_folder_path,
+                                               "{}_{}".format(str(each_idx).zfill(num_digits),
+                                                              os.path.basename(each_path)))
+                                  for each_idx, each_path in enumerate(self.input_paths_list)]
+
+        # Store cumulative sizes & durations, for figuring out how far ffmpeg has read
+        self._input_sizes_list = [os.path.getsize(each_path) for each_path in self.input_paths_list]
+        self._size_end_points_list = list(accumulate(self._input_sizes_list))
+        have_all_durations = (input_durations_list is not None) and all(input_durations_list)
+        self._input_durations_list = list(input_durations_list) if have_all_durations else None
+        self._duration_end_points_list = list(accumulate(input_durations_list)) if have_all_durations else None
+
+        # Storage for copying state, which is shared between the copying threads & ffmpeg progress reporting
+        self._state_condition = Condition()
+        self._landed_list = [False] * len(self.input_paths_list)
+        self._num_leading_landed = 0
+        self._consumed_bytes = 0
+        self._next_delete_idx = 0
+        self._copy_errors_list = []
+        self._executor = None
+        self._copy_futures_list = []
+        self._use_links = False
+
+        # Storage for controlling ffmpeg, see bind_controls(...)
+        self._pause_func = None
+        self._resume_func = None
+        self._is_paused = False
+
+    # .................................................................................................................
+
+    def start(self):
+
+        ''' Start copying inputs onto the scratch folder, in order, with multiple copies running at once '''
+
+        # Thread pool import is deferred, since it noticeably adds to start-up time
+        from concurrent.futures import ThreadPoolExecutor
+
+        # Link every staged path to its original, so ffmpeg can read inputs that haven't landed yet
+        try:
+            for each_input_path, each_staged_path in zip(self.input_paths_list, self.staged_paths_list):
+                os.symlink(os.path.abspath(each_input_path), each_staged_path)
+            self._use_links = True
+        except (OSError, NotImplementedError):
+            self._use_links = False
+
+        self._executor = ThreadPoolExecutor(max_workers = self.num_copiers)
+        self._copy_futures_list = [self._executor.submit(self._copy_one, each_idx)
+                                   for each_idx in range(len(self.input_paths_list))]
+
+        return
+
+    # .................................................................................................................
+
+    def wait_until_ready(self, wait_for_all = False):
+
+        '''
+        Wait until enough of the leading inputs have landed for ffmpeg to start (or all of them, if needed).
+        Returns False if copying failed in a way that would break stitching (i.e. a failed copy that
+        can't fall back to reading the original input)
+        '''
+
+        wait_for_all = wait_for_all or not self._use_links
+        def is_ready():
+            have_errors = (len(self._copy_errors_list) > 0)
+            have_enough_data = (not wait_for_all) and (self._get_bytes_ahead() >= self.margin_bytes)
+            return have_errors or have_enough_data or self._all_landed()
+
+        with self._state_condition:
+            self._state_condition.wait_for(is_ready)
+            no_errors = (len(self._copy_errors_list) == 0)
+
+        return no_errors or self._use_links
+
+    # .................................................................................................................
+
+    def bind_controls(self, pause_func, resume_func):
+
+        ''' Store functions for pausing/resuming ffmpeg, for use as a 'control_callback' of a supervised process '''
+
+        self._pause_func = pause_func
+        self._resume_func = resume_func
+
+        return
+
+    # .................................................................................................................
+
+    def on_progress(self, report_values_dict):
+
+        ''' Handle a (parsed) ffmpeg progress report, for use as a progress callback '''
+
+        consumed_bytes = self._estimate_consumed_bytes(report_values_dict)
+        if consumed_bytes is None:
+            return
+
+        with self._state_condition:
+            self._consumed_bytes = max(self._consumed_bytes, consumed_bytes)
+
+            # Delete copies that ffmpeg has moved past, to free up scratch space
+            num_consumed = bisect_right(self._size_end_points_list, self._consumed_bytes)
+            while self._next_delete_idx < min(num_consumed, self._num_leading_landed):
+                self._remove_copy(self._next_delete_idx)
+                self._next_delete_idx += 1
+
+            # No need to pause once ffmpeg has read everything (it may just be finishing up the output)
+            if report_values_dict.get("progress") != "end":
+                self._update_gate()
+
+        return
+
+    # .................................................................................................................
+
+    def finish(self):
+
+        ''' Stop copying (if not already finished) and remove the scratch copies '''
+
+        # Skip any copies that haven't started, then wait for running copies to finish
+        if self._executor is not None:
+            for each_future in self._copy_futures_list:
+                each_future.cancel()
+            self._executor.shutdown(wait = True)
+        shutil.rmtree(self.staging_folder_path, ignore_errors = True)
+
+        return self._copy_errors_list
+
+    # .................................................................................................................
+
+    def _copy_one(self, input_idx):
+
+        ''' Copies a single input onto the scratch folder (via a temporary name, so partial copies are never read) '''
+
+        input_path = self.input_paths_list[input_idx]
+        staged_path = self.staged_paths_list[input_idx]
+        temp_path = "{}.copying".format(staged_path)
+
+        # No need to copy inputs that ffmpeg has already read (from the original, through the symlink)
+        with self._state_condition:
+            already_consumed = (self._size_end_points_list[input_idx] <= self._consumed_bytes)
+
+        try:
+            if not already_consumed:
+                shutil.copyfile(input_path, temp_path)
+                os.replace(temp_path, staged_path)
+        except OSError as err:
+            with self._state_condition:
+                self._copy_errors_list.append("{} ({})".format(input_path, err))
+                self._update_gate()
+                self._state_condition.notify_all()
+            return
+
+        with self._state_condition:
+            self._landed_list[input_idx] = True
+            while self._num_leading_landed < len(self._landed_list) and self._landed_list[self._num_leading_landed]:
+                self._num_leading_landed += 1
+            self._update_gate()
+            self._state_condition.notify_all()
+
+        return
+
+    # .................................................................................................................
+
+    def _estimate_consumed_bytes(self, report_values_dict):
+
+        '''
+        Helper used to estimate how many bytes of the inputs ffmpeg has read, from a progress report.
+        Uses the output time along with the input durations if possible, since output sizes
+        can differ quite a bit from input sizes (e.g. when changing containers)
+        '''
+
+        try:
+            if self._duration_end_points_list is None:
+                return int(report_values_dict.get("total_size", 0))
+            out_time_sec = int(report_values_dict.get("out_time_us", 0)) / 1000000.0
+        except ValueError:
+            # Values are reported as 'N/A' before anything has been written
+            return None
+
+        # Find the input being read, then interpolate within it
+        input_idx = bisect_right(self._duration_end_points_list, out_time_sec)
+        if input_idx >= len(self._input_sizes_list):
+            return self._size_end_points_list[-1]
+        input_start_sec = self._duration_end_points_list[input_idx] - self._input_durations_list[input_idx]
+        input_fraction = (out_time_sec - input_start_sec) / self._input_durations_list[input_idx]
+        input_start_bytes = self._size_end_points_list[input_idx] - self._input_sizes_list[input_idx]
+
+        return int(input_start_bytes + input_fraction * self._input_sizes_list[input_idx])
+
+    # .................................................................................................................
+
+    def _all_landed(self):
+        return self._num_leading_landed == len(self._landed_list)
+
+    # .................................................................................................................
+
+    def _get_bytes_ahead(self):
+
+        ''' Helper used to get the amount of landed data that ffmpeg hasn't read yet. Must hold the state lock '''
+
+        landed_bytes = self._size_end_points_list[self._num_leading_landed - 1] if self._num_leading_landed > 0 else 0
+
+        return landed_bytes - self._consumed_bytes
+
+    # .................................................................................................................
+
+    def _update_gate(self):
+
+        '''
+        Helper used to pause ffmpeg when it gets too close to inputs that haven't landed, and resume it
+        once enough data is available. If copying fails, ffmpeg is resumed so that it can fail/finish
+        on its own rather than sitting paused forever. Must hold the state lock
+        '''
+
+        if self._pause_func is None:
+            return
+
+        have_errors = (len(self._copy_errors_list) > 0)
+        have_enough_data = (self._get_bytes_ahead() >= self.margin_bytes)
+        should_run = have_errors or have_enough_data or self._all_landed()
+        if should_run and self._is_paused:
+            self._is_paused = not self._resume_func()
+        elif not should_run and not self._is_paused:
+            self._is_paused = self._pause_func()
+
+        return
+
+    # .................................................................................................................
+
+    def _remove_copy(self, input_idx):
+        try:
+            os.remove(self.staged_paths_list[input_idx])
+        except OSError:
+            pass
+
+    # .................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+    pass
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
+
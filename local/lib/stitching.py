@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 09:41:16 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import os
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def write_stitch_list(file_listing_path, input_file_paths_list, inpoints_list = None, outpoints_list = None):
+    
+    # Use inpoints (if given) to skip the start of files, e.g. to trim off footage that overlaps the previous file
+    # -> Outpoints similarly cut off the end of files, e.g. to shorten filler clips to the length of a gap
+    inpoints_list = inpoints_list if inpoints_list is not None else [None] * len(input_file_paths_list)
+    outpoints_list = outpoints_list if outpoints_list is not None else [None] * len(input_file_paths_list)
+    
+    # Write file text entries used to tell ffmpeg what to stitch (one at a time, so long lists aren't copied)
+    with open(file_listing_path, "w") as text_file:
+        for each_file_path, each_inpoint, each_outpoint in zip(input_file_paths_list, inpoints_list, outpoints_list):
+            text_file.write("file '{}'\n".format(each_file_path))
+            if each_inpoint is not None:
+                text_file.write("inpoint {:.6f}\n".format(each_inpoint))
+            if each_outpoint is not None:
+                text_file.write("outpoint {:.6f}\n".format(each_outpoint))
+    
+    return file_listing_path
+
+# .....................................................................................................................
+
+def build_chapters_input_args(chapters_file_path):
+    
+    '''
+    Helper used to build the (extra input) arguments needed to copy chapters from an ffmetadata file
+    into the output. Returns empty lists if no chapters file is given
+    
+    Outputs:
+        chapters_args_list, human_chapters_args_list
+    '''
+    
+    if chapters_file_path is None:
+        return [], []
+    
+    chapters_args_list = ["-f", "ffmetadata", "-i", chapters_file_path, "-map_chapters", "1"]
+    human_chapters_args_list = ["-f", "ffmetadata", "-i", "<chapters_txt>", "-map_chapters", "1"]
+    
+    return chapters_args_list, human_chapters_args_list
+
+# .....................................................................................................................
+
+def build_ffmpeg_command(input_text_file_path, output_video_path, output_args_list = None,
+                         chapters_file_path = None):
+    
+    # Include any extra output arguments (e.g. bitstream filters), which must come before the output path
+    output_args_list = output_args_list if output_args_list is not None else []
+    chapters_args_list, human_chapters_args_list = build_chapters_input_args(chapters_file_path)
+    
+    # Build command used to stitch files from terminal
+    run_command_list = ["ffmpeg", 
+                        "-f", "concat",
+                        "-safe", "0",
+                        "-i", input_text_file_path,
+                        *chapters_args_list,
+                        "-c", "copy",
+                        *output_args_list,
+                        output_video_path]
+    
+    # Also make a human reable version (by removing full pathing), in case the user needs to debug
+    human_friendly_list = ["ffmpeg", 
+                           "-f", "concat",
+                           "-safe", "0",
+                           "-i", "<file_list_txt>",
+                           *human_chapters_args_list,
+                           "-c", "copy",
+                           *output_args_list,
+                           "<output_path>"]
+    human_readable_str = " ".join(human_friendly_list)
+    
+    return run_command_list, human_readable_str
+
+# .....................................................................................................................
+
+def write_protocol_list(file_listing_path, input_file_paths_list):
+    
+    # Write one file path per line, as expected by the ffmpeg 'concatf' protocol
+    with open(file_listing_path, "w") as text_file:
+        for each_file_path in input_file_paths_list:
+            text_file.write("{}\n".format(each_file_path))
+    
+    return file_listing_path
+
+# .....................................................................................................................
+
+def build_protocol_command(input_file_paths_list, input_text_file_path, output_video_path,
+                           output_args_list = None,
+                           use_list_file = True,
+                           chapters_file_path = None):
+    
+    '''
+    Function which builds an ffmpeg command for stitching using the concat protocol. Unlike the concat
+    demuxer (which opens and parses every file separately), the protocol joins the raw bytes of the inputs
+    into a single stream, so it only works for formats that can be simply appended (i.e. transport streams).
+    The 'concatf' protocol reads paths from a list file (avoiding command length limits), otherwise the
+    paths are joined directly into the command using the older 'concat:' protocol syntax.
+    Chapters can be added from an ffmetadata file, if given (see build_chapters_input_args(...))
+    
+    Outputs:
+        run_command_list, human_readable_str
+    '''
+    
+    # Include any extra output arguments (e.g. bitstream filters), which must come before the output path
+    output_args_list = output_args_list if output_args_list is not None else []
+    chapters_args_list, human_chapters_args_list = build_chapters_input_args(chapters_file_path)
+    
+    # Pick the protocol input
+    if use_list_file:
+        protocol_input = "concatf:{}".format(input_text_file_path)
+        human_input = "concatf:<file_list_txt>"
+    else:
+        protocol_input = "concat:{}".format("|".join(input_file_paths_list))
+        human_input = "concat:<file_paths>"
+    
+    # Build command used to stitch files from terminal
+    run_command_list = ["ffmpeg",
+                        "-i", protocol_input,
+                        *chapters_args_list,
+                        "-c", "copy",
+                        *output_args_list,
+                        output_video_path]
+    
+    # Also make a human reable version (by removing full pathing), in case the user needs to debug
+    human_friendly_list = ["ffmpeg", "-i", human_input, *human_chapters_args_list,
+                           "-c", "copy", *output_args_list, "<output_path>"]
+    human_readable_str = " ".join(human_friendly_list)
+    
+    return run_command_list, human_readable_str
+
+# .....................................................................................................................
+
+def build_stitch_command(stitch_engine, input_file_paths_list, temp_folder_path, output_video_path,
+                         output_args_list = None,
+                         protocol_list_file = True,
+                         inpoints_list = None,
+                         outpoints_list = None,
+                         chapters_file_path = None):
+    
+    '''
+    Function which writes the file listing needed by the given stitching engine (into the temp folder)
+    and builds the corresponding ffmpeg command. Supported engines:
+        "demuxer" -> ffmpeg concat demuxer, works for any container
+        "protocol" -> ffmpeg concat protocol, only for transport streams (see build_protocol_command(...))
+    
+    The protocol list file option can be disabled for older versions of ffmpeg, which lack 'concatf' support.
+    Inpoints & outpoints (used to skip the start/end of each input) are only supported by the demuxer engine.
+    If a chapters (ffmetadata) file is given, its chapters are added to the output
+    
+    Outputs:
+        run_command_list, human_readable_str
+    '''
+    
+    file_listing_path = os.path.join(temp_folder_path, "stitchlist.txt")
+    
+    if stitch_engine == "demuxer":
+        write_stitch_list(file_listing_path, input_file_paths_list, inpoints_list, outpoints_list)
+        return build_ffmpeg_command(file_listing_path, output_video_path, output_args_list, chapters_file_path)
+    
+    if stitch_engine == "protocol":
+        write_protocol_list(file_listing_path, input_file_paths_list)
+        return build_protocol_command(input_file_paths_list, file_listing_path, output_video_path, output_args_list,
+                                      use_list_file = protocol_list_file,
+                                      chapters_file_path = chapters_file_path)
+    
+    raise ValueError("Unrecognized stitching engine: {}".format(stitch_engine))
+
+# .....................................................................................................................
+
+def build_segment_output_args(segment_times_list, muxer_args_list = None):
+    
+    '''
+    Function which builds the output arguments needed to split a stitched output into separate parts
+    (cut at the given output times), using the segment muxer. Each part starts its timestamps from zero.
+    Arguments meant for the output container muxer (e.g. ["-movflags", "+faststart"]) are passed through
+    to each part, since the segment muxer doesn't accept them directly
+    
+    Outputs:
+        output_args_list
+    '''
+    
+    times_str = ",".join(["{:.3f}".format(each_time) for each_time in segment_times_list])
+    output_args_list = ["-f", "segment",
+                        "-segment_times", times_str,
+                        "-reset_timestamps", "1"]
+    
+    # Muxer arguments come in (flag, value) pairs, which the segment muxer takes as 'key=value' options
+    muxer_args_list = muxer_args_list if muxer_args_list is not None else []
+    muxer_options_list = ["{}={}".format(each_flag.lstrip("-"), each_value)
+                          for each_flag, each_value in zip(muxer_args_list[0::2], muxer_args_list[1::2])]
+    if len(muxer_options_list) > 0:
+        output_args_list += ["-segment_format_options", ":".join(muxer_options_list)]
+    
+    return output_args_list
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+    pass
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
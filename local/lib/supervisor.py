@@ -0,0 +1,502 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Thu Oct 22 09:41:12 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import os
+import signal
+import asyncio
+import subprocess
+
+from local.lib.timing import get_active_timer
+from local.lib.atomic_output import discard_partial_output
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define classes
+
+
+class Supervised_Result(subprocess.CompletedProcess):
+
+    '''
+    Result of a supervised subprocess call. Works the same as the result of subprocess.run(...),
+    but also records how the call ended, using one of the following 'status' values:
+        "ok" -> Process finished with a return code of 0
+        "error" -> Process finished with a non-zero return code
+        "timeout" -> Process was stopped for running longer than the allowed (wall-clock) time
+        "stalled" -> Process was stopped for not making any progress (e.g. stuck reading from a hung mount)
+        "cancelled" -> Process was stopped (or never started) due to a SIGINT/SIGTERM
+    '''
+
+    # .................................................................................................................
+
+    def __init__(self, args, returncode, stdout = None, stderr = None, status = "ok", duration_sec = 0.0):
+
+        super().__init__(args, returncode, stdout, stderr)
+        self.status = status
+        self.duration_sec = duration_sec
+
+    # .................................................................................................................
+
+
+# /////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+
+class Process_Supervisor:
+
+    '''
+    Class used to run many subprocesses (e.g. ffmpeg/ffprobe calls) concurrently, using asyncio.
+    Each process can be given a wall-clock time limit, and ffmpeg processes are watched for stalls
+    (no change in the reported progress, see add_progress_args(...)) so that a job stuck on a hung
+    network mount gets stopped instead of blocking forever.
+    A Device_Limiter can also be given, to limit the number of jobs running on each storage device.
+    A progress callback can be given, which is called with (job_index, report_values_dict) for every
+    progress report from ffmpeg (e.g. {"out_time_us": "1500000", "total_size": "262192", ...}).
+    Running jobs can be paused & resumed (e.g. to wait on inputs that aren't ready yet), which doesn't
+    count as stalling.
+    SIGINT/SIGTERM are handled while running: all running processes are stopped, queued processes are
+    never started and any partial outputs belonging to unfinished jobs are cleaned up.
+
+    Example usage:
+        supervisor = Process_Supervisor(max_concurrent = 4, timeout_sec = 3600, stall_timeout_sec = 120)
+        results_list = supervisor.run_all(commands_list, partial_paths_list)
+        if supervisor.was_cancelled:
+            quit()
+    '''
+
+    # .................................................................................................................
+
+    def __init__(self, max_concurrent = 4, timeout_sec = None, stall_timeout_sec = None,
+                 device_limiter = None, progress_callback = None, kill_grace_sec = 5.0, poll_period_sec = 0.5):
+
+        # Store settings. Timeouts of None (or 0) are disabled
+        self.max_concurrent = max(1, max_concurrent)
+        self.timeout_sec = timeout_sec if timeout_sec else None
+        self.stall_timeout_sec = stall_timeout_sec if stall_timeout_sec else None
+        self.device_limiter = device_limiter
+        self.progress_callback = progress_callback
+        self.kill_grace_sec = kill_grace_sec
+        self.poll_period_sec = poll_period_sec
+
+        # Storage for state while running. Asyncio objects are created inside of the event loop
+        self.was_cancelled = False
+        self._cancel_event = None
+        self._job_semaphore = None
+        self._device_condition = None
+        self._running_procs_dict = {}
+        self._paused_jobs_set = set()
+
+    # .................................................................................................................
+
+    def run_all(self, run_commands_list, partial_paths_list = None, completion_callback = None,
+                device_keys_list = None, job_bytes_list = None):
+
+        '''
+        Function which runs all given commands (at most 'max_concurrent' at a time) and waits for them to finish.
+
+        Inputs:
+            run_commands_list -> List of run_command_lists (e.g. ["ffmpeg", "-i", ...])
+
+            partial_paths_list -> List or None. If provided, should hold a path (or None) for each command,
+                                  pointing at a partial output file/folder which is deleted if the
+                                  command doesn't finish successfully
+
+            completion_callback -> Function or None. If provided, will be called (on the calling thread) as
+                                   each command finishes, with arguments: (command_index, supervised_result)
+
+            device_keys_list -> List or None. Holds the storage devices used by each command
+                                (see get_job_device_keys(...)). Only used if the supervisor has a device limiter
+
+            job_bytes_list -> List or None. Holds the number of bytes handled by each command (e.g. input size),
+                              used to measure the throughput of each device for the device limiter
+
+        Outputs:
+            supervised_results_list (in the same order as the input commands)
+        '''
+
+        # Bail on empty inputs, no need to start up an event loop
+        if len(run_commands_list) == 0:
+            return []
+
+        num_commands = len(run_commands_list)
+        partial_paths_list = partial_paths_list if partial_paths_list is not None else [None] * num_commands
+        device_keys_list = device_keys_list if device_keys_list is not None else [()] * num_commands
+        job_bytes_list = job_bytes_list if job_bytes_list is not None else [0] * num_commands
+        jobs_list = list(zip(run_commands_list, partial_paths_list, device_keys_list, job_bytes_list))
+        self.was_cancelled = False
+
+        return asyncio.run(self._run_all_async(jobs_list, completion_callback))
+
+    # .................................................................................................................
+
+    def cancel(self):
+
+        ''' Stop all running processes and skip any that haven't started yet. Must be called from the event loop '''
+
+        if not self.was_cancelled:
+            print("", "Cancelling! Stopping all running processes...", sep = "\n")
+        self.was_cancelled = True
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+        if self._device_condition is not None:
+            asyncio.get_running_loop().create_task(self._notify_devices())
+
+        return
+
+    # .................................................................................................................
+
+    def pause_job(self, job_index):
+
+        '''
+        Pause a running job (using SIGSTOP). Safe to call from other threads.
+        Returns False if the job isn't running or pausing isn't supported (e.g. on Windows)
+        '''
+
+        return self._signal_job(job_index, getattr(signal, "SIGSTOP", None), is_paused = True)
+
+    # .................................................................................................................
+
+    def resume_job(self, job_index):
+
+        ''' Resume a paused job (using SIGCONT). Safe to call from other threads '''
+
+        return self._signal_job(job_index, getattr(signal, "SIGCONT", None), is_paused = False)
+
+    # .................................................................................................................
+
+    def _signal_job(self, job_index, signal_code, is_paused):
+
+        proc = self._running_procs_dict.get(job_index, None)
+        if signal_code is None or proc is None or proc.returncode is not None:
+            return False
+
+        try:
+            os.kill(proc.pid, signal_code)
+        except ProcessLookupError:
+            return False
+
+        if is_paused:
+            self._paused_jobs_set.add(job_index)
+        else:
+            self._paused_jobs_set.discard(job_index)
+
+        return True
+
+    # .................................................................................................................
+
+    async def _run_all_async(self, jobs_list, completion_callback):
+
+        # Create asyncio objects, which must be made inside the running loop
+        self._cancel_event = asyncio.Event()
+        self._job_semaphore = asyncio.Semaphore(self.max_concurrent)
+        self._device_condition = asyncio.Condition()
+        handled_signals_list = self._install_signal_handlers()
+
+        results_list = [None] * len(jobs_list)
+        try:
+            job_tasks_list = [asyncio.create_task(self._run_job(each_idx, *each_job))
+                              for each_idx, each_job in enumerate(jobs_list)]
+
+            # Handle each command as it finishes, so that results can be recorded before the whole batch is done
+            for each_task in asyncio.as_completed(job_tasks_list):
+                each_idx, each_result = await each_task
+                results_list[each_idx] = each_result
+                if completion_callback is not None:
+                    completion_callback(each_idx, each_result)
+
+        finally:
+            self._remove_signal_handlers(handled_signals_list)
+
+        return results_list
+
+    # .................................................................................................................
+
+    def _install_signal_handlers(self):
+
+        ''' Helper used to cancel (rather than kill) the running batch on SIGINT/SIGTERM, where supported '''
+
+        event_loop = asyncio.get_running_loop()
+        handled_signals_list = []
+        for each_signal in (signal.SIGINT, signal.SIGTERM):
+            try:
+                event_loop.add_signal_handler(each_signal, self.cancel)
+                handled_signals_list.append(each_signal)
+            except (NotImplementedError, RuntimeError, ValueError):
+                # Not supported on Windows or when not running on the main thread, Ctrl+C still works normally
+                pass
+
+        return handled_signals_list
+
+    # .................................................................................................................
+
+    def _remove_signal_handlers(self, handled_signals_list):
+
+        event_loop = asyncio.get_running_loop()
+        for each_signal in handled_signals_list:
+            event_loop.remove_signal_handler(each_signal)
+
+        return
+
+    # .................................................................................................................
+
+    async def _run_job(self, job_index, run_command_list, partial_path, device_keys, job_bytes):
+
+        ''' Runs a single command (once a slot is free on its devices), with cleanup if it doesn't finish properly '''
+
+        use_devices = (self.device_limiter is not None) and (len(device_keys) > 0)
+        if use_devices:
+            await self._acquire_devices(device_keys)
+
+        result = None
+        try:
+            async with self._job_semaphore:
+
+                # Don't start anything new once cancelled
+                if self._cancel_event.is_set():
+                    self._cleanup_partial(partial_path)
+                    return job_index, Supervised_Result(run_command_list, None, b"", b"", status = "cancelled")
+
+                result = await self._run_process(job_index, run_command_list)
+
+        finally:
+            if use_devices:
+                await self._release_devices(device_keys, job_bytes, result)
+
+        # Record timing, same as regular (captured) subprocess calls
+        run_timer = get_active_timer()
+        if run_timer is not None:
+            program_name = os.path.basename(run_command_list[0])
+            run_timer.add_subprocess_time(program_name, result.duration_sec, result.returncode)
+
+        # Clean up partial outputs of anything that didn't finish properly
+        if result.status != "ok":
+            self._cleanup_partial(partial_path)
+
+        return job_index, result
+
+    # .................................................................................................................
+
+    async def _run_process(self, job_index, run_command_list):
+
+        ''' Runs a single command, while watching for timeouts, stalls & cancellation '''
+
+        event_loop = asyncio.get_running_loop()
+        t_start = event_loop.time()
+        proc = await asyncio.create_subprocess_exec(*run_command_list,
+                                                    stdin = subprocess.DEVNULL,
+                                                    stdout = subprocess.PIPE,
+                                                    stderr = subprocess.PIPE)
+        self._running_procs_dict[job_index] = proc
+
+        # Read outputs as they arrive (which also prevents the process from blocking on full pipes)
+        uses_progress = ("-progress" in run_command_list)
+        progress_state_dict = {"last_change_time": t_start, "last_values": None}
+        stdout_task = asyncio.create_task(self._read_stdout(job_index, proc.stdout, uses_progress,
+                                                            progress_state_dict))
+        stderr_task = asyncio.create_task(proc.stderr.read())
+        wait_task = asyncio.create_task(proc.wait())
+
+        # Keep checking on the process until it finishes, or we have to stop it
+        status = None
+        while status is None:
+            await asyncio.wait({wait_task}, timeout = self.poll_period_sec)
+            if wait_task.done():
+                break
+
+            # Time spent paused doesn't count as a stall
+            t_now = event_loop.time()
+            if job_index in self._paused_jobs_set:
+                progress_state_dict["last_change_time"] = t_now
+
+            if self._cancel_event.is_set():
+                status = "cancelled"
+            elif self.timeout_sec is not None and (t_now - t_start) > self.timeout_sec:
+                status = "timeout"
+            elif self.stall_timeout_sec is not None and uses_progress:
+                if (t_now - progress_state_dict["last_change_time"]) > self.stall_timeout_sec:
+                    status = "stalled"
+
+        # Stop the process if needed. If it can't be stopped (e.g. stuck in uninterruptible I/O), give up on it
+        if status is not None:
+            self.resume_job(job_index)  # Paused processes only handle stop signals once resumed
+            process_stopped = await self._stop_process(proc, wait_task)
+            if not process_stopped:
+                stdout_task.cancel()
+                stderr_task.cancel()
+
+        stdout_bytes, stderr_bytes = await self._collect_output(stdout_task, stderr_task)
+        return_code = proc.returncode
+        if status is None:
+            status = "ok" if return_code == 0 else "error"
+        duration_sec = event_loop.time() - t_start
+        self._running_procs_dict.pop(job_index, None)
+        self._paused_jobs_set.discard(job_index)
+
+        return Supervised_Result(run_command_list, return_code, stdout_bytes, stderr_bytes, status, duration_sec)
+
+    # .................................................................................................................
+
+    async def _acquire_devices(self, device_keys):
+
+        ''' Helper used to wait until every device used by a job has room for another job (or we're cancelled) '''
+
+        can_start = lambda: self._cancel_event.is_set() or self.device_limiter.can_start(device_keys)
+        async with self._device_condition:
+            await self._device_condition.wait_for(can_start)
+            self.device_limiter.job_started(device_keys)
+
+        return
+
+    # .................................................................................................................
+
+    async def _release_devices(self, device_keys, job_bytes, result):
+
+        ''' Helper used to record a finished job with the device limiter, which may let other jobs start '''
+
+        status = result.status if result is not None else "cancelled"
+        async with self._device_condition:
+            self.device_limiter.job_finished(device_keys, job_bytes,
+                                             succeeded = (status == "ok"),
+                                             congested = (status in {"timeout", "stalled"}))
+            self._device_condition.notify_all()
+
+        return
+
+    # .................................................................................................................
+
+    async def _notify_devices(self):
+
+        ''' Helper used to wake up all jobs waiting on devices (e.g. so they can see that we've been cancelled) '''
+
+        async with self._device_condition:
+            self._device_condition.notify_all()
+
+        return
+
+    # .................................................................................................................
+
+    async def _read_stdout(self, job_index, stdout_stream, uses_progress, progress_state_dict):
+
+        '''
+        Helper used to read stdout of a process. For ffmpeg calls using '-progress pipe:1', the
+        progress reports are parsed, and the time of the last change in progress is recorded.
+        Reports are given every ~0.5 seconds even when ffmpeg is stuck, so only changes count as progress
+        '''
+
+        if not uses_progress:
+            return await stdout_stream.read()
+
+        stdout_lines_list = []
+        report_values_dict = {}
+        while True:
+            each_line = await stdout_stream.readline()
+            if not each_line:
+                break
+            stdout_lines_list.append(each_line)
+
+            # Reports are blocks of 'key=value' lines, ending with a 'progress=...' line
+            key, _, value = each_line.decode(errors = "ignore").strip().partition("=")
+            report_values_dict[key] = value
+            if key == "progress":
+                progress_values = (report_values_dict.get("out_time_us"), report_values_dict.get("total_size"))
+                if progress_values != progress_state_dict["last_values"]:
+                    progress_state_dict["last_values"] = progress_values
+                    progress_state_dict["last_change_time"] = asyncio.get_running_loop().time()
+                if self.progress_callback is not None:
+                    self.progress_callback(job_index, dict(report_values_dict))
+
+        return b"".join(stdout_lines_list)
+
+    # .................................................................................................................
+
+    async def _stop_process(self, proc, wait_task):
+
+        ''' Helper used to stop a process, politely at first (so ffmpeg can clean up) and then forcefully '''
+
+        for each_stop_func in (proc.terminate, proc.kill):
+            try:
+                each_stop_func()
+            except ProcessLookupError:
+                # Process already ended
+                return True
+            await asyncio.wait({wait_task}, timeout = self.kill_grace_sec)
+            if wait_task.done():
+                return True
+
+        return False
+
+    # .................................................................................................................
+
+    async def _collect_output(self, stdout_task, stderr_task):
+
+        ''' Helper used to get the captured stdout/stderr of a process, even if reading was abandoned '''
+
+        outputs_list = []
+        for each_task in (stdout_task, stderr_task):
+            try:
+                outputs_list.append(await each_task)
+            except asyncio.CancelledError:
+                outputs_list.append(b"")
+
+        return outputs_list
+
+    # .................................................................................................................
+
+    def _cleanup_partial(self, partial_path):
+        if partial_path is not None:
+            discard_partial_output(partial_path)
+
+    # .................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def add_progress_args(run_command_list):
+
+    '''
+    Function which adds progress reporting (to stdout) to an ffmpeg command, which is needed for
+    stall detection by the Process_Supervisor. Commands that aren't for ffmpeg, already report progress
+    or write their output to stdout are returned unchanged
+    '''
+
+    # Only ffmpeg supports progress reporting
+    is_ffmpeg = (os.path.splitext(os.path.basename(run_command_list[0]))[0] == "ffmpeg")
+    if not is_ffmpeg or ("-progress" in run_command_list):
+        return run_command_list
+
+    # Can't report progress on stdout if it's being used for the output
+    writes_to_stdout = (run_command_list[-1] in ("-", "pipe:", "pipe:1"))
+    if writes_to_stdout:
+        return run_command_list
+
+    return [run_command_list[0], "-progress", "pipe:1", "-nostats", *run_command_list[1:]]
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+
+    example_supervisor = Process_Supervisor(max_concurrent = 2, timeout_sec = 2)
+    example_results = example_supervisor.run_all([["sleep", "1"], ["sleep", "5"], ["false"]])
+    for each_result in example_results:
+        print(each_result.args, each_result.status, each_result.returncode, round(each_result.duration_sec, 2))
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
+
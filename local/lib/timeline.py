@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 27 10:36:52 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import os
+
+import datetime as dt
+
+from bisect import bisect_right
+
+from local.lib.ffmpeg_helpers import captured_subprocess
+from local.lib.probing import get_probed_duration_sec
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def start_time_source_names():
+
+    '''
+    List of supported sources for the (real-world) start time of each clip:
+        "auto" -> Use creation times if every clip has one, otherwise timestamps (if they make sense)
+        "timestamps" -> Use the start timestamp of each clip, only useful for recorders that keep
+                        timestamps running from one segment to the next (e.g. transport stream segments)
+        "creationtime" -> Use the (wall-clock) creation time stored in the metadata of each clip
+    '''
+
+    return ["auto", "timestamps", "creationtime"]
+
+# .....................................................................................................................
+
+def get_probed_start_sec(probe_result):
+
+    ''' Helper which pulls the start timestamp out of a probe result. Returns None if it isn't available '''
+
+    try:
+        return float(probe_result["format"]["start_time"])
+    except (TypeError, KeyError, ValueError):
+        return None
+
+# .....................................................................................................................
+
+def get_probed_creation_sec(probe_result):
+
+    '''
+    Helper which pulls the (wall-clock) creation time out of a probe result, as seconds since the epoch.
+    Returns None if it isn't available
+    '''
+
+    try:
+        creation_str = probe_result["format"]["tags"]["creation_time"]
+    except (TypeError, KeyError):
+        return None
+
+    # Times are stored like: "2026-10-19T20:07:00.000000Z"
+    try:
+        creation_dt = dt.datetime.strptime(creation_str.strip().rstrip("Z"), "%Y-%m-%dT%H:%M:%S.%f")
+    except ValueError:
+        try:
+            creation_dt = dt.datetime.strptime(creation_str.strip().rstrip("Z"), "%Y-%m-%dT%H:%M:%S")
+        except ValueError:
+            return None
+
+    return creation_dt.replace(tzinfo = dt.timezone.utc).timestamp()
+
+# .....................................................................................................................
+
+def get_clip_start_times(probe_results_list, start_time_source = "auto"):
+
+    '''
+    Function which gets the start time of every clip, so that clips can be placed on a common timeline.
+    Times are only returned if they're available for every clip and are increasing (otherwise they
+    can't be describing the real start times, e.g. mp4 files usually all start at a timestamp of 0)
+
+    Outputs:
+        start_secs_list, source_used (or None, None if start times aren't available)
+    '''
+
+    # Decide which sources to try, in order
+    sources_list = ["creationtime", "timestamps"] if start_time_source == "auto" else [start_time_source]
+    source_funcs_dict = {"creationtime": get_probed_creation_sec, "timestamps": get_probed_start_sec}
+
+    for each_source in sources_list:
+        start_secs_list = [source_funcs_dict[each_source](each_result) for each_result in probe_results_list]
+        if any(each_sec is None for each_sec in start_secs_list):
+            continue
+        is_increasing = all(next_sec > prev_sec for prev_sec, next_sec in zip(start_secs_list, start_secs_list[1:]))
+        if is_increasing:
+            return start_secs_list, each_source
+
+    return None, None
+
+# .....................................................................................................................
+
+def find_overlaps(start_secs_list, durations_list, min_overlap_sec = 0.5):
+
+    '''
+    Function which finds how much each clip overlaps with the end of the clips before it.
+    Overlaps smaller than the given minimum are ignored (e.g. to allow for rounding of creation times),
+    as are clips that are entirely covered by earlier clips (something is probably wrong with their timing)
+
+    Outputs:
+        overlaps_list (one entry per clip, 0.0 if a clip doesn't overlap)
+    '''
+
+    overlaps_list = [0.0] * len(start_secs_list)
+    if len(start_secs_list) == 0 or any(each_duration is None for each_duration in durations_list):
+        return overlaps_list
+
+    prev_end_sec = start_secs_list[0] + durations_list[0]
+    for clip_idx in range(1, len(start_secs_list)):
+        overlap_sec = prev_end_sec - start_secs_list[clip_idx]
+        if min_overlap_sec <= overlap_sec < durations_list[clip_idx]:
+            overlaps_list[clip_idx] = overlap_sec
+        prev_end_sec = max(prev_end_sec, start_secs_list[clip_idx] + durations_list[clip_idx])
+
+    return overlaps_list
+
+# .....................................................................................................................
+
+def probe_keyframe_times(video_path, end_sec):
+
+    '''
+    Function which gets the timestamps of the video keyframes of a file, up to the given (file) timestamp.
+    Only the start of the file is read. Returns an empty list if probing fails
+    '''
+
+    run_command_list = ["ffprobe",
+                        "-v", "error",
+                        "-select_streams", "v:0",
+                        "-read_intervals", "%{:.6f}".format(end_sec),
+                        "-show_entries", "packet=pts_time,flags",
+                        "-of", "csv=p=0",
+                        video_path]
+    proc_out = captured_subprocess(run_command_list)
+    if proc_out.returncode != 0:
+        return []
+
+    keyframe_secs_list = []
+    for each_line in proc_out.stdout.decode(errors = "ignore").splitlines():
+        line_parts = each_line.strip().split(",")
+        if len(line_parts) < 2 or "K" not in line_parts[1]:
+            continue
+        try:
+            keyframe_secs_list.append(float(line_parts[0]))
+        except ValueError:
+            continue
+
+    return sorted(keyframe_secs_list)
+
+# .....................................................................................................................
+
+def select_inpoints(probe_results_list, overlaps_list, max_workers = 8):
+
+    '''
+    Function which picks 'inpoint' timestamps (for the concat demuxer) that skip the overlapping
+    start of each clip. Without re-encoding, clips must start on a keyframe (otherwise the demuxer
+    includes the packets leading up to the inpoint, which collide with the end of the previous clip),
+    so each inpoint is placed at the last keyframe within the overlap. This never drops unique footage,
+    though up to one keyframe interval of the overlap may remain.
+
+    Outputs:
+        inpoints_list, trimmed_secs_list
+
+    Where inpoints_list holds the inpoint timestamp of each clip (or None, if the clip isn't trimmed)
+    and trimmed_secs_list holds the amount of time trimmed off the start of each clip
+    '''
+
+    num_clips = len(probe_results_list)
+    inpoints_list = [None] * num_clips
+    trimmed_secs_list = [0.0] * num_clips
+    overlap_indices_list = [each_idx for each_idx, each_sec in enumerate(overlaps_list) if each_sec > 0]
+    if len(overlap_indices_list) == 0:
+        return inpoints_list, trimmed_secs_list
+
+    # Thread pool import is deferred, since it noticeably adds to start-up time
+    from concurrent.futures import ThreadPoolExecutor
+
+    # Find the keyframes within the overlap of each clip (in parallel, since each is a separate ffprobe call)
+    start_secs_list = [get_probed_start_sec(each_result) or 0.0 for each_result in probe_results_list]
+    probe_func = lambda each_idx: probe_keyframe_times(probe_results_list[each_idx]["path"],
+                                                       start_secs_list[each_idx] + overlaps_list[each_idx])
+    num_workers = max(1, min(max_workers, len(overlap_indices_list)))
+    with ThreadPoolExecutor(max_workers = num_workers) as executor:
+        keyframe_lists = list(executor.map(probe_func, overlap_indices_list))
+
+    # Start each clip from the last keyframe that's still within the overlap
+    for each_idx, each_keyframes_list in zip(overlap_indices_list, keyframe_lists):
+        overlap_end_sec = start_secs_list[each_idx] + overlaps_list[each_idx]
+        num_before = bisect_right(each_keyframes_list, overlap_end_sec)
+        if num_before == 0:
+            continue
+        inpoint_sec = each_keyframes_list[num_before - 1]
+        trimmed_sec = inpoint_sec - start_secs_list[each_idx]
+        if trimmed_sec > 0:
+            inpoints_list[each_idx] = inpoint_sec
+            trimmed_secs_list[each_idx] = trimmed_sec
+
+    return inpoints_list, trimmed_secs_list
+
+# .....................................................................................................................
+
+def detect_overlap_trims(probe_results_list, start_time_source = "auto", min_overlap_sec = 0.5):
+
+    '''
+    Function which finds overlapping clips (from their start times & durations) and picks inpoints
+    to trim the overlap off of each clip. See get_clip_start_times(...) & select_inpoints(...)
+
+    Outputs:
+        inpoints_list, overlap_info_dict
+
+    Where overlap_info_dict holds info about the trimming, for feedback/reporting:
+        {"source", "overlaps_sec", "trimmed_sec"}
+    '''
+
+    num_clips = len(probe_results_list)
+    start_secs_list, source_used = get_clip_start_times(probe_results_list, start_time_source)
+    if start_secs_list is None:
+        no_trims_list = [0.0] * num_clips
+        return [None] * num_clips, {"source": None, "overlaps_sec": no_trims_list, "trimmed_sec": no_trims_list}
+
+    durations_list = [get_probed_duration_sec(each_result) for each_result in probe_results_list]
+    overlaps_list = find_overlaps(start_secs_list, durations_list, min_overlap_sec)
+    inpoints_list, trimmed_secs_list = select_inpoints(probe_results_list, overlaps_list)
+
+    overlap_info_dict = {"source": source_used,
+                         "overlaps_sec": [round(each_sec, 3) for each_sec in overlaps_list],
+                         "trimmed_sec": [round(each_sec, 3) for each_sec in trimmed_secs_list]}
+
+    return inpoints_list, overlap_info_dict
+
+# .....................................................................................................................
+
+def overlap_feedback(input_file_paths_list, overlap_info_dict):
+
+    ''' Function which prints out info about overlapping clips & how they were trimmed '''
+
+    if overlap_info_dict["source"] is None:
+        print("", "WARNING: Couldn't get start times of the inputs, overlaps can't be detected", sep = "\n")
+        return
+
+    num_overlaps = sum(1 for each_sec in overlap_info_dict["overlaps_sec"] if each_sec > 0)
+    if num_overlaps == 0:
+        return
+
+    print("", "Found {} overlapping file(s) (using {}):".format(num_overlaps, overlap_info_dict["source"]),
+          sep = "\n")
+    for each_path, each_overlap_sec, each_trim_sec in zip(input_file_paths_list, overlap_info_dict["overlaps_sec"],
+                                                          overlap_info_dict["trimmed_sec"]):
+        if each_overlap_sec > 0:
+            print("  {} overlaps by {:.2f} s, trimming {:.2f} s".format(os.path.basename(each_path),
+                                                                        each_overlap_sec, each_trim_sec))
+
+    return
+
+# .....................................................................................................................
+
+def gap_policy_names():
+
+    '''
+    List of supported ways of handling gaps between clips (e.g. from a recorder being offline):
+        "off" -> Ignore gaps, clips are stitched back-to-back (so the output jumps in time at each gap)
+        "split" -> Start a new output (part) after each gap
+        "fill" -> Fill each gap with black video & silent audio, so the output follows real time
+    '''
+
+    return ["off", "split", "fill"]
+
+# .....................................................................................................................
+
+def find_gaps(start_secs_list, durations_list, min_gap_sec = 5.0):
+
+    '''
+    Function which finds how much time passes between the end of the clips before each clip & its start.
+    Gaps smaller than the given minimum are ignored (e.g. the small pauses between segments of most recorders)
+
+    Outputs:
+        gaps_list (one entry per clip, 0.0 if a clip follows on from the clips before it)
+    '''
+
+    gaps_list = [0.0] * len(start_secs_list)
+    if len(start_secs_list) == 0 or any(each_duration is None for each_duration in durations_list):
+        return gaps_list
+
+    prev_end_sec = start_secs_list[0] + durations_list[0]
+    for clip_idx in range(1, len(start_secs_list)):
+        gap_sec = start_secs_list[clip_idx] - prev_end_sec
+        if gap_sec >= min_gap_sec:
+            gaps_list[clip_idx] = gap_sec
+        prev_end_sec = max(prev_end_sec, start_secs_list[clip_idx] + durations_list[clip_idx])
+
+    return gaps_list
+
+# .....................................................................................................................
+
+def detect_gaps(probe_results_list, start_time_source = "auto", min_gap_sec = 5.0):
+
+    '''
+    Function which finds gaps between clips, using their start times & durations.
+    See get_clip_start_times(...) & find_gaps(...)
+
+    Outputs:
+        gap_info_dict
+
+    Where gap_info_dict has the form:
+        {"source": ..., "gaps_sec": [...]}
+    '''
+
+    num_clips = len(probe_results_list)
+    start_secs_list, source_used = get_clip_start_times(probe_results_list, start_time_source)
+    if start_secs_list is None:
+        return {"source": None, "gaps_sec": [0.0] * num_clips}
+
+    durations_list = [get_probed_duration_sec(each_result) for each_result in probe_results_list]
+    gaps_list = find_gaps(start_secs_list, durations_list, min_gap_sec)
+
+    return {"source": source_used, "gaps_sec": [round(each_sec, 3) for each_sec in gaps_list]}
+
+# .....................................................................................................................
+
+def get_part_start_times(probe_results_list, gaps_list, trimmed_secs_list = None, margin_sec = 0.01):
+
+    '''
+    Function which figures out where (in output time) each clip that follows a gap begins, for splitting
+    the output into separate parts. Clips are placed back-to-back (as done by the concat demuxer),
+    less any time trimmed off of their start. Times are pulled back by a small margin, since the
+    segment muxer cuts at the first keyframe at (or after) each time. Returns None if durations aren't available
+
+    Outputs:
+        part_start_secs_list
+    '''
+
+    trimmed_secs_list = trimmed_secs_list if trimmed_secs_list is not None else [0.0] * len(probe_results_list)
+    durations_list = [get_probed_duration_sec(each_result) for each_result in probe_results_list]
+    if any(each_duration is None for each_duration in durations_list):
+        return None
+
+    part_start_secs_list = []
+    output_sec = 0.0
+    for each_duration, each_trim_sec, each_gap_sec in zip(durations_list, trimmed_secs_list, gaps_list):
+        if each_gap_sec > 0 and output_sec > 0:
+            part_start_secs_list.append(max(0.0, output_sec - margin_sec))
+        output_sec += each_duration - each_trim_sec
+
+    return part_start_secs_list
+
+# .....................................................................................................................
+
+def gap_feedback(input_file_paths_list, gap_info_dict, gap_policy):
+
+    ''' Function which prints out info about gaps between clips & how they're handled '''
+
+    if gap_info_dict["source"] is None:
+        print("", "WARNING: Couldn't get start times of the inputs, gaps can't be detected", sep = "\n")
+        return
+
+    num_gaps = sum(1 for each_sec in gap_info_dict["gaps_sec"] if each_sec > 0)
+    if num_gaps == 0:
+        return
+
+    action_str = {"split": "starting a new output", "fill": "filling with black/silence"}.get(gap_policy, "ignoring")
+    print("", "Found {} gap(s) between files (using {}), {}:".format(num_gaps, gap_info_dict["source"], action_str),
+          sep = "\n")
+    for each_path, each_gap_sec in zip(input_file_paths_list, gap_info_dict["gaps_sec"]):
+        if each_gap_sec > 0:
+            print("  {:.2f} s before {}".format(each_gap_sec, os.path.basename(each_path)))
+
+    return
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+    pass
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
+
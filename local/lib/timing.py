@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 15:20:09 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import json
+import time
+
+from threading import Lock
+
+# Timer which (if set) records the timing of every subprocess call, see set_active_timer(...)
+_ACTIVE_TIMER = None
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define classes
+
+
+class Phase_Timer:
+
+    '''
+    Class used to time the separate phases of a job (e.g. listing, probing, muxing).
+    Timings (in seconds) are accumulated by phase name. Phases can either be timed using 'with' blocks,
+    or by calling start_phase(...) at the beginning of each phase (which ends the previous phase),
+    which is more convenient for timing the cells of a script.
+    Subprocess calls can also be recorded (see set_active_timer(...)), these are tallied by program name.
+
+    Example usage:
+        timer = Phase_Timer()
+        with timer.phase("probing"):
+            probe_many_videos(paths)
+        timer.start_phase("muxing")
+        ...
+        timer.end_phase()
+        print(timer.to_dict())
+    '''
+
+    # .................................................................................................................
+
+    def __init__(self):
+
+        # Storage for phase timing
+        self._phase_times_dict = {}
+        self._current_phase = None
+        self._current_phase_t_start = None
+
+        # Storage for subprocess timing, which may be recorded from multiple threads
+        self._subproc_lock = Lock()
+        self._subproc_stats_dict = {}
+
+        # Storage for extra info about the run (e.g. number of bytes processed)
+        self.info_dict = {}
+        self.start_timestamp = time.time()
+
+    # .................................................................................................................
+
+    def phase(self, phase_name):
+        return _Timed_Phase(self, phase_name)
+
+    # .................................................................................................................
+
+    def add_time(self, phase_name, time_sec):
+        self._phase_times_dict[phase_name] = self._phase_times_dict.get(phase_name, 0.0) + time_sec
+
+    # .................................................................................................................
+
+    def start_phase(self, phase_name):
+
+        ''' Start timing a new phase. Any phase that was already running is ended first '''
+
+        self.end_phase()
+        self._current_phase = phase_name
+        self._current_phase_t_start = time.perf_counter()
+
+        return
+
+    # .................................................................................................................
+
+    def end_phase(self):
+
+        ''' End the currently running phase (if any) '''
+
+        if self._current_phase is not None:
+            self.add_time(self._current_phase, time.perf_counter() - self._current_phase_t_start)
+        self._current_phase = None
+        self._current_phase_t_start = None
+
+        return
+
+    # .................................................................................................................
+
+    def add_subprocess_time(self, program_name, time_sec, return_code):
+
+        ''' Record a single subprocess call. Safe to call from multiple threads '''
+
+        with self._subproc_lock:
+            empty_stats_dict = {"count": 0, "total_sec": 0.0, "max_sec": 0.0, "errors": 0}
+            stats_dict = self._subproc_stats_dict.setdefault(program_name, empty_stats_dict)
+            stats_dict["count"] += 1
+            stats_dict["total_sec"] += time_sec
+            stats_dict["max_sec"] = max(stats_dict["max_sec"], time_sec)
+            stats_dict["errors"] += int(return_code != 0)
+
+        return
+
+    # .................................................................................................................
+
+    def to_dict(self, decimal_places = 4):
+
+        ''' Returns all phase timings (in seconds), along with the total over all phases '''
+
+        phase_times_dict = {each_name: round(each_time, decimal_places)
+                            for each_name, each_time in self._phase_times_dict.items()}
+        phase_times_dict["total"] = round(sum(self._phase_times_dict.values()), decimal_places)
+
+        return phase_times_dict
+
+    # .................................................................................................................
+
+    def subprocess_stats_dict(self, decimal_places = 4):
+
+        ''' Returns subprocess timing stats, by program name (e.g. {"ffprobe": {"count": 10, ...}}) '''
+
+        round_values = lambda stats_dict: {each_key: round(each_value, decimal_places)
+                                           for each_key, each_value in stats_dict.items()}
+        with self._subproc_lock:
+            return {each_name: round_values(each_stats) for each_name, each_stats in self._subproc_stats_dict.items()}
+
+    # .................................................................................................................
+
+
+# /////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+
+class _Timed_Phase:
+
+    ''' Helper used by the Phase_Timer to time a single 'with' block '''
+
+    # .................................................................................................................
+
+    def __init__(self, parent_timer, phase_name):
+        self._parent_timer = parent_timer
+        self._phase_name = phase_name
+        self._t_start = None
+
+    # .................................................................................................................
+
+    def __enter__(self):
+        self._t_start = time.perf_counter()
+        return self
+
+    # .................................................................................................................
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._parent_timer.add_time(self._phase_name, time.perf_counter() - self._t_start)
+        return False
+
+    # .................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def set_active_timer(phase_timer):
+
+    ''' Set the timer used to record every subprocess call (use None to stop recording) '''
+
+    global _ACTIVE_TIMER
+    _ACTIVE_TIMER = phase_timer
+
+    return
+
+# .....................................................................................................................
+
+def get_active_timer():
+    return _ACTIVE_TIMER
+
+# .....................................................................................................................
+
+def build_timings_dict(phase_timer, script_name, success = True):
+
+    '''
+    Function which bundles up all of the timing data of a run into a (json-friendly) dictionary.
+    Includes phase timings, subprocess timings and any extra run info (e.g. input_bytes, output_bytes)
+    stored on the timer, along with a throughput value if enough info is available
+    '''
+
+    phase_times_dict = phase_timer.to_dict()
+    info_dict = dict(phase_timer.info_dict)
+
+    # Report throughput based on the time spent running ffmpeg, when possible
+    ffmpeg_sec = phase_times_dict.get("ffmpeg", 0)
+    input_bytes = info_dict.get("input_bytes", None)
+    throughput_bytes_per_sec = None
+    if input_bytes is not None and ffmpeg_sec > 0:
+        throughput_bytes_per_sec = round(input_bytes / ffmpeg_sec, 1)
+
+    timings_dict = {"script": script_name,
+                    "success": bool(success),
+                    "start_timestamp": round(phase_timer.start_timestamp, 3),
+                    "phase_sec": phase_times_dict,
+                    "subprocesses": phase_timer.subprocess_stats_dict(),
+                    "info": info_dict,
+                    "throughput_bytes_per_sec": throughput_bytes_per_sec}
+
+    return timings_dict
+
+# .....................................................................................................................
+
+def _format_prometheus_labels(labels_dict):
+
+    ''' Helper used to format labels for prometheus metrics, e.g. {"phase": "probing"} -> '{phase="probing"}' '''
+
+    escape_value = lambda value: str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    label_strs = ['{}="{}"'.format(each_key, escape_value(each_value)) for each_key, each_value in labels_dict.items()]
+
+    return "{{{}}}".format(",".join(label_strs))
+
+# .....................................................................................................................
+
+def build_prometheus_text(timings_dict, metric_prefix = "stitcher"):
+
+    '''
+    Function which converts timing data (see build_timings_dict(...)) into the prometheus text
+    exposition format, for use with the node-exporter 'textfile' collector. All values are gauges
+    describing the most recent run, labelled by the script that produced them
+    '''
+
+    script_labels = {"script": timings_dict["script"]}
+    metric_lines_list = []
+
+    def add_metric(metric_name, help_str, samples_list):
+        full_name = "{}_{}".format(metric_prefix, metric_name)
+        metric_lines_list.append("# HELP {} {}".format(full_name, help_str))
+        metric_lines_list.append("# TYPE {} gauge".format(full_name))
+        for each_labels_dict, each_value in samples_list:
+            metric_lines_list.append("{}{} {}".format(full_name, _format_prometheus_labels(each_labels_dict),
+                                                      float(each_value)))
+        return
+
+    # Overall run info
+    add_metric("last_run_timestamp_seconds", "Start time of the last run",
+               [(script_labels, timings_dict["start_timestamp"])])
+    add_metric("last_run_success", "Whether the last run finished without errors (1) or not (0)",
+               [(script_labels, int(timings_dict["success"]))])
+
+    # Per-phase timing
+    phase_samples_list = [(dict(script_labels, phase = each_phase), each_sec)
+                          for each_phase, each_sec in timings_dict["phase_sec"].items() if each_phase != "total"]
+    add_metric("phase_duration_seconds", "Time spent in each phase of the last run", phase_samples_list)
+    add_metric("run_duration_seconds", "Total time of the last run",
+               [(script_labels, timings_dict["phase_sec"]["total"])])
+
+    # Subprocess timing
+    subproc_items = sorted(timings_dict["subprocesses"].items())
+    add_metric("subprocess_calls", "Number of subprocess calls in the last run, by program",
+               [(dict(script_labels, program = each_name), each_stats["count"])
+                for each_name, each_stats in subproc_items])
+    add_metric("subprocess_duration_seconds", "Total time spent in subprocesses in the last run, by program",
+               [(dict(script_labels, program = each_name), each_stats["total_sec"])
+                for each_name, each_stats in subproc_items])
+
+    # Sizes & throughput
+    info_dict = timings_dict["info"]
+    metric_help_lut = {"input_files": "Number of input files in the last run",
+                       "input_bytes": "Total size of the inputs of the last run",
+                       "output_bytes": "Total size of the outputs of the last run"}
+    for each_key, each_help_str in metric_help_lut.items():
+        if info_dict.get(each_key, None) is not None:
+            add_metric(each_key, each_help_str, [(script_labels, info_dict[each_key])])
+    if timings_dict["throughput_bytes_per_sec"] is not None:
+        add_metric("throughput_bytes_per_second", "Input bytes processed per second of ffmpeg time in the last run",
+                   [(script_labels, timings_dict["throughput_bytes_per_sec"])])
+
+    return "\n".join(metric_lines_list) + "\n"
+
+# .....................................................................................................................
+
+def save_timings(timings_dict, json_path = None, prometheus_path = None):
+
+    '''
+    Function which saves timing data as json and/or as a prometheus textfile (either path can be None).
+    Files are written atomically, so that collectors never read a partially written file
+    '''
+
+    # Import here to avoid slowing down start-up when timings aren't being saved
+    from local.lib.atomic_output import write_text_atomically
+
+    saved_paths_list = []
+    if json_path is not None:
+        saved_paths_list.append(write_text_atomically(json_path, json.dumps(timings_dict, indent = 2)))
+
+    if prometheus_path is not None:
+        saved_paths_list.append(write_text_atomically(prometheus_path, build_prometheus_text(timings_dict)))
+
+    return saved_paths_list
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+
+    example_timer = Phase_Timer()
+    with example_timer.phase("example"):
+        time.sleep(0.1)
+    example_timer.info_dict["input_files"] = 2
+    print(build_prometheus_text(build_timings_dict(example_timer, "example_script")))
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 25 10:22:48 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import json
+
+from local.lib.ffmpeg_helpers import captured_subprocess
+from local.lib.probing import probe_video_info, get_probed_duration_sec
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def verify_mode_names():
+
+    '''
+    List of supported output verification modes:
+        "off" -> No verification (beyond checking the ffmpeg return code)
+        "packets" -> Compare per-stream packet counts & durations of the output against the inputs
+        "hashes" -> Also compare packet hashes around a sample of clip boundaries (proves a lossless copy)
+    '''
+
+    return ["off", "packets", "hashes"]
+
+# .....................................................................................................................
+
+def probe_stream_packets(video_path):
+
+    '''
+    Function which asks ffprobe to count the packets of every stream of a video. This requires reading
+    through the whole file (though nothing is decoded). Returns None if probing fails, otherwise a list:
+        [{"index": 0, "codec_type": "video", "codec_tag": "avc1", "packets": 600, "duration_sec": 20.0}, {...}, ...]
+
+    Stream durations will be None for containers that don't record them (e.g. mkv)
+    '''
+
+    run_command_list = ["ffprobe",
+                        "-v", "error",
+                        "-count_packets",
+                        "-show_entries", "stream=index,codec_type,codec_tag_string,nb_read_packets,duration",
+                        "-of", "json",
+                        video_path]
+    proc_out = captured_subprocess(run_command_list)
+
+    # Bail if probing fails, so callers can decide how to handle it
+    if proc_out.returncode != 0:
+        return None
+
+    try:
+        streams_list = json.loads(proc_out.stdout.decode()).get("streams", [])
+    except ValueError:
+        return None
+
+    stream_packets_list = []
+    for each_stream in streams_list:
+        try:
+            duration_sec = float(each_stream["duration"])
+        except (KeyError, ValueError):
+            duration_sec = None
+        stream_packets_list.append({"index": each_stream.get("index"),
+                                    "codec_type": each_stream.get("codec_type"),
+                                    "codec_tag": each_stream.get("codec_tag_string"),
+                                    "packets": int(each_stream.get("nb_read_packets", 0)),
+                                    "duration_sec": duration_sec})
+
+    return stream_packets_list
+
+# .....................................................................................................................
+
+def read_packet_hashes(video_path, read_interval_str):
+
+    '''
+    Function which hashes (md5) the data of every packet within a read interval of a video, without decoding.
+    This is equivalent to running the framemd5 muxer on stream copied packets, but ffprobe can seek
+    to the interval instead of reading the whole file. See the ffprobe '-read_intervals' option for the
+    interval syntax (e.g. "18.5%" reads from 18.5 seconds to the end, "%+2" reads the first 2 seconds)
+
+    Outputs:
+        packet_hashes_dict (or None if probing fails)
+
+    Where packet_hashes_dict has the form:
+        {stream_index: ["size:hash", "size:hash", ...], ...}
+    '''
+
+    run_command_list = ["ffprobe",
+                        "-v", "error",
+                        "-read_intervals", read_interval_str,
+                        "-show_data_hash", "MD5",
+                        "-show_entries", "packet=stream_index,size,data_hash",
+                        "-of", "csv=p=0",
+                        video_path]
+    proc_out = captured_subprocess(run_command_list)
+
+    if proc_out.returncode != 0:
+        return None
+
+    # Collect hashes by stream, in packet order
+    packet_hashes_dict = {}
+    for each_line in proc_out.stdout.decode(errors = "ignore").splitlines():
+        line_parts = each_line.strip().split(",")
+        if len(line_parts) < 3:
+            continue
+        stream_index, packet_size, packet_hash = line_parts[:3]
+        packet_hashes_dict.setdefault(int(stream_index), []).append("{}:{}".format(packet_size, packet_hash))
+
+    return packet_hashes_dict
+
+# .....................................................................................................................
+
+def _run_concurrently(func, args_list, max_workers = 8):
+
+    ''' Helper used to run a (subprocess heavy) function on many inputs in parallel, keeping the input order '''
+
+    # Thread pool import is deferred, since it noticeably adds to start-up time
+    from concurrent.futures import ThreadPoolExecutor
+
+    num_workers = max(1, min(max_workers, len(args_list)))
+    with ThreadPoolExecutor(max_workers = num_workers) as executor:
+        results_list = list(executor.map(lambda each_args: func(*each_args), args_list))
+
+    return results_list
+
+# .....................................................................................................................
+
+def verify_stream_packets(output_path, input_file_paths_list,
+                          trimmed_sec = 0.0,
+                          tolerance_sec = 1.0,
+                          per_input_tolerance_sec = 0.05,
+                          max_workers = 8):
+
+    '''
+    Function which checks that a stitched output contains every packet of the inputs, by comparing the
+    packet count & duration of each output stream to the sum over the same stream of every input.
+    Packet counts must match exactly (stream copying never adds or drops packets), while durations
+    are allowed to drift slightly with each input (e.g. from audio priming or rounding).
+    If inputs were trimmed (e.g. to remove overlaps), the total trimmed time should be given. In this case
+    packet counts can't be matched exactly, so the output only needs to have no more packets than the inputs,
+    and must be shorter than the inputs by the trimmed amount. The output & inputs are all probed concurrently.
+
+    Outputs:
+        packet_check_dict
+
+    Where packet_check_dict has the form:
+        {"status": "ok" or "mismatch" or "unverified",
+         "streams": [{"index", "codec_type", "status",
+                      "expected_packets", "output_packets", "expected_duration_sec", "output_duration_sec"}, ...]}
+    '''
+
+    all_paths_list = [output_path] + list(input_file_paths_list)
+    all_packets_list = _run_concurrently(probe_stream_packets, [(each_path,) for each_path in all_paths_list],
+                                         max_workers)
+    output_streams_list, input_streams_lists = all_packets_list[0], all_packets_list[1:]
+    if output_streams_list is None:
+        return {"status": "unverified", "streams": []}
+
+    allowed_error_sec = tolerance_sec + per_input_tolerance_sec * len(input_file_paths_list)
+    stream_checks_list = []
+    for each_out_stream in output_streams_list:
+
+        # Skip the text track that mp4/mov outputs use to hold chapters, since it isn't copied from the inputs
+        if each_out_stream["codec_type"] == "data" and each_out_stream["codec_tag"] == "text":
+            continue
+
+        # Add up the matching stream from every input (the concat demuxer maps streams by index)
+        stream_idx = each_out_stream["index"]
+        expected_packets, expected_duration_sec = 0, 0.0
+        for each_in_streams in input_streams_lists:
+            in_stream = None
+            if each_in_streams is not None and stream_idx < len(each_in_streams):
+                in_stream = each_in_streams[stream_idx]
+            if in_stream is None or in_stream["codec_type"] != each_out_stream["codec_type"]:
+                expected_packets, expected_duration_sec = None, None
+                break
+            expected_packets += in_stream["packets"]
+            if expected_duration_sec is not None and in_stream["duration_sec"] is not None:
+                expected_duration_sec += in_stream["duration_sec"]
+            else:
+                expected_duration_sec = None
+
+        # Judge the stream, if we know what to expect
+        output_duration_sec = each_out_stream["duration_sec"]
+        stream_status = "unverified"
+        if expected_packets is not None:
+            packets_match = (expected_packets == each_out_stream["packets"])
+            if trimmed_sec > 0:
+                packets_match = (each_out_stream["packets"] <= expected_packets)
+            durations_match = True
+            if expected_duration_sec is not None and output_duration_sec is not None:
+                expected_duration_sec -= trimmed_sec
+                durations_match = (abs(output_duration_sec - expected_duration_sec) <= allowed_error_sec)
+            stream_status = "ok" if (packets_match and durations_match) else "mismatch"
+
+        stream_checks_list.append({"index": stream_idx,
+                                   "codec_type": each_out_stream["codec_type"],
+                                   "status": stream_status,
+                                   "expected_packets": expected_packets,
+                                   "output_packets": each_out_stream["packets"],
+                                   "expected_duration_sec": expected_duration_sec,
+                                   "output_duration_sec": output_duration_sec})
+
+    # Any mismatch fails the whole check, otherwise the output is only ok if every stream could be checked
+    stream_statuses_list = [each_check["status"] for each_check in stream_checks_list]
+    overall_status = "unverified"
+    if "mismatch" in stream_statuses_list:
+        overall_status = "mismatch"
+    elif len(stream_statuses_list) > 0 and all(each_status == "ok" for each_status in stream_statuses_list):
+        overall_status = "ok"
+
+    return {"status": overall_status, "streams": stream_checks_list}
+
+# .....................................................................................................................
+
+def pick_sample_indices(num_items, num_samples):
+
+    ''' Helper used to pick evenly spaced (unique) indices, always including the first & last items '''
+
+    if num_items <= num_samples:
+        return list(range(num_items))
+    if num_samples == 1:
+        return [0]
+
+    step_size = (num_items - 1) / (num_samples - 1)
+    return sorted(set(int(round(each_idx * step_size)) for each_idx in range(num_samples)))
+
+# .....................................................................................................................
+
+def _contains_sequence(packets_list, sequence_list):
+
+    '''
+    Helper used to check if a sequence of packet hashes appears (contiguously) within a list of packets.
+    Entries of None in the sequence match any packet
+    '''
+
+    sequence_length = len(sequence_list)
+    if sequence_length == 0:
+        return True
+
+    for start_idx in range(len(packets_list) - sequence_length + 1):
+        window_list = packets_list[start_idx:(start_idx + sequence_length)]
+        if all(each_seq in (None, each_pkt) for each_seq, each_pkt in zip(sequence_list, window_list)):
+            return True
+
+    return False
+
+# .....................................................................................................................
+
+def verify_boundary_hashes(output_path, probe_results_list,
+                           num_samples = 3,
+                           window_sec = 2.0,
+                           num_packets = 8,
+                           max_workers = 8):
+
+    '''
+    Function which proves that inputs were copied into the output without modification, by hashing
+    the packets around a sample of clip boundaries. For each sampled boundary, the last few packets of
+    one input and the first few packets of the next are hashed (per stream) and must appear, back-to-back,
+    in the output around the time of the boundary. This catches dropped, duplicated or altered packets
+    right where stitching problems happen, while only reading a few seconds of each file.
+
+    The first packet of each input is allowed to differ, since the concat demuxer may add codec parameter
+    sets to it (e.g. h264 SPS/PPS, when switching files). Note that this check only makes sense if
+    no bitstream filters were used, since they modify packet data!
+
+    Outputs:
+        boundary_check_dict
+
+    Where boundary_check_dict has the form:
+        {"status": "ok" or "mismatch" or "unverified",
+         "boundaries": [{"index", "output_time_sec", "status", "mismatched_streams"}, ...]}
+    '''
+
+    # We need every duration to figure out where each boundary lands in the output
+    input_durations_list = [get_probed_duration_sec(each_result) for each_result in probe_results_list]
+    output_probe = probe_video_info(output_path)
+    if (not all(input_durations_list)) or (output_probe is None) or (len(probe_results_list) < 2):
+        return {"status": "unverified", "boundaries": []}
+
+    # Figure out the timing of each boundary, in the timestamps of the output & inputs
+    get_start_sec = lambda probe_result: float(probe_result["format"].get("start_time", 0.0) or 0.0)
+    output_start_sec = get_start_sec(output_probe)
+    boundary_indices_list = pick_sample_indices(len(probe_results_list) - 1, num_samples)
+
+    # Queue up reads of the output (around the boundary) and of the end/start of the inputs on either side
+    read_args_list = []
+    boundary_times_list = []
+    for each_idx in boundary_indices_list:
+        boundary_sec = output_start_sec + sum(input_durations_list[:(each_idx + 1)])
+        tail_start_sec = get_start_sec(probe_results_list[each_idx]) + input_durations_list[each_idx] - window_sec
+        head_end_sec = get_start_sec(probe_results_list[each_idx + 1]) + window_sec
+        read_args_list += [(output_path, "{:.6f}%{:.6f}".format(boundary_sec - window_sec, boundary_sec + window_sec)),
+                           (probe_results_list[each_idx]["path"], "{:.6f}%".format(max(0.0, tail_start_sec))),
+                           (probe_results_list[each_idx + 1]["path"], "%{:.6f}".format(head_end_sec))]
+        boundary_times_list.append(boundary_sec - output_start_sec)
+    hashes_list = _run_concurrently(read_packet_hashes, read_args_list, max_workers)
+
+    # Check that the packets on either side of each boundary show up (in order) in the output
+    boundary_checks_list = []
+    for list_idx, each_idx in enumerate(boundary_indices_list):
+        output_hashes, tail_hashes, head_hashes = hashes_list[(3 * list_idx):(3 * list_idx + 3)]
+        boundary_status = "unverified"
+        mismatched_streams_list = []
+        if None not in (output_hashes, tail_hashes, head_hashes):
+            for each_stream_idx, each_output_list in output_hashes.items():
+                head_list = head_hashes.get(each_stream_idx, [])[:num_packets]
+                expected_list = tail_hashes.get(each_stream_idx, [])[-num_packets:]
+                expected_list += [None] + head_list[1:] if len(head_list) > 0 else []
+                if not _contains_sequence(each_output_list, expected_list):
+                    mismatched_streams_list.append(each_stream_idx)
+            boundary_status = "mismatch" if len(mismatched_streams_list) > 0 else "ok"
+
+        boundary_checks_list.append({"index": each_idx,
+                                     "output_time_sec": round(boundary_times_list[list_idx], 3),
+                                     "status": boundary_status,
+                                     "mismatched_streams": mismatched_streams_list})
+
+    # Any mismatch fails the whole check
+    boundary_statuses_list = [each_check["status"] for each_check in boundary_checks_list]
+    overall_status = "unverified"
+    if "mismatch" in boundary_statuses_list:
+        overall_status = "mismatch"
+    elif all(each_status == "ok" for each_status in boundary_statuses_list):
+        overall_status = "ok"
+
+    return {"status": overall_status, "boundaries": boundary_checks_list}
+
+# .....................................................................................................................
+
+def verification_feedback(packet_check_dict, boundary_check_dict = None):
+
+    ''' Function which prints out the results of verifying an output, with extra detail on any problems '''
+
+    # Bundle up the results of each check that was run
+    checks_list = [("Packet counts & durations", packet_check_dict)]
+    if boundary_check_dict is not None:
+        checks_list.append(("Clip boundary hashes", boundary_check_dict))
+
+    print("", "Output verification:", sep = "\n")
+    for each_name, each_check_dict in checks_list:
+        print("  {}: {}".format(each_name, each_check_dict["status"]))
+        if "reason" in each_check_dict:
+            print("    ({})".format(each_check_dict["reason"]))
+
+    # Show the details of anything that didn't match
+    problems_list = []
+    for each_stream in packet_check_dict["streams"]:
+        if each_stream["status"] == "mismatch":
+            problems_list.append("Stream {} ({}): expected {} packets, got {} (duration: {} vs. {})".format(
+                each_stream["index"], each_stream["codec_type"], each_stream["expected_packets"],
+                each_stream["output_packets"], each_stream["expected_duration_sec"],
+                each_stream["output_duration_sec"]))
+    if boundary_check_dict is not None:
+        for each_boundary in boundary_check_dict.get("boundaries", []):
+            if each_boundary["status"] == "mismatch":
+                problems_list.append("Boundary after input {} (@ {} s): packets differ on streams {}".format(
+                    1 + each_boundary["index"], each_boundary["output_time_sec"],
+                    each_boundary["mismatched_streams"]))
+
+    if len(problems_list) > 0:
+        print("",
+              "!" * 48,
+              "WARNING: Output does not match the inputs! It may be truncated or missing segments",
+              *problems_list,
+              "!" * 48,
+              sep = "\n")
+
+    return
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+    pass
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
+
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 24 09:58:21 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import os
+
+# Loaded fallocate function (or None if unavailable), so libc is only searched for once per session
+_FALLOCATE_FUNC_CACHE = {}
+
+# Flag telling fallocate to reserve space without changing the (reported) file size, from linux/falloc.h
+_FALLOC_FL_KEEP_SIZE = 0x01
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define classes
+
+
+class Periodic_Syncer:
+
+    '''
+    Class used to flush an output file to disk periodically while ffmpeg is writing it (see fsync policies).
+    Without this, the OS may hold gigabytes of unwritten data in memory and then flush it all at once
+    (e.g. when the output is committed), which stalls the end of the job and other programs using the disk.
+    Flushing happens on a background thread, triggered by ffmpeg progress reports (see Process_Supervisor).
+
+    Example usage:
+        syncer = Periodic_Syncer(output_path, sync_interval_bytes = 256 * (1024 ** 2))
+        supervised_subprocess(run_command_list, progress_callback = syncer.on_progress)
+        syncer.finish()
+    '''
+
+    # .................................................................................................................
+
+    def __init__(self, file_path, sync_interval_bytes = 256 * (1024 ** 2)):
+
+        # Store inputs
+        self.file_path = file_path
+        self.sync_interval_bytes = sync_interval_bytes
+
+        # Storage for syncing state
+        self.num_syncs = 0
+        self._last_sync_bytes = 0
+        self._sync_thread = None
+
+    # .................................................................................................................
+
+    def on_progress(self, report_values_dict):
+
+        ''' Handle a (parsed) ffmpeg progress report, for use as a progress callback '''
+
+        try:
+            written_bytes = int(report_values_dict.get("total_size", 0))
+        except ValueError:
+            return
+
+        # Only sync when enough new data has been written, and never more than one sync at a time
+        sync_in_progress = (self._sync_thread is not None) and self._sync_thread.is_alive()
+        need_sync = ((written_bytes - self._last_sync_bytes) >= self.sync_interval_bytes)
+        if need_sync and not sync_in_progress:
+
+            # Thread import is deferred, since it's only needed when syncing periodically
+            from threading import Thread
+
+            self._last_sync_bytes = written_bytes
+            self._sync_thread = Thread(target = sync_file_data, args = (self.file_path,), daemon = True)
+            self._sync_thread.start()
+            self.num_syncs += 1
+
+        return
+
+    # .................................................................................................................
+
+    def finish(self):
+
+        ''' Wait for any in-progress sync to finish '''
+
+        if self._sync_thread is not None:
+            self._sync_thread.join()
+
+        return
+
+    # .................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def fsync_policy_names():
+
+    '''
+    List of supported output flushing policies:
+        "none" -> Never force data to disk (fastest, but a crash may leave a corrupt 'finished' output)
+        "end" -> Flush the output to disk once, before moving it into place
+        "periodic" -> Also flush while writing, to avoid large bursts of writes at the end of a job
+    '''
+
+    return ["none", "end", "periodic"]
+
+# .....................................................................................................................
+
+def _get_fallocate_func():
+
+    ''' Helper used to load the (linux-only) fallocate function from libc, using ctypes. Returns None if missing '''
+
+    if "fallocate" not in _FALLOCATE_FUNC_CACHE:
+        fallocate_func = None
+        try:
+            import ctypes
+            import ctypes.util
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno = True)
+            fallocate_func = libc.fallocate
+            fallocate_func.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int64, ctypes.c_int64]
+            fallocate_func.restype = ctypes.c_int
+        except (ImportError, OSError, AttributeError, TypeError):
+            fallocate_func = None
+        _FALLOCATE_FUNC_CACHE["fallocate"] = fallocate_func
+
+    return _FALLOCATE_FUNC_CACHE["fallocate"]
+
+# .....................................................................................................................
+
+def preallocate_file(file_path, num_bytes):
+
+    '''
+    Function which creates an (empty) file with disk space reserved for it, so that the file system
+    can place the file contiguously rather than piecing it together as it is written (which badly
+    fragments large files on busy disks). Space is reserved without changing the file size (FALLOC_FL_KEEP_SIZE),
+    so the file still appears empty. Any space that ends up unused should be freed, see trim_preallocation(...)
+
+    Returns True if space was reserved, or False if not supported (in which case no file is created)
+    '''
+
+    fallocate_func = _get_fallocate_func()
+    if fallocate_func is None or num_bytes <= 0:
+        return False
+
+    file_fd = os.open(file_path, os.O_WRONLY | os.O_CREAT, 0o644)
+    try:
+        is_allocated = (fallocate_func(file_fd, _FALLOC_FL_KEEP_SIZE, 0, int(num_bytes)) == 0)
+    finally:
+        os.close(file_fd)
+
+    # Don't leave behind an empty file if the file system doesn't support preallocation
+    if not is_allocated:
+        os.remove(file_path)
+
+    return is_allocated
+
+# .....................................................................................................................
+
+def trim_preallocation(file_path):
+
+    '''
+    Function which frees any reserved space beyond the end of a (preallocated) file, for cases where the
+    final file ended up smaller than expected. Truncating only frees space when shrinking a file,
+    so the file is grown by 1 byte and then shrunk back to its original size
+    '''
+
+    file_size_bytes = os.path.getsize(file_path)
+    with open(file_path, "r+b") as out_file:
+        os.ftruncate(out_file.fileno(), file_size_bytes + 1)
+        os.ftruncate(out_file.fileno(), file_size_bytes)
+
+    return
+
+# .....................................................................................................................
+
+def build_write_args(is_preallocated = False, block_size_bytes = None):
+
+    '''
+    Function which builds (output) ffmpeg arguments for tuning how the output file is written.
+    Preallocated outputs must not be truncated when ffmpeg opens them, since that would free the
+    reserved space. Since the (preallocated) output already exists, ffmpeg also has to be told to
+    overwrite it, otherwise it would ask for confirmation. The block size sets the maximum size of each write.
+
+    Outputs:
+        write_args_list
+    '''
+
+    write_args_list = []
+    if is_preallocated:
+        write_args_list += ["-y", "-truncate", "0"]
+    if block_size_bytes is not None:
+        write_args_list += ["-blocksize", str(int(block_size_bytes))]
+
+    return write_args_list
+
+# .....................................................................................................................
+
+def sync_file_data(file_path):
+
+    ''' Helper used to flush a file's data to disk (skipping metadata, where supported) '''
+
+    sync_func = os.fdatasync if hasattr(os, "fdatasync") else os.fsync
+    try:
+        file_fd = os.open(file_path, os.O_RDONLY)
+    except OSError:
+        # File may not have been created yet
+        return
+    try:
+        sync_func(file_fd)
+    finally:
+        os.close(file_fd)
+
+    return
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Demo
+
+if __name__ == "__main__":
+
+    print("Preallocation supported:", _get_fallocate_func() is not None)
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
+
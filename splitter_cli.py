@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 10:48:09 2026
+
+@author: eo
+"""
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Imports
+
+import os
+import sys
+import argparse
+
+from local.lib.history import load_default_search_directory, save_search_directory
+from local.lib.selection import select_input_files, print_file_listing, get_output_name, get_output_folder
+from local.lib.selection import parse_exts_arg
+from local.lib.selection import confirm_segments_overwrite
+from local.lib.splitting import parse_time_to_sec, parse_size_to_bytes, parse_timestamps_list
+from local.lib.splitting import segment_time_from_size, build_segment_pattern, build_split_command
+from local.lib.splitting import find_created_segments, run_parallel_splits
+from local.lib.preflight import check_split_space, space_check_feedback
+from local.lib.atomic_output import build_partial_path, discard_partial_output, commit_partial_folder
+from local.lib.journal import Job_Journal, build_journal_path, build_file_unit_key
+from local.lib.scheduling import Device_Limiter, get_job_device_keys
+from local.lib.timing import Phase_Timer, set_active_timer, build_timings_dict, save_timings
+from local.lib.reporting import parse_ffmpeg_messages, build_inputs_report, build_report_path, write_run_report
+from local.lib.ffmpeg_helpers import check_req_installs, get_save_extension
+
+from local.eolib.utils.files import get_total_file_size
+
+from local.eolib.utils.cli_tools import cli_prompt_with_defaults
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Define functions
+
+# .....................................................................................................................
+
+def parse_args():
+
+    # Set up argparser options
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-f", "--folder", default = None, type = str, help = "Folder containing videos to split")
+    ap.add_argument("-r", "--recursive", default = False, action = "store_true",
+                    help = "Also search sub-folders of the input folder for videos")
+    ap.add_argument("-e", "--exts", default = None, type = str,
+                    help = "Comma separated list of file extensions to use from the input folder (or 'all')")
+    ap.add_argument("--include", default = None, type = str, action = "append",
+                    help = "Only use input folder files matching this glob pattern (e.g. 'cam1_*'). Can be repeated")
+    ap.add_argument("--exclude", default = None, type = str, action = "append",
+                    help = "Skip input folder files/folders matching this glob pattern. Can be repeated")
+    ap.add_argument("-o", "--sortby", default = "name", type = str, choices = ["name", "natural", "mtime"],
+                    help = "Ordering of input files. Natural sorting orders numbers by value (e.g. 9 before 10)")
+    ap.add_argument("-l", "--latest", default = None, type = int,
+                    help = "Only use this many of the most recently modified files from the input folder")
+    ap.add_argument("-n", "--outname", default = None, type = str, help = "Output segment file name")
+    ap.add_argument("-p", "--outpath", default = None, type = str, help = "Output segment file path")
+    ap.add_argument("-d", "--duration", default = None, type = str,
+                    help = "Target duration of each segment (e.g. 600 or 00:10:00)")
+    ap.add_argument("-s", "--size", default = None, type = str,
+                    help = "Target size of each segment (e.g. 250M or 2G)")
+    ap.add_argument("-t", "--timestamps", default = None, type = str,
+                    help = "Comma separated list of times to cut at (e.g. 10:00,25:30,1:00:00)")
+    ap.add_argument("-j", "--jobs", default = 4, type = int, help = "Number of input files to split in parallel")
+    ap.add_argument("--iolimit", default = "device", type = str, choices = ["device", "off"],
+                    help = "Limit parallel jobs on each storage device (tuned automatically based on throughput)")
+    ap.add_argument("--timeout", default = None, type = float,
+                    help = "Stop splitting any file that takes longer than this many seconds")
+    ap.add_argument("--stalltimeout", default = 600, type = float,
+                    help = "Stop splitting any file that makes no progress for this many seconds (0 to disable)")
+    ap.add_argument("-k", "--spacecheck", default = "refuse", type = str, choices = ["refuse", "warn", "off"],
+                    help = "How to handle outputs that may not fit in the free space of the output folder")
+    ap.add_argument("--timings", default = None, type = str,
+                    help = "Save timing of each phase of the run to this (json) file path")
+    ap.add_argument("--promfile", default = None, type = str,
+                    help = "Save run metrics to this path, as a prometheus textfile (for node-exporter)")
+    ap.add_argument("--report", default = "none", type = str, choices = ["none", "json"],
+                    help = "Save a machine-readable report of the run (saved next to the outputs by default)")
+    ap.add_argument("--reportpath", default = None, type = str,
+                    help = "Path to save the run report. Use '-' to print the report to stdout")
+
+    # Convert argument inputs into a dictionary
+    ap_result = vars(ap.parse_args())
+
+    return ap_result
+
+# .....................................................................................................................
+
+def split_feedback(input_file_path, subproc_return, output_segment_pattern, human_readable_command_str):
+
+    # Check how many segments were created for the given input
+    input_name = os.path.basename(input_file_path)
+    created_segments_list = find_created_segments(output_segment_pattern)
+    num_segments = len(created_segments_list)
+
+    # Figure out what kind of feedback to give
+    return_code = subproc_return.returncode
+    no_errors = (return_code == 0)
+    if no_errors:
+        print("  {} -> {} segments".format(input_name, num_segments))
+    else:
+        print("",
+              "!" * 48,
+              "",
+              "Possible error splitting: {}".format(input_name),
+              "Got return code: {} ({})".format(return_code, subproc_return.status),
+              "Created {} segments...".format(num_segments),
+              "",
+              "Using command:",
+              "  {}".format(human_readable_command_str),
+              "",
+              "!" * 48,
+              sep="\n")
+
+    return no_errors
+
+# .....................................................................................................................
+# .....................................................................................................................
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Setup
+
+# Get script arguments
+input_args = parse_args()
+arg_input_folder = input_args.get("folder")
+arg_output_name = input_args.get("outname")
+arg_output_path = input_args.get("outpath")
+arg_recursive = input_args.get("recursive")
+arg_exts_list = parse_exts_arg(input_args.get("exts"))
+arg_include_globs = input_args.get("include")
+arg_exclude_globs = input_args.get("exclude")
+arg_sort_by = input_args.get("sortby")
+arg_latest_count = input_args.get("latest")
+arg_duration = input_args.get("duration")
+arg_size = input_args.get("size")
+arg_timestamps = input_args.get("timestamps")
+arg_num_jobs = input_args.get("jobs")
+arg_io_limit = input_args.get("iolimit")
+arg_timeout_sec = input_args.get("timeout")
+arg_stall_timeout_sec = input_args.get("stalltimeout")
+arg_space_check = input_args.get("spacecheck")
+arg_timings_path = input_args.get("timings")
+arg_promfile_path = input_args.get("promfile")
+arg_report_format = input_args.get("report")
+arg_report_path = input_args.get("reportpath")
+
+# When printing the report to stdout, move all other feedback to stderr so the report can be parsed directly
+report_stream = sys.stdout
+if arg_report_format != "none" and arg_report_path == "-":
+    sys.stdout = sys.stderr
+
+# Try to make sure ffmpeg and ranger are installed
+check_req_installs()
+
+# Start timing each phase of the run (including every subprocess call)
+run_timer = Phase_Timer()
+set_active_timer(run_timer)
+
+# Get file search directory
+run_timer.start_phase("history")
+video_search_directory = load_default_search_directory()
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Select videos to split
+
+# Get the user to select videos or use the script argument
+run_timer.start_phase("selection")
+input_file_paths_list = select_input_files(arg_input_folder, video_search_directory,
+                                           use_gui = False,
+                                           action_name = "splitting",
+                                           recursive = arg_recursive,
+                                           allowable_exts_list = arg_exts_list,
+                                           include_globs_list = arg_include_globs,
+                                           exclude_globs_list = arg_exclude_globs,
+                                           sort_by = arg_sort_by,
+                                           latest_count = arg_latest_count)
+
+# Sanity check
+num_videos_to_split = len(input_file_paths_list)
+no_paths = (num_videos_to_split == 0)
+if no_paths:
+    print("", "No files found!", "  Nothing to split. Quitting...", sep = "\n")
+    quit()
+
+# Save the loading directory, for easier re-use
+run_timer.start_phase("history")
+parent_folder_path = save_search_directory(input_file_paths_list[0])
+
+# Print out files for confirmation
+print_file_listing(input_file_paths_list, "Files to split:")
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Figure out segmenting
+
+# Make sure only one segmenting option was given
+run_timer.start_phase("planning")
+num_split_options = sum([each_arg is not None for each_arg in (arg_duration, arg_size, arg_timestamps)])
+if num_split_options > 1:
+    print("", "Only one of duration, size or timestamps can be used for splitting! Quitting...", sep = "\n")
+    quit()
+
+# Ask for a segment duration if no segmenting option was provided
+if num_split_options == 0:
+    arg_duration = cli_prompt_with_defaults("Enter segment duration: ", default_value = "00:10:00", return_type = str)
+
+# Interpret the segmenting option
+try:
+    segment_time_sec = parse_time_to_sec(arg_duration) if arg_duration is not None else None
+    segment_size_bytes = parse_size_to_bytes(arg_size) if arg_size is not None else None
+    segment_timestamps_list = parse_timestamps_list(arg_timestamps) if arg_timestamps is not None else None
+except ValueError as err_msg:
+    print("", "Bad segmenting option!", "  {}".format(err_msg), "", "Quitting...", sep = "\n")
+    quit()
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Figure out saving
+
+# Figure out a reasonable save name and then ask the user if they want to go with something different
+default_save_name = "part"
+user_outname = get_output_name(arg_output_name, default_save_name)
+
+# Overwrite the default output path if a script argument is available
+save_folder_path = get_output_folder(arg_output_path, parent_folder_path)
+
+# Make sure the segments will fit, since running out of space leaves behind truncated files
+run_timer.start_phase("space_check")
+if arg_space_check != "off":
+    has_enough_space, preflight_dict = check_split_space(input_file_paths_list, save_folder_path)
+    space_check_feedback(has_enough_space, preflight_dict, save_folder_path, arg_space_check)
+
+# Keep a journal of completed inputs, so that a killed job can be re-run without starting over
+journal_signature_dict = {"outname": user_outname, "outpath": os.path.abspath(save_folder_path),
+                          "duration": segment_time_sec, "size": segment_size_bytes,
+                          "timestamps": segment_timestamps_list}
+journal_path = build_journal_path(save_folder_path, "split_{}".format(user_outname))
+split_journal = Job_Journal(journal_path, journal_signature_dict)
+
+# Build the segment naming + splitting command for every input
+run_timer.start_phase("planning")
+split_jobs_list = []
+final_patterns_list = []
+num_previously_done = 0
+for each_input_path in input_file_paths_list:
+
+    # Skip inputs that were already split by a previous (interrupted) run
+    each_unit_key = build_file_unit_key(each_input_path)
+    if split_journal.is_done(each_unit_key):
+        num_previously_done += 1
+        continue
+
+    # Convert target sizes to a per-file duration, since the segment muxer only cuts on time
+    each_segment_time_sec = segment_time_sec
+    if segment_size_bytes is not None:
+        each_segment_time_sec = segment_time_from_size(each_input_path, segment_size_bytes)
+        if each_segment_time_sec is None:
+            print("", "Couldn't get duration for sizing, skipping:", "  {}".format(each_input_path), sep = "\n")
+            continue
+
+    # Segments are named after the input file, so multiple inputs don't collide
+    input_name_only, _ = os.path.splitext(os.path.basename(each_input_path))
+    save_ext = get_save_extension([each_input_path])
+    output_prefix = "{}_{}".format(input_name_only, user_outname)
+
+    # Segments are written into a hidden partial folder, and only moved into place once splitting succeeds
+    partial_folder_path = build_partial_path(os.path.join(save_folder_path, output_prefix))
+    output_pattern = build_segment_pattern(partial_folder_path, output_prefix, save_ext)
+    final_patterns_list.append(build_segment_pattern(save_folder_path, output_prefix, save_ext))
+
+    run_command_list, human_readable_str = build_split_command(each_input_path, output_pattern,
+                                                               each_segment_time_sec, segment_timestamps_list)
+    split_jobs_list.append((each_input_path, each_unit_key, partial_folder_path, output_pattern,
+                            run_command_list, human_readable_str))
+
+# Check before replacing segments left over from other runs, since committing segments overwrites them
+confirm_segments_overwrite(final_patterns_list)
+for each_job in split_jobs_list:
+    discard_partial_output(each_job[2])
+    os.makedirs(each_job[2])
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% *** FFMPEG Call ***
+
+# Some feedback
+print("", "Splitting videos...", sep = "\n")
+if num_previously_done > 0:
+    print("  (skipping {} files already split by a previous run)".format(num_previously_done))
+
+# Handle each input as soon as it is done, so progress is recorded even if the job is killed part way through
+print("", "Results:", sep = "\n")
+def on_split_complete(job_index, subproc_return):
+    
+    input_path, unit_key, partial_folder_path, output_pattern, _, human_readable_str = split_jobs_list[job_index]
+    no_errors = split_feedback(input_path, subproc_return, output_pattern, human_readable_str)
+    
+    # Move completed segments into place & record progress (partial outputs of failed jobs are already cleaned up)
+    segment_names_list = []
+    if no_errors:
+        segment_paths_list = commit_partial_folder(partial_folder_path, save_folder_path)
+        segment_names_list = [os.path.basename(each_path) for each_path in segment_paths_list]
+        run_timer.info_dict["output_bytes"] += get_total_file_size(segment_paths_list)
+        split_journal.mark_done(unit_key, {"segments": segment_names_list})
+    
+    # Keep track of results for reporting
+    stderr_str = subproc_return.stderr.decode(errors = "ignore") if subproc_return.stderr else ""
+    split_results_list.append({"input": os.path.abspath(input_path),
+                               "return_code": subproc_return.returncode,
+                               "status": subproc_return.status,
+                               "command": human_readable_str,
+                               "segments": segment_names_list,
+                               "ffmpeg_messages": parse_ffmpeg_messages(stderr_str)})
+    
+    return
+
+# Run ffmpeg commands to split videos
+run_timer.start_phase("ffmpeg")
+run_timer.info_dict["output_bytes"] = 0
+split_results_list = []
+run_commands_list = [each_job[4] for each_job in split_jobs_list]
+partial_folders_list = [each_job[2] for each_job in split_jobs_list]
+
+# Limit parallel jobs on each disk, since concurrent reads from a single (spinning) disk can be slower than serial
+device_limiter = Device_Limiter(max_per_device = arg_num_jobs) if arg_io_limit == "device" else None
+device_keys_list = [get_job_device_keys(each_job[0], save_folder_path) for each_job in split_jobs_list]
+job_bytes_list = [os.path.getsize(each_job[0]) for each_job in split_jobs_list]
+proc_outs_list = run_parallel_splits(run_commands_list, arg_num_jobs, on_split_complete, partial_folders_list,
+                                     arg_timeout_sec, arg_stall_timeout_sec,
+                                     device_limiter, device_keys_list, job_bytes_list)
+run_timer.end_phase()
+
+# Final feedback
+num_ok = num_previously_done + sum([int(each_proc_out.returncode == 0) for each_proc_out in proc_outs_list])
+all_done = (num_ok == num_videos_to_split)
+if all_done:
+    split_journal.finish()
+
+num_cancelled = sum([int(each_proc_out.status == "cancelled") for each_proc_out in proc_outs_list])
+if num_cancelled > 0:
+    print("", "Cancelled {} files, re-run with the same settings to finish splitting".format(num_cancelled), sep = "\n")
+print("",
+      "*** Done! Split {} of {} files ***".format(num_ok, num_videos_to_split),
+      "",
+      "Saved results:",
+      "@ {}".format(save_folder_path),
+      "",
+      sep = "\n")
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Save run info
+
+# Gather up info about the run, for saving timings/reports
+run_timer.info_dict.update({"input_files": len(split_jobs_list),
+                            "input_bytes": get_total_file_size([each_job[0] for each_job in split_jobs_list])})
+timings_dict = build_timings_dict(run_timer, "splitter", success = all_done)
+
+# Save timing info, if needed
+if (arg_timings_path is not None) or (arg_promfile_path is not None):
+    saved_paths_list = save_timings(timings_dict, arg_timings_path, arg_promfile_path)
+    print("Saved timings:", *["@ {}".format(each_path) for each_path in saved_paths_list], "", sep = "\n")
+
+# Save a report of the run, if needed
+if arg_report_format == "json":
+    report_dict = {"script": "splitter",
+                   "success": all_done,
+                   "inputs": build_inputs_report(input_file_paths_list),
+                   "previously_done": num_previously_done,
+                   "output_folder": os.path.abspath(save_folder_path),
+                   "output_bytes": run_timer.info_dict["output_bytes"],
+                   "jobs": sorted(split_results_list, key = lambda each_result: each_result["input"]),
+                   "devices": device_limiter.to_dict() if device_limiter is not None else None,
+                   "timings": timings_dict,
+                   "verification": {"status": "unverified"}}
+    report_path = build_report_path(save_folder_path, user_outname) if arg_report_path is None else arg_report_path
+    write_run_report(report_dict, report_path, report_stream)
+    if report_path != "-":
+        print("Saved report:", "@ {}".format(report_path), "", sep = "\n")
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+
@@ -11,19 +11,50 @@ Created on Tue Jun  2 10:00:48 2020
 #%% Imports
 
 import os
-import json
-import subprocess
+import sys
 import argparse
 
-import datetime as dt
-
-from platform import uname
-from collections import Counter
 from tempfile import TemporaryDirectory
 
-from local.eolib.utils.files import get_file_list
-from local.eolib.utils.cli_tools import cli_prompt_with_defaults
-from local.eolib.utils.ranger_tools import ranger_multifile_select
+from local.lib.history import load_default_search_directory, save_search_directory
+from local.lib.selection import select_input_files, print_file_listing, get_output_name, get_output_folder
+from local.lib.selection import parse_exts_arg
+from local.lib.selection import confirm_overwrite, confirm_segments_overwrite
+from local.lib.probing import probe_many_videos, get_probed_duration_sec
+from local.lib.dedupe import find_duplicate_inputs, duplicates_feedback
+from local.lib.timeline import start_time_source_names, detect_overlap_trims, overlap_feedback
+from local.lib.timeline import gap_policy_names, detect_gaps, get_part_start_times, gap_feedback
+from local.lib.fillers import get_stream_profile, get_filler_clip, insert_gap_fillers
+from local.lib.fillers import add_missing_audio, missing_audio_feedback
+from local.lib.packet_analysis import analyze_mode_names, numpy_available, analyze_packet_timelines
+from local.lib.packet_analysis import packet_analysis_feedback, packet_analysis_warnings
+from local.lib.chapters import chapters_supported, build_clip_timeline, split_timeline_into_parts
+from local.lib.chapters import write_chapters_file, write_clip_index
+from local.lib.stitching import build_stitch_command, build_segment_output_args
+from local.lib.splitting import build_segment_pattern
+from local.lib.engines import stitch_engine_names, select_stitch_engine, engine_feedback, ffmpeg_supports_concatf
+from local.lib.engines import run_engine_calibration, save_calibration_profile, load_calibration_profile
+from local.lib.containers import normalize_extension, get_majority_codecs
+from local.lib.containers import select_bitstream_filters, check_codec_compatibility, build_mp4_layout_args
+from local.lib.containers import estimate_moov_size_bytes
+from local.lib.preflight import check_output_space, space_check_feedback, check_scratch_space
+from local.lib.preflight import estimate_output_size_bytes
+from local.lib.atomic_output import build_partial_path, discard_partial_output, commit_partial_output
+from local.lib.atomic_output import commit_partial_folder
+from local.lib.page_cache import Input_Prefetcher
+from local.lib.staging import Input_Stager
+from local.lib.write_tuning import fsync_policy_names, preallocate_file, trim_preallocation, build_write_args
+from local.lib.write_tuning import Periodic_Syncer
+from local.lib.verification import verify_mode_names, verify_stream_packets, verify_boundary_hashes
+from local.lib.verification import verification_feedback
+from local.lib.checksums import Output_Hasher, parse_checksums_arg, is_streamable_output, write_checksum_sidecars
+from local.lib.checksums import hash_file
+from local.lib.timing import Phase_Timer, set_active_timer, build_timings_dict, save_timings
+from local.lib.reporting import parse_ffmpeg_messages, verify_output_duration, build_inputs_report
+from local.lib.reporting import build_report_path, write_run_report
+from local.lib.ffmpeg_helpers import supervised_subprocess, check_req_installs, get_save_extension, process_feedback
+
+from local.eolib.utils.files import get_total_file_size
 
 # ---------------------------------------------------------------------------------------------------------------------
 #%% Define functions
@@ -35,198 +66,92 @@ def parse_args():
     # Set up argparser options
     ap = argparse.ArgumentParser()
     ap.add_argument("-f", "--folder", default = None, type = str, help = "Folder containing videos to stitch")
+    ap.add_argument("-r", "--recursive", default = False, action = "store_true",
+                    help = "Also search sub-folders of the input folder for videos")
+    ap.add_argument("-e", "--exts", default = None, type = str,
+                    help = "Comma separated list of file extensions to use from the input folder (or 'all')")
+    ap.add_argument("--include", default = None, type = str, action = "append",
+                    help = "Only use input folder files matching this glob pattern (e.g. 'cam1_*'). Can be repeated")
+    ap.add_argument("--exclude", default = None, type = str, action = "append",
+                    help = "Skip input folder files/folders matching this glob pattern. Can be repeated")
+    ap.add_argument("-o", "--sortby", default = "name", type = str, choices = ["name", "natural", "mtime"],
+                    help = "Ordering of input files. Natural sorting orders numbers by value (e.g. 9 before 10)")
+    ap.add_argument("-l", "--latest", default = None, type = int,
+                    help = "Only use this many of the most recently modified files from the input folder")
     ap.add_argument("-n", "--outname", default = None, type = str, help = "Output video file name")
     ap.add_argument("-p", "--outpath", default = None, type = str, help = "Output video file path")
+    ap.add_argument("-x", "--outext", default = None, type = str,
+                    help = "Output video container (e.g. mp4, mkv or ts). Defaults to the most common input type")
+    ap.add_argument("-m", "--mp4layout", default = "default", type = str,
+                    choices = ["default", "faststart", "fragmented"],
+                    help = "Layout of mp4 outputs. Use faststart or fragmented for web playback")
+    ap.add_argument("--dedupe", default = "off", type = str, choices = ["on", "off"],
+                    help = "Skip input files that are byte-identical copies of an earlier input")
+    ap.add_argument("--addaudio", default = "off", type = str, choices = ["on", "off"],
+                    help = "Give input files without audio a silent audio track (copies are cached), "
+                           "so they can be stitched with files that have audio")
+    ap.add_argument("--analyze", default = "off", type = str, choices = analyze_mode_names(),
+                    help = "Check the timing of every packet of the inputs (gaps, drift, etc.) before stitching. "
+                           "Use 'only' to print the analysis and quit (requires numpy)")
+    ap.add_argument("--overlap", default = "off", type = str, choices = ["off", *start_time_source_names()],
+                    help = "Trim footage that overlaps the previous file, using start times from this source")
+    ap.add_argument("--overlapmin", default = 0.5, type = float,
+                    help = "Ignore overlaps shorter than this many seconds")
+    ap.add_argument("--gaps", default = "off", type = str, choices = gap_policy_names(),
+                    help = "How to handle time gaps between files (found using the --overlap time source, "
+                           "or auto): split the output into parts or fill the gaps with black/silence")
+    ap.add_argument("--gapmin", default = 5.0, type = float,
+                    help = "Ignore gaps shorter than this many seconds")
+    ap.add_argument("--chapters", default = "off", type = str, choices = ["on", "off"],
+                    help = "Add a chapter for each input to the output (mp4/mov/mkv outputs only)")
+    ap.add_argument("--index", default = "off", type = str, choices = ["on", "off"],
+                    help = "Save an index next to the output (json & binary), mapping output times back to "
+                           "the input file & time they came from")
+    ap.add_argument("-k", "--spacecheck", default = "refuse", type = str, choices = ["refuse", "warn", "off"],
+                    help = "How to handle outputs that may not fit in the free space of the output folder")
+    ap.add_argument("--timeout", default = None, type = float,
+                    help = "Stop stitching if it takes longer than this many seconds")
+    ap.add_argument("--stalltimeout", default = 600, type = float,
+                    help = "Stop stitching if it makes no progress for this many seconds (0 to disable)")
+    ap.add_argument("--scratch", default = None, type = str,
+                    help = "Copy inputs into this (local) folder while stitching, for inputs on slow/network storage")
+    ap.add_argument("--stagejobs", default = 4, type = int,
+                    help = "Number of inputs to copy in parallel, when using a scratch folder")
+    ap.add_argument("--cachehints", default = "on", type = str, choices = ["on", "off"],
+                    help = "Prefetch upcoming inputs into the page cache and drop used inputs/output from it")
+    ap.add_argument("--prefetch", default = 2, type = int,
+                    help = "Number of upcoming inputs to prefetch, when using cache hints")
+    ap.add_argument("--preallocate", default = "on", type = str, choices = ["on", "off"],
+                    help = "Reserve space for the output up front, to avoid fragmenting it (linux only)")
+    ap.add_argument("--blocksize", default = None, type = int,
+                    help = "Maximum size (in bytes) of each write made to the output")
+    ap.add_argument("--fsync", default = "end", type = str, choices = fsync_policy_names(),
+                    help = "When to flush the output to disk: never, once at the end, or periodically while writing")
+    ap.add_argument("--checksum", default = "off", type = str,
+                    help = "Comma separated checksums of the output to save (sha256 and/or xxh64), "
+                           "computed while writing where possible")
+    ap.add_argument("--verify", default = "off", type = str, choices = verify_mode_names(),
+                    help = "Check the output against the inputs, using packet counts (and hashes at clip boundaries)")
+    ap.add_argument("--verifysamples", default = 3, type = int,
+                    help = "Number of clip boundaries to check, when verifying with hashes")
+    ap.add_argument("--engine", default = "auto", type = str, choices = ["auto", *stitch_engine_names()],
+                    help = "Stitching engine. Auto picks the fastest valid engine for the inputs")
+    ap.add_argument("--calibrate", default = False, action = "store_true",
+                    help = "Measure the speed of each stitching engine (used by auto engine selection) and quit")
+    ap.add_argument("--timings", default = None, type = str,
+                    help = "Save timing of each phase of the run to this (json) file path")
+    ap.add_argument("--promfile", default = None, type = str,
+                    help = "Save run metrics to this path, as a prometheus textfile (for node-exporter)")
+    ap.add_argument("--report", default = "none", type = str, choices = ["none", "json"],
+                    help = "Save a machine-readable report of the run (saved next to the output by default)")
+    ap.add_argument("--reportpath", default = None, type = str,
+                    help = "Path to save the run report. Use '-' to print the report to stdout")
     
     # Convert argument inputs into a dictionary
     ap_result = vars(ap.parse_args())
     
     return ap_result
 
-# .....................................................................................................................
-
-def captured_subprocess(run_command_list):
-    ''' Use subprocess with captured stdout and stderr '''
-    return subprocess.run(run_command_list, stderr = subprocess.PIPE, stdout = subprocess.PIPE)
-
-# .....................................................................................................................
-
-def check_req_installs():
-    
-    # Make sure we use the right 'check for program' command
-    system_type = uname().system
-    system_is_windows = ("windows" in system_type.lower())
-    check_cmd = "where" if system_is_windows else "which"
-    
-    ffmpeg_check = captured_subprocess([check_cmd, "ffmpeg"])
-    ranger_check = captured_subprocess([check_cmd, "ranger"])
-    
-    if ffmpeg_check.returncode != 0:
-        print("",
-              "WARNING: Couldn't find ffmpeg! This script may fail...",
-              "On Ubuntu, install with:",
-              "",
-              "  sudo apt install ffmpeg",
-              "",
-              sep = "\n")
-    
-    if ranger_check.returncode != 0:
-        print("",
-              "WARNING: Couldn't find ranger! This script may fail...",
-              "On Ubuntu, install with:",
-              "",
-              "  sudo apt install ranger",
-              "",
-              sep = "\n")
-    
-    return
-
-# .....................................................................................................................
-
-def history_date_format():
-    return "%Y/%m/%d"
-
-# .....................................................................................................................
-
-def history_save_data(search_directory, date_dt):
-    
-    # Some useful variables
-    history_file = ".history.json"    
-    date_str = date_dt.strftime(history_date_format())
-    
-    # Create a new history data
-    date_str = date_dt.strftime(history_date_format())
-    save_data = {"search_directory": search_directory, "last_used_date": date_str}
-    
-    return history_file, save_data
-
-# .....................................................................................................................
-
-def load_default_search_directory():
-    
-    # Get current date, since we'll use this to determine if the history is 'fresh' enough to use
-    date_now_dt = dt.datetime.now()
-    default_directory = "~/Desktop"
-    
-    # Save a new history file if one doesn't already exist
-    history_file, default_history = history_save_data(default_directory, date_now_dt)
-    if not os.path.exists(history_file):
-        with open(history_file, "w") as out_file:
-            json.dump(default_history, out_file, indent = 2)
-    
-    # Load history file and compare with current date to decide if we should use it
-    with open(history_file, "r") as in_file:
-        history_dict = json.load(in_file)
-    
-    # Pull out history data
-    history_directory = history_dict.get("search_directory")
-    history_date = history_dict.get("last_used_date")    
-    
-    # Check if the history data is fresh enough to use
-    history_dt = dt.datetime.strptime(history_date, history_date_format())
-    history_age_delta = (date_now_dt - history_dt)
-    fresh_enough = (history_age_delta < dt.timedelta(days = 1))
-    
-    search_directory = history_directory if fresh_enough else default_directory
-    
-    return search_directory
-
-# .....................................................................................................................
-
-def save_search_directory(example_file_path):
-    
-    # Get data to save into history file
-    date_now_dt = dt.datetime.now()
-    parent_folder_path = os.path.dirname(example_file_path)
-    
-    # Remove user pathing for cleanliness
-    user_path = os.path.expanduser("~")
-    save_file_directory = parent_folder_path.replace(user_path, "~")
-    
-    # Construct saving dictionary and save the file!
-    history_file, save_data = history_save_data(save_file_directory, date_now_dt)
-    with open(history_file, "w") as out_file:
-        json.dump(save_data, out_file, indent = 2)
-    
-    return parent_folder_path
-
-# .....................................................................................................................
-
-def get_save_extension(input_file_paths_list):
-    
-    # First split ext off every file
-    file_exts_only = [os.path.splitext(each_path)[1].lower() for each_path in input_file_paths_list]
-    
-    # Count occurances of extensions (in case there is more than one) and pick the most common
-    ext_counter = Counter(file_exts_only)
-    ordered_exts_list = ext_counter.most_common()
-    save_ext, num_occurances = ordered_exts_list[0]
-    
-    # Provide feedback if we got multiple extension types
-    num_exts = len(ordered_exts_list)
-    if num_exts > 1:
-        print("", 
-              "Got more than 1 file extension type!",
-              "Will use: {}".format(save_ext),
-              "However, different extensions may cause errors while stitching...",
-              sep = "\n")
-    
-    return save_ext
-
-# .....................................................................................................................
-
-def build_ffmpeg_command(input_text_file_path, output_video_path):
-    
-    # Build command used to stitch files from terminal
-    run_command_list = ["ffmpeg", 
-                        "-f", "concat",
-                        "-safe", "0",
-                        "-i", input_text_file_path,
-                        "-c", "copy",
-                        output_video_path]
-    
-    # Also make a human reable version (by removing full pathing), in case the user needs to debug
-    human_friendly_list = ["ffmpeg", 
-                           "-f", "concat",
-                           "-safe", "0",
-                           "-i", "<file_list_txt>",
-                           "-c", "copy",
-                           "<output_path>"]
-    human_readable_str = " ".join(human_friendly_list)
-    
-    return run_command_list, human_readable_str
-
-# .....................................................................................................................
-
-def process_feedback(subproc_return, output_save_path, human_readable_command_str):
-    
-    # Figure out what kind of feedback to give
-    return_code = subproc_return.returncode
-    no_errors = (return_code == 0)
-    if no_errors:
-        print("",
-              "*** Done! No errors ***", 
-              "",
-              "Saved result:",
-              "@ {}".format(output_save_path),
-              "", 
-              sep="\n")
-    else:
-        save_exists = os.path.exists(output_save_path)
-        print("", 
-              "!" * 48,
-              "",
-              "Possible error! Got return code: {}".format(return_code),
-              "File {} saved...".format("was" if save_exists else "was not"),
-              "",
-              "Using command:",
-              "  {}".format(human_readable_command_str),
-              "",
-              "!" * 48,
-              sep="\n")
-    
-    return
-
 # .....................................................................................................................
 # .....................................................................................................................
 
@@ -234,16 +159,75 @@ def process_feedback(subproc_return, output_save_path, human_readable_command_st
 # ---------------------------------------------------------------------------------------------------------------------
 #%% Setup
         
-# Try to make sure ffmpeg and ranger are installed
-check_req_installs()
-
 # Get script arguments
 input_args = parse_args()
 arg_input_folder = input_args.get("folder")
 arg_output_name = input_args.get("outname")
 arg_output_path = input_args.get("outpath")
+arg_recursive = input_args.get("recursive")
+arg_exts_list = parse_exts_arg(input_args.get("exts"))
+arg_include_globs = input_args.get("include")
+arg_exclude_globs = input_args.get("exclude")
+arg_sort_by = input_args.get("sortby")
+arg_latest_count = input_args.get("latest")
+arg_output_ext = input_args.get("outext")
+arg_mp4_layout = input_args.get("mp4layout")
+arg_dedupe = input_args.get("dedupe")
+arg_add_audio = input_args.get("addaudio")
+arg_analyze_mode = input_args.get("analyze")
+arg_overlap_source = input_args.get("overlap")
+arg_min_overlap_sec = input_args.get("overlapmin")
+arg_gap_policy = input_args.get("gaps")
+arg_min_gap_sec = input_args.get("gapmin")
+arg_chapters = input_args.get("chapters")
+arg_index = input_args.get("index")
+arg_space_check = input_args.get("spacecheck")
+arg_timeout_sec = input_args.get("timeout")
+arg_stall_timeout_sec = input_args.get("stalltimeout")
+arg_scratch_folder = input_args.get("scratch")
+arg_scratch_folder = os.path.expanduser(arg_scratch_folder) if arg_scratch_folder is not None else None
+arg_num_stage_jobs = input_args.get("stagejobs")
+arg_cache_hints = input_args.get("cachehints")
+arg_num_prefetch = input_args.get("prefetch")
+arg_preallocate = input_args.get("preallocate")
+arg_block_size = input_args.get("blocksize")
+arg_fsync_policy = input_args.get("fsync")
+arg_checksum_names_list = parse_checksums_arg(input_args.get("checksum"))
+arg_verify_mode = input_args.get("verify")
+arg_num_verify_samples = input_args.get("verifysamples")
+arg_engine = input_args.get("engine")
+arg_calibrate = input_args.get("calibrate")
+arg_timings_path = input_args.get("timings")
+arg_promfile_path = input_args.get("promfile")
+arg_report_format = input_args.get("report")
+arg_report_path = input_args.get("reportpath")
+
+# When printing the report to stdout, move all other feedback to stderr so the report can be parsed directly
+report_stream = sys.stdout
+if arg_report_format != "none" and arg_report_path == "-":
+    sys.stdout = sys.stderr
+
+# Try to make sure ffmpeg and ranger are installed
+check_req_installs()
+
+# Run engine calibration if needed, instead of stitching
+if arg_calibrate:
+    print("", "Calibrating stitching engines...", sep = "\n")
+    calibration_profile_dict = run_engine_calibration()
+    profile_path = save_calibration_profile(calibration_profile_dict)
+    for each_engine, each_profile in calibration_profile_dict["engines"].items():
+        each_result_str = "failed" if not each_profile["usable"] else "{:.3f} s + {:.4f} s per file".format(
+            each_profile["fixed_sec"], each_profile["sec_per_file"])
+        print("  {}: {}".format(each_engine, each_result_str))
+    print("", "Saved calibration profile:", "@ {}".format(os.path.abspath(profile_path)), "", sep = "\n")
+    quit()
+
+# Start timing each phase of the run (including every subprocess call)
+run_timer = Phase_Timer()
+set_active_timer(run_timer)
 
 # Get file search directory
+run_timer.start_phase("history")
 video_search_directory = load_default_search_directory()
 
 
@@ -251,45 +235,16 @@ video_search_directory = load_default_search_directory()
 #%% Select video to clip
 
 # Get the user to select videos or use the script argument
-if arg_input_folder is None:
-    
-    # Some feedback before suddenly jumping into ranger
-    print("",
-          "Please use ranger cli to select video files for stitching",
-          "  --> Use spacebar to select multiple videos.",
-          "  --> When finished, hit enter to complete selection.",
-          "",
-          sep="\n")
-    input("  Press Enter key to continue...")
-    
-    input_file_paths_list = ranger_multifile_select(start_dir = video_search_directory, sort_output = True)
-    
-else:    
-    # Make sure the provided folder is valid
-    arg_input_folder = os.path.expanduser(arg_input_folder)
-    valid_input_folder = os.path.exists(arg_input_folder)
-    if not valid_input_folder:
-        print("", 
-              "Provided input folder path is not valid!",
-              "@ {}".format(arg_input_folder),
-              "",
-              "Quitting...", 
-              sep = "\n")
-        quit()
-    
-    # Provide some feedback about the selected files
-    print("", 
-          "Using input files from provided folder path:",
-          "@ {}".format(arg_input_folder),
-          sep="\n")
-    
-    # List all files in provided folder
-    input_file_paths_list = get_file_list(arg_input_folder,
-                                          show_hidden_files = False,
-                                          create_missing_folder = False,
-                                          return_full_path = True,
-                                          sort_list = True)
-    
+run_timer.start_phase("selection")
+input_file_paths_list = select_input_files(arg_input_folder, video_search_directory,
+                                           use_gui = False,
+                                           recursive = arg_recursive,
+                                           allowable_exts_list = arg_exts_list,
+                                           include_globs_list = arg_include_globs,
+                                           exclude_globs_list = arg_exclude_globs,
+                                           sort_by = arg_sort_by,
+                                           latest_count = arg_latest_count)
+
 # Sanity check
 num_videos_to_stitch = len(input_file_paths_list)
 no_paths = (num_videos_to_stitch == 0)
@@ -298,21 +253,23 @@ if no_paths:
     quit()
 
 # Save the loading directory, for easier re-use
+run_timer.start_phase("history")
 parent_folder_path = save_search_directory(input_file_paths_list[0])
 
 
 # ---------------------------------------------------------------------------------------------------------------------
 #%% Print out selected files for confirmation
 
+# Drop duplicate copies of clips (e.g. from recorder retries or sync tools), so they aren't stitched twice
+duplicates_list = []
+if arg_dedupe == "on":
+    run_timer.start_phase("dedupe")
+    input_file_paths_list, duplicates_list = find_duplicate_inputs(input_file_paths_list)
+    num_videos_to_stitch = len(input_file_paths_list)
+
 # Print out files (in order) for stitching
-file_names_only = [os.path.basename(each_file_path) for each_file_path in input_file_paths_list]
-file_names_strs = ["  {}".format(each_name) for each_name in file_names_only]
-print("",
-      "Files to stitch:",
-      "(in order)",
-      "",
-      *file_names_strs,
-      sep = "\n")
+print_file_listing(input_file_paths_list, "Files to stitch:")
+duplicates_feedback(duplicates_list)
 
 # Another sanity check
 not_enough_files = (num_videos_to_stitch < 2)
@@ -320,35 +277,190 @@ if not_enough_files:
     print("", "Not enough files to stitch! Quitting...", sep = "\n")
     quit()
 
-# Check file extensions, for saving
-save_ext = get_save_extension(input_file_paths_list)
+# Check file extensions, for saving (or use the script argument to switch containers)
+save_ext = get_save_extension(input_file_paths_list) if arg_output_ext is None else normalize_extension(arg_output_ext)
+
+# Probe the inputs, so we can figure out how to copy them into the output container
+run_timer.start_phase("probing")
+probe_results_list = probe_many_videos(input_file_paths_list)
+
+# Give files without audio a silent audio track (matching the other files), since mixing in files without audio
+# breaks the audio of the output. Copies of these files (with audio added) are stitched in place of the originals
+source_paths_list = list(input_file_paths_list)
+remuxed_list = []
+if arg_add_audio == "on":
+    run_timer.start_phase("add_audio")
+    remuxed_list = add_missing_audio(probe_results_list)
+    missing_audio_feedback(remuxed_list)
+    remuxed_ok_list = [each_entry for each_entry in remuxed_list if each_entry["remuxed_path"] is not None]
+    remuxed_probes_list = probe_many_videos([each_entry["remuxed_path"] for each_entry in remuxed_ok_list])
+    input_file_paths_list = list(input_file_paths_list)
+    for each_entry, each_probe_result in zip(remuxed_ok_list, remuxed_probes_list):
+        input_file_paths_list[each_entry["index"]] = each_entry["remuxed_path"]
+        probe_results_list[each_entry["index"]] = each_probe_result
+    run_timer.start_phase("probing")
+_, _, codec_warnings_list = get_majority_codecs(probe_results_list)
+codec_warnings_list += check_codec_compatibility(probe_results_list, save_ext)
+bsf_args_list, bsf_notes_list = select_bitstream_filters(probe_results_list, save_ext)
+layout_args_list, layout_notes_list = build_mp4_layout_args(arg_mp4_layout, probe_results_list, save_ext)
+output_args_list = bsf_args_list + layout_args_list
+
+# Warn about anything that may cause stitching to fail
+for each_warning in codec_warnings_list:
+    print("", "WARNING: {}".format(each_warning), sep = "\n")
+for each_note in (bsf_notes_list + layout_notes_list):
+    print("", each_note, sep = "\n")
+
+# Analyze the timing of every packet of the inputs, to catch problems before they end up in the output
+packet_analysis_list, packet_summary_dict = None, None
+if arg_analyze_mode != "off":
+    if numpy_available():
+        run_timer.start_phase("packet_analysis")
+        print("", "Analyzing packets...", sep = "\n")
+        packet_analysis_list, packet_summary_dict = analyze_packet_timelines(probe_results_list)
+        packet_analysis_feedback(packet_analysis_list, packet_summary_dict)
+        codec_warnings_list += packet_analysis_warnings(packet_summary_dict)
+    else:
+        print("", "WARNING: Skipping packet analysis, the numpy package isn't installed",
+              "Install with:", "", "  pip install numpy", sep = "\n")
+
+# Stop here if only the analysis is needed (saving it as a report, if needed)
+if arg_analyze_mode == "only":
+    if arg_report_format == "json" and packet_summary_dict is not None:
+        report_dict = {"script": "stitcher",
+                       "inputs": build_inputs_report(source_paths_list, probe_results_list),
+                       "added_audio": remuxed_list,
+                       "packet_analysis": {"summary": packet_summary_dict, "files": packet_analysis_list}}
+        report_path = arg_report_path
+        if report_path is None:
+            report_path = build_report_path(parent_folder_path, "packet_analysis")
+        write_run_report(report_dict, report_path, report_stream)
+        if report_path != "-":
+            print("", "Saved report:", "@ {}".format(report_path), sep = "\n")
+    print("", "Analysis only, quitting...", "", sep = "\n")
+    quit()
+
+# Skip the start of any file that overlaps the previous file, so the overlapping footage isn't repeated
+inpoints_list, overlap_info_dict = None, None
+if arg_overlap_source != "off":
+    run_timer.start_phase("overlap_check")
+    inpoints_list, overlap_info_dict = detect_overlap_trims(probe_results_list, arg_overlap_source,
+                                                            arg_min_overlap_sec)
+    overlap_feedback(source_paths_list, overlap_info_dict)
+total_trimmed_sec = sum(overlap_info_dict["trimmed_sec"]) if overlap_info_dict is not None else 0.0
+
+# Find gaps between files (e.g. from a recorder being offline), so the output doesn't silently jump in time
+gap_info_dict = None
+gaps_list = [0.0] * num_videos_to_stitch
+if arg_gap_policy != "off":
+    run_timer.start_phase("gap_check")
+    gap_time_source = arg_overlap_source if arg_overlap_source != "off" else "auto"
+    gap_info_dict = detect_gaps(probe_results_list, gap_time_source, arg_min_gap_sec)
+    gap_info_dict["policy"] = arg_gap_policy
+    gap_feedback(source_paths_list, gap_info_dict, arg_gap_policy)
+    gaps_list = gap_info_dict["gaps_sec"]
+
+# Split the output into separate parts at each gap, by cutting it where each file after a gap begins
+split_times_list = []
+if arg_gap_policy == "split" and sum(gaps_list) > 0:
+    trimmed_secs_list = overlap_info_dict["trimmed_sec"] if overlap_info_dict is not None else None
+    split_times_list = get_part_start_times(probe_results_list, gaps_list, trimmed_secs_list)
+    if split_times_list is None:
+        print("", "WARNING: Couldn't get durations of the inputs, so the output won't be split", sep = "\n")
+        split_times_list = []
+    gap_info_dict["split_times_sec"] = [round(each_sec, 3) for each_sec in split_times_list]
+use_split = (len(split_times_list) > 0)
+
+# Fill gaps with a black/silent filler clip matching the inputs, so the output follows real time
+# -> The filler is encoded once (per stream profile) and cached, so stitching is still a stream copy
+filler_path, filler_duration_sec = None, 10.0
+if arg_gap_policy == "fill" and sum(gaps_list) > 0:
+    run_timer.start_phase("filler")
+    filler_path = get_filler_clip(get_stream_profile(probe_results_list), filler_duration_sec)
+    if filler_path is None:
+        print("", "WARNING: Couldn't create a filler matching the inputs (unsupported codecs?)",
+              "Gaps won't be filled...", sep = "\n")
+    gap_info_dict["filler_path"] = filler_path
+use_fillers = (filler_path is not None)
+total_filled_sec = sum(gaps_list) if use_fillers else 0.0
+
+# Work out where each input lands in the output, for adding chapters & saving an index back to the inputs
+# -> Chapters aren't added to split outputs, since the segment muxer doesn't carry them into each part
+clip_timeline_list = None
+if arg_chapters == "on" or arg_index == "on":
+    trimmed_secs_list = overlap_info_dict["trimmed_sec"] if overlap_info_dict is not None else None
+    clip_durations_list = [get_probed_duration_sec(each_result) for each_result in probe_results_list]
+    clip_timeline_list = build_clip_timeline(clip_durations_list, trimmed_secs_list,
+                                             gaps_list if use_fillers else None)
+    if clip_timeline_list is None:
+        print("", "WARNING: Couldn't get durations of the inputs, so no chapters or index will be saved", sep = "\n")
+use_chapters = (arg_chapters == "on") and (clip_timeline_list is not None)
+use_chapters = use_chapters and chapters_supported(save_ext) and not use_split
+
+# Pick the stitching engine (based on the inputs & locally measured engine performance)
+# -> Trimming & filling are only supported by the demuxer
+run_timer.start_phase("engine_selection")
+total_input_bytes = get_total_file_size(input_file_paths_list)
+demuxer_reasons_list = ["Trimming overlaps requires the demuxer"] if total_trimmed_sec > 0 else []
+demuxer_reasons_list += ["Filling gaps requires the demuxer"] if use_fillers else []
+requested_engine = "demuxer" if len(demuxer_reasons_list) > 0 else arg_engine
+stitch_engine, engine_reasons_list = select_stitch_engine(requested_engine, input_file_paths_list,
+                                                          probe_results_list, total_input_bytes,
+                                                          load_calibration_profile(), packet_summary_dict)
+if requested_engine != arg_engine:
+    engine_reasons_list = demuxer_reasons_list + engine_reasons_list
+engine_feedback(stitch_engine, engine_reasons_list)
 
 
 # ---------------------------------------------------------------------------------------------------------------------
 #%% Figure out saving
 
 # Figure out a reasonable save name and then ask the user if they want to go with something different
+run_timer.start_phase("output_naming")
 default_save_name = "stitched_{}_files".format(num_videos_to_stitch)
-
-# Ask the user for a file name or user the script argument
-if arg_output_name is None:
-    user_outname = cli_prompt_with_defaults("Enter output file name: ", 
-                                            default_value = default_save_name, 
-                                            return_type = str)
-else:
-    user_outname = arg_output_name
-    print("", "Using input argument for output file name:", "  {}".format(user_outname), sep="\n")
+user_outname = get_output_name(arg_output_name, default_save_name)
 
 # Overwrite the default output path if a script argument is available
-save_folder_path = parent_folder_path
-if arg_output_path is not None:
-    save_folder_path = os.path.expanduser(arg_output_path)
-    os.makedirs(save_folder_path, exist_ok = True)
-    print("", "Using input argument for output folder path:", "  {}".format(save_folder_path), sep="\n")
+save_folder_path = get_output_folder(arg_output_path, parent_folder_path)
 
 # Add back extension (and remove any user-added ext)
 save_name = "{}{}".format(user_outname, save_ext)
 save_path = os.path.join(save_folder_path, save_name)
+if use_split:
+    confirm_segments_overwrite([build_segment_pattern(save_folder_path, user_outname, save_ext)])
+else:
+    confirm_overwrite(save_path)
+
+# Make sure the output will fit, since running out of space leaves behind a truncated file
+run_timer.start_phase("space_check")
+if arg_space_check != "off":
+    reserved_bytes = estimate_moov_size_bytes(probe_results_list) if arg_mp4_layout == "faststart" else 0
+    has_enough_space, preflight_dict = check_output_space(input_file_paths_list, save_folder_path, save_ext,
+                                                          extra_bytes = reserved_bytes)
+    space_check_feedback(has_enough_space, preflight_dict, save_folder_path, arg_space_check)
+
+# Make sure the scratch folder exists, otherwise the space check would pass by looking at its parent folder
+use_staging = (arg_scratch_folder is not None)
+if use_staging:
+    try:
+        os.makedirs(arg_scratch_folder, exist_ok = True)
+    except OSError as err_msg:
+        print("", "WARNING: Couldn't create scratch folder:", "  {}".format(err_msg),
+              "Will read inputs directly instead...", sep = "\n")
+        use_staging = False
+
+# Make sure staged copies of the inputs will fit, otherwise read the inputs directly
+if use_staging:
+    has_scratch_space, scratch_dict = check_scratch_space(input_file_paths_list, arg_scratch_folder,
+                                                          save_folder_path, save_ext)
+    if not has_scratch_space:
+        print("",
+              "WARNING: Not enough free space for staging inputs (need {:.2f} GB, have {:.2f} GB)".format(
+                  scratch_dict["required_bytes"] / (1024 ** 3), scratch_dict["free_bytes"] / (1024 ** 3)),
+              "@ {}".format(arg_scratch_folder),
+              "Will read inputs directly instead...",
+              sep = "\n")
+    use_staging = has_scratch_space
 
 
 # ---------------------------------------------------------------------------------------------------------------------
@@ -357,27 +469,279 @@ save_path = os.path.join(save_folder_path, save_name)
 # Some feedback
 print("", "Stitching videos...", sep = "\n")
 
-# Create file text entries, used to tell ffmpeg what to stitch
-stitch_entries_list = ["file '{}'".format(each_file_path) for each_file_path in input_file_paths_list]
-writelines_str = "\n".join(stitch_entries_list)
+# Write to a hidden partial file first, so that an incomplete output never appears under the final name
+# -> When splitting at gaps, numbered parts are written into a hidden partial folder instead
+partial_save_path = build_partial_path(save_path)
+if use_split:
+    partial_save_path = build_partial_path(os.path.join(save_folder_path, user_outname))
+discard_partial_output(partial_save_path)
+
+# Reserve space for the output up front, so the file system can keep it in one piece
+is_preallocated = False
+if arg_preallocate == "on" and not use_split:
+    reserved_bytes = estimate_moov_size_bytes(probe_results_list) if arg_mp4_layout == "faststart" else 0
+    estimated_output_bytes = estimate_output_size_bytes(total_input_bytes, save_ext, reserved_bytes)
+    is_preallocated = preallocate_file(partial_save_path, estimated_output_bytes)
+write_args_list = build_write_args(is_preallocated, arg_block_size)
+output_args_list = output_args_list + write_args_list
+
+# Set up the segment muxer for splitting, which needs the container (layout) arguments passed through to it
+split_pattern_path = None
+if use_split:
+    os.makedirs(partial_save_path)
+    split_pattern_path = build_segment_pattern(partial_save_path, user_outname, save_ext)
+    output_args_list = bsf_args_list + write_args_list + build_segment_output_args(split_times_list,
+                                                                                   layout_args_list)
 
 # Create temporary file to hold videos for stitching
+# -> Time spent on fillers is counted as part of the file after each gap, so progress lines up with the inputs
+input_durations_list = [get_probed_duration_sec(each_result) for each_result in probe_results_list]
+if use_fillers:
+    input_durations_list = [each_duration + each_gap_sec if each_duration is not None else None
+                            for each_duration, each_gap_sec in zip(input_durations_list, gaps_list)]
 with TemporaryDirectory() as temp_dir:
     
-    # Write file list into the temporary file
-    file_listing_path = os.path.join(temp_dir, "stitchlist.txt")
-    with open(file_listing_path, "w") as text_file:
-        text_file.writelines(writelines_str)
-    
-    # Run ffmpeg command to stitch videos
-    run_command_list, human_readable_str = build_ffmpeg_command(file_listing_path, save_path)
-    proc_out = captured_subprocess(run_command_list)
+    # Copy inputs onto scratch space (in parallel), stitching can start once the first few copies have landed
+    stitch_paths_list = input_file_paths_list
+    input_stager = None
+    if use_staging:
+        run_timer.start_phase("staging")
+        staging_ok, copy_errors_list = False, []
+        try:
+            input_stager = Input_Stager(input_file_paths_list, arg_scratch_folder, input_durations_list,
+                                        arg_num_stage_jobs)
+            input_stager.start()
+            
+            # The concat protocol opens every input up front, so it can only start once every copy has landed
+            staging_ok = input_stager.wait_until_ready(wait_for_all = (stitch_engine == "protocol"))
+        except OSError as err_msg:
+            copy_errors_list.append(str(err_msg))
+        finally:
+            # Clean up on any failure (unexpected errors are still raised, but without leaving a partial output)
+            if not staging_ok:
+                copy_errors_list += input_stager.finish() if input_stager is not None else []
+                discard_partial_output(partial_save_path)
+        if not staging_ok:
+            print("", "Error copying inputs to scratch folder:", *copy_errors_list, "", "Quitting...", sep = "\n")
+            quit()
+        stitch_paths_list = input_stager.staged_paths_list
+    
+    # Hash the output while it's being written if possible, so it doesn't need to be read back afterwards
+    # -> ffmpeg writes into a pipe, which is hashed on its way to the (partial) output file
+    output_hasher = None
+    ffmpeg_output_path = partial_save_path if not use_split else split_pattern_path
+    if len(arg_checksum_names_list) > 0 and not use_split:
+        output_hasher = Output_Hasher(partial_save_path, temp_dir, arg_checksum_names_list,
+                                      is_streamable_output(save_ext, arg_mp4_layout))
+        output_hasher.start()
+        ffmpeg_output_path = output_hasher.ffmpeg_output_path
+        output_args_list = output_args_list + output_hasher.ffmpeg_args_list
+    
+    # Add fillers into the gaps between files, if needed
+    stitch_inpoints_list, stitch_outpoints_list, filler_entries_list = inpoints_list, None, []
+    if use_fillers:
+        filled_lists = insert_gap_fillers(stitch_paths_list, inpoints_list, gaps_list, filler_path, filler_duration_sec)
+        stitch_paths_list, stitch_inpoints_list, stitch_outpoints_list, filler_entries_list = filled_lists
+    
+    # Write file list (and chapters) into the temporary folder & build the ffmpeg command for the selected engine
+    run_timer.start_phase("list_writing")
+    chapters_path = None
+    if use_chapters:
+        chapters_path = write_chapters_file(os.path.join(temp_dir, "chapters.txt"), clip_timeline_list,
+                                            source_paths_list)
+    use_protocol_list = (stitch_engine == "protocol") and ffmpeg_supports_concatf()
+    run_command_list, human_readable_str = build_stitch_command(stitch_engine, stitch_paths_list, temp_dir,
+                                                                ffmpeg_output_path, output_args_list,
+                                                                protocol_list_file = use_protocol_list,
+                                                                inpoints_list = stitch_inpoints_list,
+                                                                outpoints_list = stitch_outpoints_list,
+                                                                chapters_file_path = chapters_path)
+    
+    # Prefetch upcoming inputs while ffmpeg works through them, so it doesn't stall at every file boundary
+    # -> Not needed when staging, since copies will have just been written (and are deleted once used)
+    input_prefetcher = Input_Prefetcher(input_file_paths_list, input_durations_list, arg_num_prefetch,
+                                        enabled = (arg_cache_hints == "on") and not use_staging)
+    input_prefetcher.start()
+    
+    # Flush the output to disk while writing if needed, so it isn't all flushed in one burst at the end
+    use_syncer = (arg_fsync_policy == "periodic") and not use_split
+    output_syncer = Periodic_Syncer(partial_save_path) if use_syncer else None
+    
+    # Run ffmpeg command to stitch videos (the partial output is cleaned up if anything goes wrong)
+    # -> When staging, ffmpeg is paused whenever it catches up to the copying
+    run_timer.start_phase("ffmpeg")
+    progress_callbacks_list = [input_stager.on_progress if use_staging else input_prefetcher.on_progress]
+    progress_callbacks_list += [output_syncer.on_progress] if output_syncer is not None else []
+    control_callback = input_stager.bind_controls if use_staging else None
+    proc_out = supervised_subprocess(run_command_list, arg_timeout_sec, arg_stall_timeout_sec, partial_save_path,
+                                     progress_callback = progress_callbacks_list,
+                                     control_callback = control_callback)
+    if output_syncer is not None:
+        output_syncer.finish()
+    
+    # Clean up any remaining scratch copies
+    if use_staging:
+        run_timer.start_phase("staging")
+        copy_errors_list = input_stager.finish()
+        if len(copy_errors_list) > 0:
+            print("", "Error copying inputs to scratch folder:", *copy_errors_list, sep = "\n")
+    
+    # Finish hashing the output (this reads the output back, if it couldn't be hashed while writing)
+    output_digests_dict = None
+    if output_hasher is not None:
+        run_timer.start_phase("checksum")
+        output_digests_dict = output_hasher.finish(proc_out.returncode == 0)
+        
+        # Don't keep an output that ffmpeg finished, but that couldn't be (completely) written to disk
+        if output_hasher.error_msg is not None:
+            print("", output_hasher.error_msg, sep = "\n")
+            proc_out.returncode, proc_out.status = 1, "error"
+            discard_partial_output(partial_save_path)
+    
+    # Move the finished output into place, along with its checksums
+    # -> Split parts are hashed once they're in place, since they can't be hashed while writing
+    run_timer.start_phase("commit")
+    checksum_paths_list = []
+    output_paths_list, output_parts_list = [], None
+    if proc_out.returncode == 0 and not use_split:
+        if is_preallocated:
+            trim_preallocation(partial_save_path)
+        commit_partial_output(partial_save_path, save_path, sync_to_disk = (arg_fsync_policy != "none"))
+        output_paths_list = [save_path]
+        if output_digests_dict is not None:
+            checksum_paths_list = write_checksum_sidecars(save_path, output_digests_dict)
+    elif proc_out.returncode == 0:
+        output_paths_list = commit_partial_folder(partial_save_path, save_folder_path,
+                                                  sync_to_disk = (arg_fsync_policy != "none"))
+        output_parts_list = []
+        for each_part_path in output_paths_list:
+            each_digests_dict = None
+            if len(arg_checksum_names_list) > 0:
+                each_digests_dict = hash_file(each_part_path, arg_checksum_names_list)
+                checksum_paths_list += write_checksum_sidecars(each_part_path, each_digests_dict)
+            output_parts_list.append({"path": os.path.abspath(each_part_path),
+                                      "size_bytes": os.path.getsize(each_part_path),
+                                      "checksums": each_digests_dict})
+    
+    # Save an index next to each output, mapping output times back to the inputs they came from
+    index_paths_list = []
+    if proc_out.returncode == 0 and arg_index == "on" and clip_timeline_list is not None:
+        part_timelines_list = split_timeline_into_parts(clip_timeline_list, split_times_list)
+        for each_output_path, each_timeline_list in zip(output_paths_list, part_timelines_list):
+            index_paths_list += write_clip_index(each_output_path, each_timeline_list, source_paths_list)
+    
+    # Drop inputs & output from the page cache, since we won't be reading them again
+    run_timer.start_phase("cache_hints")
+    input_prefetcher.finish(save_path if (proc_out.returncode == 0 and not use_split) else None)
+    run_timer.end_phase()
     
     # Final feedback
-    process_feedback(proc_out, save_path, human_readable_str)
+    if use_split and proc_out.returncode == 0:
+        print("", "*** Done! No errors ***", "", "Saved {} parts (split at gaps):".format(len(output_paths_list)),
+              *["@ {}".format(each_path) for each_path in output_paths_list], "", sep = "\n")
+    else:
+        process_feedback(proc_out, save_path, human_readable_str)
+    if len(checksum_paths_list) > 0:
+        hashed_inline = output_digests_dict["inline"] if output_digests_dict is not None else False
+        print("Saved checksums{}:".format("" if hashed_inline else " (output was read back for hashing)"),
+              *["@ {}".format(each_path) for each_path in checksum_paths_list], "", sep = "\n")
+    if len(index_paths_list) > 0:
+        print("Saved clip index:", *["@ {}".format(each_path) for each_path in index_paths_list], "", sep = "\n")
 
 
 # ---------------------------------------------------------------------------------------------------------------------
-#%% Scrap
+#%% Verify output
+
+# Check that every packet of the inputs made it into the output, since ffmpeg can 'succeed' with missing data
+# -> Fillers count as inputs, with the unused end of any shortened filler counted as trimmed
+packet_check_dict, boundary_check_dict = None, None
+if arg_verify_mode != "off" and proc_out.returncode == 0 and use_split:
+    print("", "Skipping verification, since the output was split into parts", sep = "\n")
+if arg_verify_mode != "off" and proc_out.returncode == 0 and not use_split:
+    run_timer.start_phase("verify")
+    verify_paths_list = input_file_paths_list + [each_path for each_path, _ in filler_entries_list]
+    filler_cut_sec = sum(filler_duration_sec - each_sec for _, each_sec in filler_entries_list)
+    packet_check_dict = verify_stream_packets(save_path, verify_paths_list, total_trimmed_sec + filler_cut_sec)
+    
+    # Compare packet data at clip boundaries, unless bitstream filters were used (they modify the data)
+    if arg_verify_mode == "hashes":
+        boundary_check_dict = {"status": "unverified", "reason": "bitstream filters modify packets", "boundaries": []}
+        if total_trimmed_sec > 0:
+            boundary_check_dict["reason"] = "inputs were trimmed"
+        elif use_fillers:
+            boundary_check_dict["reason"] = "fillers were inserted"
+        elif len(bsf_args_list) == 0:
+            boundary_check_dict = verify_boundary_hashes(save_path, probe_results_list, arg_num_verify_samples)
+    run_timer.end_phase()
+    
+    verification_feedback(packet_check_dict, boundary_check_dict)
 
 
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Save run info
+
+# Gather up info about the run, for saving timings/reports
+run_succeeded = (proc_out.returncode == 0)
+output_bytes = get_total_file_size(output_paths_list) if run_succeeded else 0
+run_timer.info_dict.update({"input_files": num_videos_to_stitch,
+                            "input_bytes": total_input_bytes,
+                            "output_bytes": output_bytes,
+                            "engine": stitch_engine})
+timings_dict = build_timings_dict(run_timer, "stitcher", success = run_succeeded)
+
+# Save timing info, if needed
+if (arg_timings_path is not None) or (arg_promfile_path is not None):
+    saved_paths_list = save_timings(timings_dict, arg_timings_path, arg_promfile_path)
+    print("Saved timings:", *["@ {}".format(each_path) for each_path in saved_paths_list], "", sep = "\n")
+
+# Save a report of the run, if needed
+if arg_report_format == "json":
+    verification_dict = {"status": "failed"}
+    if run_succeeded:
+        verification_dict = verify_output_duration(output_paths_list, probe_results_list,
+                                                   offset_sec = total_filled_sec - total_trimmed_sec)
+    for each_key, each_check_dict in [("packets", packet_check_dict), ("boundaries", boundary_check_dict)]:
+        if each_check_dict is None:
+            continue
+        verification_dict[each_key] = each_check_dict
+        if each_check_dict["status"] == "mismatch":
+            verification_dict["status"] = "mismatch"
+    stderr_str = proc_out.stderr.decode(errors = "ignore") if proc_out.stderr else ""
+    report_dict = {"script": "stitcher",
+                   "success": run_succeeded,
+                   "return_code": proc_out.returncode,
+                   "status": proc_out.status,
+                   "inputs": build_inputs_report(source_paths_list, probe_results_list),
+                   "duplicates": duplicates_list,
+                   "added_audio": remuxed_list,
+                   "overlaps": overlap_info_dict,
+                   "gaps": gap_info_dict,
+                   "packet_analysis": {"summary": packet_summary_dict, "files": packet_analysis_list},
+                   "output": {"path": os.path.abspath(save_path) if not use_split else None,
+                              "size_bytes": output_bytes,
+                              "duration_sec": verification_dict.get("output_duration_sec", None),
+                              "checksums": output_digests_dict,
+                              "parts": output_parts_list,
+                              "chapters": len(clip_timeline_list) if use_chapters else 0,
+                              "index": [os.path.abspath(each_path) for each_path in index_paths_list]},
+                   "engine": stitch_engine,
+                   "engine_reasons": engine_reasons_list,
+                   "write": {"preallocated": is_preallocated,
+                             "block_size": arg_block_size,
+                             "fsync": arg_fsync_policy,
+                             "periodic_syncs": output_syncer.num_syncs if output_syncer is not None else 0},
+                   "command": human_readable_str,
+                   "warnings": codec_warnings_list,
+                   "notes": bsf_notes_list + layout_notes_list,
+                   "ffmpeg_messages": parse_ffmpeg_messages(stderr_str),
+                   "timings": timings_dict,
+                   "verification": verification_dict}
+    report_path = build_report_path(save_folder_path, user_outname) if arg_report_path is None else arg_report_path
+    write_run_report(report_dict, report_path, report_stream)
+    if report_path != "-":
+        print("Saved report:", "@ {}".format(report_path), "", sep = "\n")
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+#%% Scrap
+